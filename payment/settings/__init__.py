@@ -0,0 +1,17 @@
+"""
+Settings del proyecto, DJANGO_ENV selecciona el perfil: dev (por defecto) o prod
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+DJANGO_ENV = os.environ.get('DJANGO_ENV', 'dev')
+
+# Un valor desconocido (por ejemplo production) no debe cargar el perfil de desarrollo con DEBUG
+if DJANGO_ENV == 'prod':
+    from payment.settings.prod import *  # noqa: F401,F403
+elif DJANGO_ENV == 'dev':
+    from payment.settings.dev import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured("DJANGO_ENV debe ser dev o prod, se recibio '{}'".format(DJANGO_ENV))
@@ -0,0 +1,209 @@
+"""
+Django settings for payment project, comunes a dev y prod.
+
+Generated by 'django-admin startproject' using Django 4.1.2.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.1/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/4.1/ref/settings/
+"""
+
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/4.1/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'django-insecure-jb8v&rj!cr%bwohc6-=w!3c7u&(^2m2k)_%n7ca5e^8(b0$u*3'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = []
+
+# Monta la documentacion swagger en la ruta inicial
+API_DOCS = True
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'rest_framework',
+    'transations',
+    'drf_yasg',
+    'django_filters'
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'transations.metrics.MetricsMiddleware',
+    'transations.query_shapes.QueryShapeMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'payment.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'payment.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/4.1/ref/settings/#databases
+
+# Por defecto SQLite, DB_ENGINE=postgresql usa PostgreSQL (requiere psycopg2)
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE == 'sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Segundos que espera una escritura mientras otra conexion tiene el bloqueo (busy_timeout)
+                'timeout': float(os.environ.get('DB_BUSY_TIMEOUT', 20)),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.{}'.format(DB_ENGINE),
+            'NAME': os.environ.get('DB_NAME', 'payment'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', ''),
+            'PORT': os.environ.get('DB_PORT', ''),
+            # Con un pool externo en modo transaccion (pgbouncer) los cursores del servidor no funcionan
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_POOLER', '') == 'transaction',
+        }
+    }
+
+# Conexiones persistentes: segundos que se reutiliza una conexion entre peticiones (0 la cierra
+# en cada peticion), con verificacion de la conexion antes de reutilizarla
+DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+DATABASES['default']['CONN_HEALTH_CHECKS'] = os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1'
+
+# PRAGMA que se ejecutan en cada conexion SQLite nueva: WAL permite leer mientras se escribe
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': 'normal',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'payment'),
+    }
+}
+
+# Alias y segundos de vida del cache de cuentas (balances y listado)
+ACCOUNT_CACHE_ALIAS = 'default'
+ACCOUNT_CACHE_TIMEOUT = 300
+
+
+# Password validation
+# https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/4.1/topics/i18n/
+
+LANGUAGE_CODE = 'es-ES'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/4.1/howto/static-files/
+
+STATIC_URL = 'static/'
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'transations.renderers.RowsJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+
+# Horas que se conservan las llaves de idempotencia antes de purgarlas
+IDEMPOTENCY_KEY_TTL_HOURS = 24
+
+# Fraccion de peticiones instrumentadas con Server-Timing, log y los histogramas de /metrics/
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', 1))
+# Si se define, /metrics/ requiere el header Authorization: Bearer <token>
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Detector de queries repetidas (N+1) y lentas por peticion, 0 lo desactiva
+QUERY_SHAPE_THRESHOLD = int(os.environ.get('QUERY_SHAPE_THRESHOLD', 0))
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+
+# Contadores por cuenta en modo sharded, los abonos concurrentes se reparten entre ellos
+BALANCE_SHARD_COUNT = 8
+
+# Carpeta para los archivos generados por los trabajos de exportacion (comando run_jobs)
+JOB_OUTPUT_DIR = os.environ.get('JOB_OUTPUT_DIR', BASE_DIR / 'job_output')
+# Segundos sin latido tras los que un trabajo en ejecucion se vuelve a reclamar
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 600))
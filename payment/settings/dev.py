@@ -0,0 +1,15 @@
+"""
+Settings de desarrollo: DEBUG, django-debug-toolbar y la API navegable
+"""
+
+from payment.settings.base import *  # noqa: F401,F403
+
+DEBUG = True
+
+INSTALLED_APPS = INSTALLED_APPS + ['debug_toolbar']
+
+MIDDLEWARE = MIDDLEWARE + ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
+INTERNAL_IPS = [
+    "127.0.0.1"
+]
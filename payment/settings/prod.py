@@ -0,0 +1,50 @@
+"""
+Settings de produccion: sin DEBUG (no se guardan las consultas SQL de cada conexion),
+sin debug toolbar ni swagger, templates en cache y solo respuestas JSON
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from payment.settings.base import *  # noqa: F401,F403
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('SECRET_KEY')
+
+if not SECRET_KEY:
+    raise ImproperlyConfigured('SECRET_KEY es obligatorio con DJANGO_ENV=prod')
+
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get('ALLOWED_HOSTS', '').split(',') if host.strip()]
+
+# Sin hosts permitidos todas las peticiones responden 400 sin ningun aviso
+if not ALLOWED_HOSTS:
+    raise ImproperlyConfigured('ALLOWED_HOSTS es obligatorio con DJANGO_ENV=prod (hosts separados por comas)')
+
+API_DOCS = os.environ.get('API_DOCS', '0') == '1'
+
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', 0.05))
+
+STATIC_ROOT = os.environ.get('STATIC_ROOT', BASE_DIR / 'static')
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['transations.renderers.RowsJSONRenderer'],
+}
@@ -1,12 +1,48 @@
 from django.contrib import admin
-from transations.models import AccountModel, TransactionModel
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
+from transations.models import AccountModel, TransactionModel, JobModel
+
+
+class BoundedCountPaginator(Paginator):
+    """
+    Paginador del admin que no cuenta toda la tabla.
+
+    Sin filtros en PostgreSQL se usa el numero de filas estimado de las estadisticas de la
+    tabla, en otro caso el conteo se detiene en count_limit filas, las paginas posteriores
+    se alcanzan filtrando o con la jerarquia de fechas.
+    """
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where and connections[queryset.db].vendor == 'postgresql':
+            estimate = self.estimated_count(queryset)
+            if estimate > self.count_limit:
+                return estimate
+        return queryset[:self.count_limit].count()
+
+    @staticmethod
+    def estimated_count(queryset):
+        """
+        Filas estimadas de la tabla segun pg_class, -1 si la tabla no tiene estadisticas
+        """
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        return int(row[0]) if row else -1
 
 
 class DataViewOnlyAdmin(admin.ModelAdmin):
     """
     Clase base para desativar todos los permisos menos de lectura en el administrador
     """
+    paginator = BoundedCountPaginator
+    # Evita el COUNT(*) de toda la tabla cuando se aplican filtros o busquedas
+    show_full_result_count = False
 
     def has_add_permission(self, request):
         return False
@@ -23,7 +59,10 @@ class AccountAdmin(DataViewOnlyAdmin):
     """
     Clase para la administracion de cuentas
     """
-    list_display = ('name', 'balance')
+    list_display = ('name', 'balance', 'balance_mode')
+    list_filter = ('balance_mode',)
+    search_fields = ('=name',)
+    ordering = ('id',)
 
     
 @admin.register(TransactionModel)
@@ -32,4 +71,20 @@ class TransactionAdmin(DataViewOnlyAdmin):
     Clase para la administracion de transaciones
     """
     list_display = ('amount', 'description', 'date', 'income', 'account')
-    
\ No newline at end of file
+    list_select_related = ('account',)
+    list_filter = ('income',)
+    # Busqueda exacta por el nombre unico de la cuenta
+    search_fields = ('=account__name',)
+    date_hierarchy = 'date'
+    ordering = ('date', 'id')
+    
+
+
+@admin.register(JobModel)
+class JobAdmin(DataViewOnlyAdmin):
+    """
+    Clase para consultar los trabajos y su progreso
+    """
+    list_display = ('id', 'kind', 'status', 'progress', 'total', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    exclude = ('payload',)
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class TransationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'transations'
+
+    def ready(self):
+        from transations.db import configure_sqlite
+
+        connection_created.connect(configure_sqlite, dispatch_uid='transations.configure_sqlite')
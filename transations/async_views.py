@@ -0,0 +1,126 @@
+from functools import wraps
+
+from django.http import HttpResponseNotAllowed, JsonResponse
+
+from django_filters import rest_framework as filters
+
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.request import Request
+
+from transations.cache import acached_account, acached_account_list
+from transations.filters import TransactionFilter
+from transations.models import AccountModel, TransactionModel
+from transations.pagination import TransactionKeysetPagination
+from transations.serializers import TRANSACTION_ROWS
+
+
+ACCOUNT_FIELDS = ('id', 'name', 'balance', 'pending_balance')
+
+
+class AsyncTransactionFilter(TransactionFilter):
+    """
+    Filtros del listado asincrono, la cuenta se filtra por id para que validar los
+    parametros no consulte la base de datos fuera del ORM asincrono
+    """
+    account = filters.NumberFilter(field_name='account')
+
+
+def account_row(row):
+    """
+    Cuenta de values() con el mismo formato de AccountSerializer
+    """
+    return {'id': row['id'], 'name': row['name'], 'balance': str(row['balance'] + (row['pending_balance'] or 0))}
+
+
+def async_api_view(view):
+    """
+    Vista asincrona de solo lectura, convierte las excepciones de DRF en respuestas JSON
+    ya que estas vistas no pasan por APIView.
+
+    Los decoradores de django.views.decorators.http no soportan vistas asincronas en
+    esta version, por eso el metodo se valida aqui.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return HttpResponseNotAllowed(['GET'])
+        try:
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            return JsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+    return wrapper
+
+
+async def get_account(pk):
+    """
+    Cuenta por id
+
+    Raises:
+        NotFound: si la cuenta no existe
+    """
+    try:
+        return await AccountModel.objects.with_pending_balance().values(*ACCOUNT_FIELDS).aget(pk=pk)
+    except AccountModel.DoesNotExist:
+        raise NotFound()
+
+
+@async_api_view
+async def account_list(request):
+    """
+    Listado de cuentas con sus balances
+    """
+    async def load():
+        queryset = AccountModel.objects.with_pending_balance().values(*ACCOUNT_FIELDS)
+        return [account_row(row) async for row in queryset.aiterator()]
+
+    return JsonResponse(await acached_account_list(load), safe=False)
+
+
+@async_api_view
+async def account_detail(request, pk):
+    """
+    Detalle de la cuenta
+    """
+    async def load():
+        return account_row(await get_account(pk))
+
+    return JsonResponse(await acached_account(pk, load))
+
+
+@async_api_view
+async def account_history(request, pk):
+    """
+    Historico de transaciones de la cuenta, paginado por cursor sobre (date, id)
+    """
+    account = await get_account(pk)
+    paginator = TransactionKeysetPagination()
+    queryset = TransactionModel.objects.filter(account_id=pk).values_list(*TRANSACTION_ROWS.columns, named=True)
+    page = await paginator.apaginate_queryset(queryset, Request(request))
+
+    data = {
+        'name': account['name'],
+        'balance': account_row(account)['balance'],
+        'account_transaction': TRANSACTION_ROWS.many(page).tolist(),
+    }
+    data.update(paginator.get_links())
+    return JsonResponse(data)
+
+
+@async_api_view
+async def transaction_list(request):
+    """
+    Listado de transaciones con los filtros por cuenta, año y mes, paginado por cursor
+    """
+    queryset = TransactionModel.objects.values_list(*TRANSACTION_ROWS.columns, named=True)
+    filterset = AsyncTransactionFilter(request.GET, queryset=queryset)
+    if not filterset.is_valid():
+        return JsonResponse(
+            {field: [str(error) for error in errors] for field, errors in filterset.errors.items()}, status=400)
+
+    paginator = TransactionKeysetPagination()
+    page = await paginator.apaginate_queryset(filterset.qs, Request(request))
+    return JsonResponse({
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': TRANSACTION_ROWS.many(page).tolist(),
+    })
@@ -0,0 +1,125 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db.models import OuterRef, Q, Subquery, Sum
+
+from transations.models import (
+    AccountModel, TransactionModel, DailyBalanceSnapshotModel, MANUAL_ADJUSTMENT_DESCRIPTION, SIGNED_AMOUNT
+)
+
+
+def balances_at(account_ids, day):
+    """
+    Balance de las cuentas al final de un dia, ver balances_and_resets_at
+    """
+    return balances_and_resets_at(account_ids, day)[0]
+
+
+def balances_and_resets_at(account_ids, day):
+    """
+    Balance de las cuentas al final de un dia y su ultimo ajuste manual hasta ese dia.
+
+    Un ajuste manual reemplaza el balance igual que en AccountModel.balance y en la
+    conciliacion: descarta las transaciones escritas antes que el (id menor) sin importar su
+    fecha, y una transacion con fecha anterior escrita despues del ajuste se suma. Las cuentas
+    con un ajuste manual hasta day parten de su ultimo ajuste (por id) y suman las
+    transaciones escritas despues. Las demas parten de la ultima foto diaria anterior o igual
+    a day y solo suman las transaciones con fecha posterior a la foto, con el indice
+    (account, date, id) la consulta queda acotada a la actividad desde la foto.
+
+    Args:
+        account_ids (iterable): ids de las cuentas, menos de 999 para el limite de parametros de SQLite
+        day (date): fecha a consultar, incluye las transaciones de ese dia
+    Returns:
+        dict: {id cuenta: balance} con las cuentas que existen
+        dict: {id cuenta: id del ultimo ajuste manual} de las cuentas con ajustes hasta day
+    """
+    snapshots = DailyBalanceSnapshotModel.objects.filter(account=OuterRef('pk'), date__lte=day).order_by('-date')
+    resets = TransactionModel.objects.filter(
+        account=OuterRef('pk'), date__lte=day, description=MANUAL_ADJUSTMENT_DESCRIPTION).order_by('-id')
+    accounts = AccountModel.objects.filter(id__in=list(account_ids)).annotate(
+        snapshot_date=Subquery(snapshots.values('date')[:1]),
+        snapshot_balance=Subquery(snapshots.values('balance')[:1]),
+        reset_id=Subquery(resets.values('id')[:1]),
+        reset_amount=Subquery(resets.values('amount')[:1]),
+    ).values_list('id', 'snapshot_date', 'snapshot_balance', 'reset_id', 'reset_amount')
+
+    balances = {}
+    last_reset = {}
+    # Cuentas agrupadas por la fecha de su foto, normalmente todas comparten la misma
+    by_snapshot_date = defaultdict(list)
+    for account_id, snapshot_date, snapshot_balance, reset_id, reset_amount in accounts:
+        if reset_id is not None:
+            last_reset[account_id] = (reset_id, reset_amount)
+        else:
+            balances[account_id] = snapshot_balance or 0
+            by_snapshot_date[snapshot_date].append(account_id)
+
+    for snapshot_date, group in by_snapshot_date.items():
+        in_range = Q(account_id__in=group, date__lte=day)
+        if snapshot_date is not None:
+            in_range &= Q(date__gt=snapshot_date)
+
+        for account_id, total in (TransactionModel.objects.filter(in_range).values('account_id')
+                                  .annotate(total=Sum(SIGNED_AMOUNT)).values_list('account_id', 'total')):
+            balances[account_id] += total
+
+    if last_reset:
+        balances.update(balances_after_reset(last_reset, day))
+    return balances, {account_id: reset_id for account_id, (reset_id, _) in last_reset.items()}
+
+
+def balances_after_reset(last_reset, day):
+    """
+    Balance de las cuentas desde su ultimo ajuste manual hasta day, con las transaciones
+    escritas despues del ajuste (id mayor) y fecha hasta day
+
+    Args:
+        last_reset (dict): {id cuenta: (id, monto) del ultimo ajuste manual}
+        day (date): fecha a consultar
+    Returns:
+        dict: {id cuenta: balance}
+    """
+    balances = {account_id: amount for account_id, (_, amount) in last_reset.items()}
+    after_reset = reduce(or_, (
+        Q(account_id=account_id, id__gt=reset_id) for account_id, (reset_id, _) in last_reset.items()))
+    for account_id, total in (TransactionModel.objects.filter(after_reset, date__lte=day)
+                              .values('account_id').annotate(total=Sum(SIGNED_AMOUNT))
+                              .values_list('account_id', 'total')):
+        balances[account_id] += total
+    return balances
+
+
+def take_snapshots(day, batch_size=500):
+    """
+    Guarda la foto de balance de todas las cuentas al final de day, una foto existente del
+    mismo dia se reemplaza
+
+    Args:
+        day (date): dia terminado
+        batch_size (int, optional): cuentas por lote. por defecto 500.
+    Returns:
+        int: fotos guardadas
+    """
+    saved = 0
+    account_ids = AccountModel.objects.order_by('id').values_list('id', flat=True)
+    batch = []
+    for account_id in account_ids.iterator(chunk_size=batch_size):
+        batch.append(account_id)
+        if len(batch) >= batch_size:
+            saved += _save_snapshots(batch, day)
+            batch = []
+    if batch:
+        saved += _save_snapshots(batch, day)
+    return saved
+
+
+def _save_snapshots(account_ids, day):
+    snapshots = [
+        DailyBalanceSnapshotModel(account_id=account_id, date=day, balance=balance)
+        for account_id, balance in balances_at(account_ids, day).items()
+    ]
+    DailyBalanceSnapshotModel.objects.bulk_create(
+        snapshots, update_conflicts=True, unique_fields=['account_id', 'date'], update_fields=['balance'])
+    return len(snapshots)
@@ -0,0 +1,231 @@
+import random
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from transations.cache import get_cache
+from transations.models import AccountModel, JobModel, TransactionModel
+
+
+# Sentencias de control de transacciones, no cuentan para el presupuesto
+TRANSACTION_STATEMENTS = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+EndpointResult = namedtuple('EndpointResult', ['name', 'status', 'p50', 'p95', 'queries', 'budget', 'peak_memory'])
+
+
+class Endpoint:
+    """
+    Endpoint a medir en el benchmark
+
+    Args:
+        name (str): nombre del endpoint
+        method (str): metodo http del cliente de pruebas
+        url (callable): recibe el contexto y retorna la url
+        budget (int): numero maximo de queries permitido
+        data (callable, optional): recibe el contexto y retorna el cuerpo de la peticion. por defecto None.
+        setup (callable, optional): prepara datos antes de cada peticion, fuera de la medicion. por defecto None.
+        cold_cache (bool, optional): vacia el cache de cuentas antes de cada peticion, asi se mide la
+            lectura de la base de datos y no un acierto del cache. por defecto False.
+    """
+
+    def __init__(self, name, method, url, budget, data=None, setup=None, cold_cache=False):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.budget = budget
+        self.data = data
+        self.setup = setup
+        self.cold_cache = cold_cache
+
+    def prepare(self, context):
+        """
+        Prepara los datos de la siguiente peticion, se llama fuera de la medicion
+        """
+        if self.cold_cache:
+            get_cache().clear()
+        if self.setup is not None:
+            self.setup(context)
+
+    def request(self, client, context):
+        """
+        Ejecuta la peticion con el cliente de pruebas
+        """
+        data = self.data(context) if self.data is not None else {}
+        return getattr(client, self.method)(self.url(context), data, format='json')
+
+
+def _create_account(context):
+    context['created_account'] = AccountModel.objects.create(name=get_random_string(length=32), balance=10).id
+
+
+def _create_transaction(context):
+    context['created_transaction'] = TransactionModel.objects.create(
+        amount=1, description='ingreso', date=date.today(), income=True, account_id=context['account']).id
+
+
+def _create_job(context):
+    if 'job' not in context:
+        context['job'] = JobModel.objects.create(kind=JobModel.RECONCILE_BALANCES, payload={}).id
+
+
+def _account_url(action=''):
+    return lambda context: reverse('account-list') + '{}/{}'.format(context['account'], action)
+
+
+# Presupuesto de queries por endpoint sin contar el control de transacciones, asi es el mismo
+# dentro de un TestCase (savepoints) y en el comando benchmark_api (BEGIN)
+ENDPOINTS = [
+    Endpoint('account-list', 'get', lambda context: reverse('account-list'), budget=1, cold_cache=True),
+    Endpoint('account-retrieve', 'get', _account_url(), budget=1, cold_cache=True),
+    Endpoint('account-create', 'post', lambda context: reverse('account-list'), budget=6, data=lambda context: {
+        'name': get_random_string(length=32), 'balance': 100}),
+    Endpoint('account-update', 'put', _account_url(), budget=5, data=lambda context: {
+        'name': get_random_string(length=32), 'balance': 100000}),
+    Endpoint('account-destroy', 'delete', lambda context: reverse('account-list') + '{}/'.format(
+        context['created_account']), budget=8, setup=_create_account),
+    Endpoint('account-transaction-history', 'get', _account_url('transaction_history/'), budget=2),
+    Endpoint('account-export', 'get', _account_url('export/'), budget=2),
+    Endpoint('account-summary', 'get', _account_url('summary/'), budget=3),
+    Endpoint('account-balance-at', 'get', _account_url('balance_at/'), budget=3,
+             data=lambda context: {'date': '2021-06-30'}),
+    Endpoint('account-transaction-amount', 'post', lambda context: reverse('account-list') + 'transaction_amount/',
+             budget=8, data=lambda context: {
+                 'from_account': context['account'], 'to_account': context['other'], 'amount': 1}),
+    Endpoint('account-transaction-amount-bulk', 'post',
+             lambda context: reverse('account-list') + 'transaction_amount_bulk/', budget=9,
+             data=lambda context: {'transfers': [
+                 {'from_account': context['account'], 'to_account': context['other'], 'amount': 1},
+                 {'from_account': context['other'], 'to_account': context['account'], 'amount': 1},
+             ] * 50}),
+    Endpoint('transaction-list', 'get', lambda context: reverse('transaction-list'), budget=1),
+    Endpoint('transaction-list-filtered', 'get', lambda context: reverse('transaction-list'), budget=2,
+             data=lambda context: {'account': context['account'], 'date__year': 2021, 'date__month': 6}),
+    Endpoint('transaction-retrieve', 'get', lambda context: reverse('transaction-list') + '{}/'.format(
+        context['transaction']), budget=1),
+    # Transacion con fecha anterior, ajusta las fotos diarias de balance posteriores
+    Endpoint('transaction-create', 'post', lambda context: reverse('transaction-list'), budget=8,
+             data=lambda context: {'amount': 1, 'date': '2021-06-01', 'income': True, 'account': context['account']}),
+    Endpoint('transaction-destroy', 'delete', lambda context: reverse('transaction-list') + '{}/'.format(
+        context['created_transaction']), budget=8, setup=_create_transaction),
+    Endpoint('transaction-bulk', 'post', lambda context: reverse('transaction-list') + 'bulk/', budget=7,
+             data=lambda context: [
+                 {'amount': 1, 'date': '2021-06-01', 'income': True, 'account': context['account']},
+                 {'amount': 1, 'date': '2021-06-01', 'income': True, 'account': context['other']},
+             ] * 50),
+    Endpoint('async-account-list', 'get', lambda context: reverse('async-account-list'), budget=1, cold_cache=True),
+    Endpoint('async-account-detail', 'get', lambda context: reverse('async-account-detail', args=[context['account']]),
+             budget=1, cold_cache=True),
+    Endpoint('async-account-history', 'get',
+             lambda context: reverse('async-account-history', args=[context['account']]), budget=2),
+    Endpoint('async-transaction-list', 'get', lambda context: reverse('async-transaction-list'), budget=1,
+             data=lambda context: {'account': context['account']}),
+    Endpoint('job-create', 'post', lambda context: reverse('job-list'), budget=1,
+             data=lambda context: {'kind': 'reconcile_balances', 'payload': {}}),
+    Endpoint('job-retrieve', 'get', lambda context: reverse('job-detail', args=[context['job']]), budget=1,
+             setup=_create_job),
+]
+
+
+def seed(accounts=100, transactions=1000, batch_size=5000):
+    """
+    Crea cuentas y transaciones aleatorias para el benchmark, la primera cuenta concentra
+    la mitad de las transaciones para simular una cuenta con mucho movimiento
+
+    Args:
+        accounts (int, optional): numero de cuentas. por defecto 100.
+        transactions (int, optional): numero de transaciones. por defecto 1000.
+        batch_size (int, optional): filas por insercion. por defecto 5000.
+    Returns:
+        dict: contexto con la cuenta principal, otra cuenta y una transacion
+    """
+    for start in range(0, accounts, batch_size):
+        AccountModel.objects.bulk_create([
+            AccountModel(name=get_random_string(length=32), balance=random.randint(1000, 100000))
+            for _ in range(min(batch_size, accounts - start))
+        ])
+    account_ids = list(AccountModel.objects.order_by('id').values_list('id', flat=True))
+    busy_account = account_ids[0]
+
+    start_date = date(2020, 1, 1)
+    for start in range(0, transactions, batch_size):
+        TransactionModel.objects.bulk_create([
+            TransactionModel(
+                amount=random.randint(1, 389),
+                description='ingreso',
+                date=start_date + timedelta(days=random.randint(0, 1095)),
+                income=True,
+                account_id=busy_account if random.random() < 0.5 else random.choice(account_ids)
+            )
+            for _ in range(min(batch_size, transactions - start))
+        ])
+
+    return {
+        'account': busy_account,
+        'other': account_ids[-1] if len(account_ids) > 1 else busy_account,
+        'transaction': TransactionModel.objects.filter(account_id=busy_account).values_list('id', flat=True).first(),
+    }
+
+
+def percentile(values, percent):
+    """
+    Percentil por rango mas cercano de una lista de valores
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(percent / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_benchmark(client, context, iterations=10, endpoints=None):
+    """
+    Mide cada endpoint con el cliente de pruebas
+
+    La primera peticion de cada endpoint se usa para contar queries y memoria pico (con
+    tracemalloc activo), las siguientes solo miden latencia para no afectar los tiempos. La
+    preparacion del endpoint se ejecuta antes de cada peticion, fuera de la captura y del tiempo.
+
+    Args:
+        client (APIClient): cliente de pruebas
+        context (dict): contexto retornado por seed
+        iterations (int, optional): peticiones medidas por endpoint. por defecto 10.
+        endpoints (list, optional): endpoints a medir. por defecto ENDPOINTS.
+    Returns:
+        list: EndpointResult por endpoint, latencias en milisegundos y memoria en KiB
+    """
+    results = []
+    for endpoint in endpoints or ENDPOINTS:
+        endpoint.prepare(context)
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            response = endpoint.request(client, context)
+            if hasattr(response, 'streaming_content'):
+                b''.join(response.streaming_content)
+        # Las queries capturadas se leen del log de la conexion, que se reinicia en cada peticion
+        query_count = sum(1 for query in queries if not query['sql'].startswith(TRANSACTION_STATEMENTS))
+        peak_memory = tracemalloc.get_traced_memory()[1] / 1024.0
+        tracemalloc.stop()
+
+        timings = []
+        for _ in range(iterations):
+            endpoint.prepare(context)
+            start = time.perf_counter()
+            timed_response = endpoint.request(client, context)
+            if hasattr(timed_response, 'streaming_content'):
+                b''.join(timed_response.streaming_content)
+            timings.append((time.perf_counter() - start) * 1000.0)
+
+        results.append(EndpointResult(
+            endpoint.name,
+            response.status_code,
+            percentile(timings, 50) if timings else None,
+            percentile(timings, 95) if timings else None,
+            query_count,
+            endpoint.budget,
+            peak_memory,
+        ))
+    return results
@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+LIST_VERSION_KEY = 'account:list:version'
+
+
+def get_cache():
+    """
+    Cache configurado para las cuentas, ACCOUNT_CACHE_ALIAS permite usar otro backend
+    """
+    return caches[getattr(settings, 'ACCOUNT_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'ACCOUNT_CACHE_TIMEOUT', 300)
+
+
+def account_version_key(account_id):
+    return 'account:{}:version'.format(account_id)
+
+
+def cached(data_key, version_key, loader):
+    """
+    Lectura a traves del cache: la llave de los datos incluye el numero de version, al
+    incrementar la version las entradas anteriores dejan de usarse y expiran solas
+
+    Args:
+        data_key (str): prefijo de la llave de los datos
+        version_key (str): llave del numero de version
+        loader (callable): calcula los datos cuando no estan en cache
+    Returns:
+        los datos en cache o los retornados por loader
+    """
+    cache = get_cache()
+    key = '{}:v{}'.format(data_key, cache.get(version_key, 0))
+    data = cache.get(key)
+    if data is None:
+        data = loader()
+        cache.set(key, data, get_timeout())
+    return data
+
+
+async def acached(data_key, version_key, loader):
+    """
+    Version asincrona de cached, loader debe ser una funcion asincrona
+    """
+    cache = get_cache()
+    key = '{}:v{}'.format(data_key, await cache.aget(version_key, 0))
+    data = await cache.aget(key)
+    if data is None:
+        data = await loader()
+        await cache.aset(key, data, get_timeout())
+    return data
+
+
+def cached_account(account_id, loader):
+    """
+    Detalle de una cuenta a traves del cache
+    """
+    return cached('account:{}'.format(account_id), account_version_key(account_id), loader)
+
+
+def cached_account_list(loader):
+    """
+    Listado de cuentas a traves del cache
+    """
+    return cached('account:list', LIST_VERSION_KEY, loader)
+
+
+async def acached_account(account_id, loader):
+    """
+    Detalle de una cuenta a traves del cache para las vistas asincronas
+    """
+    return await acached('account:{}'.format(account_id), account_version_key(account_id), loader)
+
+
+async def acached_account_list(loader):
+    """
+    Listado de cuentas a traves del cache para las vistas asincronas
+    """
+    return await acached('account:list', LIST_VERSION_KEY, loader)
+
+
+def _bump(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def invalidate_accounts(*account_ids):
+    """
+    Incrementa la version de las cuentas y del listado cuando la transaccion actual se
+    confirme, antes de eso otros procesos todavia leen los valores anteriores
+
+    Args:
+        account_ids (int): ids de las cuentas modificadas
+    """
+    def bump():
+        cache = get_cache()
+        for account_id in set(account_ids):
+            _bump(cache, account_version_key(account_id))
+        _bump(cache, LIST_VERSION_KEY)
+
+    transaction.on_commit(bump)
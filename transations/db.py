@@ -0,0 +1,16 @@
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Ejecuta SQLITE_PRAGMAS en cada conexion SQLite nueva (señal connection_created).
+
+    journal_mode=wal es persistente en el archivo, los lectores no bloquean al escritor
+    ni el escritor a los lectores. synchronous=normal es seguro con WAL y evita un fsync
+    por cada commit.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute('PRAGMA {} = {}'.format(pragma, value))
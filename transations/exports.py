@@ -0,0 +1,88 @@
+import csv
+import json
+
+from transations.models import TransactionModel
+
+
+EXPORT_FIELDS = ('id', 'date', 'amount', 'income', 'description', 'account_id')
+
+
+class Echo:
+    """
+    Buffer que retorna el valor escrito, permite usar csv.writer para generar lineas sin acumularlas
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_rows(account_id, date_from=None, date_to=None, chunk_size=2000):
+    """
+    Iterador del lado del servidor sobre las transaciones de una cuenta
+
+    Args:
+        account_id (int): id de la cuenta
+        date_from (date, optional): fecha inicial incluida. por defecto None.
+        date_to (date, optional): fecha final incluida. por defecto None.
+        chunk_size (int, optional): filas por lectura del cursor. por defecto 2000.
+    Returns:
+        iterator: tuplas con los campos de EXPORT_FIELDS ordenadas por (date, id)
+    """
+    queryset = TransactionModel.objects.filter(account_id=account_id)
+    if date_from is not None:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to is not None:
+        queryset = queryset.filter(date__lte=date_to)
+    return queryset.order_by('date', 'id').values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def iter_csv(rows, lines_per_chunk=500):
+    """
+    Genera el contenido CSV por bloques de lineas
+
+    Args:
+        rows (iterator): tuplas con los campos de EXPORT_FIELDS
+        lines_per_chunk (int, optional): lineas por bloque entregado. por defecto 500.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+
+    chunk = []
+    for row in rows:
+        chunk.append(writer.writerow(row))
+        if len(chunk) >= lines_per_chunk:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def iter_ndjson(rows, lines_per_chunk=500):
+    """
+    Genera el contenido NDJSON (un objeto por linea) por bloques de lineas
+
+    Args:
+        rows (iterator): tuplas con los campos de EXPORT_FIELDS
+        lines_per_chunk (int, optional): lineas por bloque entregado. por defecto 500.
+    """
+    chunk = []
+    for pk, date, amount, income, description, account_id in rows:
+        chunk.append(json.dumps({
+            'id': pk,
+            'date': date.isoformat(),
+            'amount': str(amount),
+            'income': income,
+            'description': description,
+            'account': account_id,
+        }, ensure_ascii=False) + '\n')
+        if len(chunk) >= lines_per_chunk:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
@@ -0,0 +1,116 @@
+from collections.abc import Sequence
+from datetime import date
+from functools import cached_property
+
+from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+
+
+class RowSerializer:
+    """
+    Serializador de solo lectura que trabaja sobre tuplas de values_list().
+
+    Los convertidores de cada campo se calculan una sola vez a partir de los campos del
+    serializador original, por lo que cada fila se convierte sin la introspeccion,
+    los OrderedDict ni las validaciones de ModelSerializer. La representacion es la
+    misma que retorna el serializador original.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    @cached_property
+    def readable_fields(self):
+        return [field for field in self.serializer_class().fields.values() if not field.write_only]
+
+    @cached_property
+    def columns(self):
+        """
+        Columnas para values_list(), en el orden de los campos del serializador
+        """
+        return tuple(field.source for field in self.readable_fields)
+
+    @cached_property
+    def converters(self):
+        return tuple((field.field_name, self.compile(field)) for field in self.readable_fields)
+
+    @staticmethod
+    def compile(field):
+        """
+        Convertidor de un campo para los valores que retorna values_list()
+
+        Args:
+            field (Field): campo del serializador original
+        Returns:
+            callable: funcion de conversion o None si el valor se usa tal cual
+        """
+        if isinstance(field, serializers.DecimalField):
+            return field.to_representation
+        if isinstance(field, serializers.DateField):
+            output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+            if isinstance(output_format, str) and output_format.lower() == ISO_8601:
+                return date.isoformat
+            return field.to_representation
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # values_list() ya retorna la llave primaria de la relacion
+            return None
+        if isinstance(field, (serializers.IntegerField, serializers.BooleanField)):
+            return None
+        return field.to_representation
+
+    def to_representation(self, row):
+        """
+        Representacion de una fila
+
+        Args:
+            row (tuple): fila de values_list(*self.columns)
+        Returns:
+            dict: misma representacion del serializador original
+        """
+        return {
+            name: value if converter is None or value is None else converter(value)
+            for (name, converter), value in zip(self.converters, row)
+        }
+
+    def many(self, rows):
+        return SerializedRows(self, rows)
+
+
+class SerializedRows(Sequence):
+    """
+    Lista de filas que se convierten al ser consultadas, RowsJSONRenderer las codifica
+    por bloques sin crear la lista completa de representaciones
+    """
+
+    def __init__(self, serializer, rows):
+        self.serializer = serializer
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.serializer.to_representation(row) for row in self.rows[index]]
+        return self.serializer.to_representation(self.rows[index])
+
+    def tolist(self):
+        """
+        Lista completa de representaciones, la usa el encoder de DRF cuando no se usa RowsJSONRenderer
+        """
+        return self[:]
+
+    def iter_json(self, dumps, chunk_size=500):
+        """
+        Genera el arreglo JSON por bloques
+
+        Args:
+            dumps (callable): codifica un objeto a bytes con la configuracion del renderer
+            chunk_size (int, optional): filas por bloque. por defecto 500.
+        """
+        separator = b'['
+        for start in range(0, len(self.rows), chunk_size):
+            chunk = dumps(self[start:start + chunk_size])
+            yield separator + chunk[1:-1]
+            separator = b','
+        yield b'[]' if separator == b'[' else b']'
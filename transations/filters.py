@@ -0,0 +1,70 @@
+from datetime import date
+
+from django import forms
+from django_filters import rest_framework as filters
+
+from transations.models import TransactionModel
+
+
+class IntegerFilter(filters.NumberFilter):
+    """
+    Filtro numerico que solo acepta enteros, un valor con decimales retorna error
+    """
+    field_class = forms.IntegerField
+
+
+class TransactionFilter(filters.FilterSet):
+    """
+    Filtros para el listado de transaciones.
+
+    Los filtros de año y mes se traducen a rangos de fecha (date >= inicio AND date < fin)
+    para que la consulta pueda usar el indice (account, date, id) en lugar de aplicar
+    una funcion sobre la columna en cada fila.
+    """
+    date__year = IntegerFilter(method='filter_date', min_value=1, max_value=9998, label='Año de la transacion')
+    date__month = IntegerFilter(method='filter_date', min_value=1, max_value=12, label='Mes de la transacion')
+
+    def filter_date(self, queryset, name, value):
+        """
+        Aplica el rango de fechas segun el año y mes recibidos
+
+        Args:
+            queryset (QuerySet): transaciones a filtrar
+            name (str): nombre del filtro aplicado
+            value (int): valor del filtro
+        Returns:
+            QuerySet: transaciones filtradas
+        """
+        year = self.form.cleaned_data.get('date__year')
+        month = self.form.cleaned_data.get('date__month')
+
+        if name == 'date__month':
+            if year is not None:
+                # El rango ya fue aplicado por el filtro de año
+                return queryset
+            # Sin año no existe un rango continuo, se mantiene el filtro por mes
+            return queryset.filter(date__month=month)
+
+        start, end = self.date_range(year, month)
+        return queryset.filter(date__gte=start, date__lt=end)
+
+    @staticmethod
+    def date_range(year, month=None):
+        """
+        Rango semiabierto [inicio, fin) para un año o un mes de un año
+
+        Args:
+            year (int): año
+            month (int, optional): mes. por defecto None para todo el año.
+        Returns:
+            tuple: (date, date) con el inicio incluido y el fin excluido
+        """
+        if month is None:
+            return date(year, 1, 1), date(year + 1, 1, 1)
+        if month == 12:
+            return date(year, 12, 1), date(year + 1, 1, 1)
+        return date(year, month, 1), date(year, month + 1, 1)
+
+    class Meta:
+        model = TransactionModel
+        fields = ('account', 'date__year', 'date__month')
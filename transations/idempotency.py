@@ -0,0 +1,97 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from transations.models import IdempotencyKeyModel
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+def request_fingerprint(request):
+    """
+    Huella de la peticion: metodo, ruta y cuerpo en JSON canonico
+
+    Args:
+        request (Request): peticion de DRF
+    Returns:
+        str: sha256 en hexadecimal
+    """
+    body = json.dumps(request.data, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder)
+    content = '{}\n{}\n{}'.format(request.method, request.path, body)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def replay(record, fingerprint):
+    """
+    Respuesta guardada para una llave ya usada
+
+    Args:
+        record (IdempotencyKeyModel): llave guardada
+        fingerprint (str): huella de la peticion actual
+    Returns:
+        Response: respuesta original o 422 si la llave se uso con otra peticion
+    """
+    if record.fingerprint != fingerprint:
+        return Response(
+            {'detail': 'La llave de idempotencia ya fue usada con otra peticion'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(record.response, status=record.status_code, headers={REPLAYED_HEADER: 'true'})
+
+
+def idempotent(view_method):
+    """
+    Decorador para acciones de un viewset que soportan el header Idempotency-Key.
+
+    La llave se inserta dentro de la misma transaccion que la operacion: si la operacion
+    falla o responde con error la llave se descarta junto con los cambios. Una peticion
+    concurrente con la misma llave queda bloqueada en el indice unico hasta que la primera
+    termine y luego retorna la respuesta guardada. Reutilizar una llave con otra peticion
+    retorna 422.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > IdempotencyKeyModel._meta.get_field('key').max_length:
+            raise ValidationError({IDEMPOTENCY_HEADER: ['La llave de idempotencia es demasiado larga']})
+
+        fingerprint = request_fingerprint(request)
+        with transaction.atomic():
+            record = IdempotencyKeyModel.objects.select_for_update().filter(key=key).first()
+            if record is None:
+                try:
+                    with transaction.atomic():
+                        record = IdempotencyKeyModel.objects.create(key=key, fingerprint=fingerprint)
+                except IntegrityError:
+                    # Una peticion concurrente con la misma llave termino primero
+                    record = IdempotencyKeyModel.objects.select_for_update().get(key=key)
+                else:
+                    return execute(self, request, record, *args, **kwargs)
+            return replay(record, fingerprint)
+
+    def execute(self, request, record, *args, **kwargs):
+        """
+        Ejecuta la operacion y guarda su respuesta, si responde con error se descarta la llave
+        """
+        response = view_method(self, request, *args, **kwargs)
+        if not status.is_success(response.status_code):
+            transaction.set_rollback(True)
+            return response
+
+        record.status_code = response.status_code
+        record.response = response.data
+        record.save(update_fields=['status_code', 'response'])
+        return response
+
+    return wrapper
@@ -0,0 +1,200 @@
+import logging
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from rest_framework.exceptions import ValidationError
+
+from transations.exports import EXPORT_FORMATS, export_rows
+from transations.models import JobModel
+from transations.reconciliation import reconcile_balances
+from transations.serializers import BulkTransactionSerializer
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobError(Exception):
+    """
+    Error esperado de un trabajo, el resultado se guarda junto al mensaje
+    """
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+class JobLeaseLost(Exception):
+    """
+    El trabajo se reclamo por otro worker porque este dejo de renovar su latido
+    """
+
+
+def claim_jobs(worker, limit):
+    """
+    Reclama hasta limit trabajos pendientes o abandonados en orden de llegada.
+
+    Cada trabajo se reclama con un UPDATE condicional sobre el estado y el latido, si otro
+    worker lo tomo primero el UPDATE no modifica filas y se continua con el siguiente. Un
+    trabajo en ejecucion sin latido por mas de JOB_LEASE_SECONDS es de un worker caido y se
+    vuelve a reclamar, los trabajos continuan desde su progreso.
+
+    Args:
+        worker (str): identificador del worker
+        limit (int): numero maximo de trabajos a reclamar
+    Returns:
+        list: ids de los trabajos reclamados
+    """
+    now = timezone.now()
+    claimable = Q(status=JobModel.PENDING) | Q(
+        status=JobModel.RUNNING, heartbeat_at__lt=now - timedelta(seconds=settings.JOB_LEASE_SECONDS))
+
+    claimed = []
+    candidates = JobModel.objects.filter(claimable).order_by('id').values_list('id', flat=True)
+    for job_id in candidates[:limit]:
+        updated = JobModel.objects.filter(claimable, id=job_id).update(
+            status=JobModel.RUNNING, worker=worker, started_at=now, heartbeat_at=now)
+        if updated:
+            claimed.append(job_id)
+    return claimed
+
+
+def set_progress(job, progress):
+    """
+    Guarda el progreso del trabajo y renueva su latido, dentro de un atomic se confirma
+    junto con el trabajo realizado
+
+    Raises:
+        JobLeaseLost: si el trabajo ya no es de este worker, dentro de un atomic el lote
+            se revierte para que no se aplique dos veces
+    """
+    updated = JobModel.objects.filter(id=job.id, status=JobModel.RUNNING, worker=job.worker).update(
+        progress=progress, heartbeat_at=timezone.now())
+    if not updated:
+        raise JobLeaseLost('El trabajo {} se reclamo por otro worker'.format(job.id))
+    job.progress = progress
+
+
+def run_job(job_id):
+    """
+    Ejecuta un trabajo reclamado y guarda su resultado o error
+
+    Args:
+        job_id (int): id del trabajo en estado running
+    Returns:
+        JobModel: trabajo terminado
+    """
+    job = JobModel.objects.get(id=job_id)
+    try:
+        job.result = JOB_HANDLERS[job.kind](job)
+        job.status = JobModel.DONE
+    except JobLeaseLost:
+        # El otro worker continua desde el ultimo lote confirmado y guarda el resultado
+        logger.warning("El trabajo %s se reclamo por otro worker, se detiene", job.id)
+        return job
+    except JobError as exc:
+        job.status = JobModel.FAILED
+        job.error = str(exc)
+        job.result = exc.result
+    except Exception as exc:
+        logger.exception("Error ejecutando el trabajo %s", job.id)
+        job.status = JobModel.FAILED
+        job.error = repr(exc)
+
+    job.finished_at = timezone.now()
+    # Si el trabajo se reclamo de nuevo por falta de latido, el resultado es del otro worker
+    JobModel.objects.filter(id=job.id, status=JobModel.RUNNING, worker=job.worker).update(
+        status=job.status, result=job.result, error=job.error, finished_at=job.finished_at)
+    return job
+
+
+def item_errors(detail, offset):
+    """
+    Errores por transacion con el indice dentro de toda la carga
+
+    Args:
+        detail (list|dict): detalle de la ValidationError de un lote
+        offset (int): posicion del lote dentro de la carga
+    """
+    if not isinstance(detail, list):
+        return detail
+    return {str(offset + index): errors for index, errors in enumerate(detail) if errors}
+
+
+def import_transactions(job, chunk_size=5000):
+    """
+    Carga de transaciones por lotes, cada lote se guarda en su propia transaccion junto
+    con el progreso, un trabajo reiniciado continua desde el ultimo lote confirmado
+
+    Raises:
+        JobError: si un lote no es valido, los lotes anteriores quedan guardados
+    """
+    items = job.payload['items']
+    for start in range(job.progress, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        serializer = BulkTransactionSerializer(data=chunk, many=True)
+        try:
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                serializer.save()
+                set_progress(job, start + len(chunk))
+        except ValidationError as exc:
+            raise JobError(
+                'Transaciones invalidas, se guardaron las primeras {}'.format(start),
+                {'created': start, 'errors': item_errors(exc.detail, start)}
+            )
+    return {'created': len(items)}
+
+
+def export_transactions(job, progress_every=5000):
+    """
+    Exportacion de transaciones de una cuenta a un archivo en JOB_OUTPUT_DIR
+    """
+    payload = job.payload
+    iter_format, content_type = EXPORT_FORMATS[payload['export_format']]
+    rows = export_rows(
+        payload['account'],
+        date.fromisoformat(payload['date_from']) if payload.get('date_from') else None,
+        date.fromisoformat(payload['date_to']) if payload.get('date_to') else None,
+    )
+
+    def counted(rows):
+        count = 0
+        for count, row in enumerate(rows, start=1):
+            yield row
+            if count % progress_every == 0:
+                set_progress(job, count)
+        set_progress(job, count)
+
+    output_dir = Path(settings.JOB_OUTPUT_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    filename = 'job-{}.{}'.format(job.id, payload['export_format'])
+    with open(output_dir / filename, 'w', encoding='utf-8', newline='') as output:
+        for chunk in iter_format(counted(rows)):
+            output.write(chunk)
+
+    return {'rows': job.progress, 'file': filename, 'content_type': content_type}
+
+
+def reconcile(job):
+    """
+    Conciliacion de balances, el progreso son las cuentas conciliadas
+    """
+    result = reconcile_balances(progress=lambda accounts: set_progress(job, accounts), **job.payload)
+    return {
+        'accounts': result.accounts,
+        'drifts': [drift._asdict() for drift in result.drifts],
+        'checkpoints': result.checkpoints,
+        'watermark': result.watermark,
+    }
+
+
+JOB_HANDLERS = {
+    JobModel.IMPORT_TRANSACTIONS: import_transactions,
+    JobModel.EXPORT_TRANSACTIONS: export_transactions,
+    JobModel.RECONCILE_BALANCES: reconcile,
+}
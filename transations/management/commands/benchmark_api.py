@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from rest_framework.test import APIClient
+
+from transations.benchmark import run_benchmark, seed
+
+
+class Command(BaseCommand):
+    """
+    Comando para medir latencia, queries y memoria de los endpoints de la API
+    """
+    help = (
+        "Crea una base de datos de pruebas, la llena con el volumen indicado y mide p50/p95, "
+        "numero de queries y memoria pico de cada endpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--accounts", type=int, default=10000, help="Numero de cuentas a crear")
+        parser.add_argument("--transactions", type=int, default=1000000, help="Numero de transaciones a crear")
+        parser.add_argument("--iterations", type=int, default=20, help="Peticiones medidas por endpoint")
+        parser.add_argument("--fail-on-budget", action="store_true",
+                            help="Termina con error si un endpoint supera su presupuesto de queries")
+
+    def handle(self, *args, **options):
+        # Sin DEBUG para que el toolbar y el log de queries no alteren las mediciones
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.stdout.write("Creando {} cuentas y {} transaciones...".format(
+                options["accounts"], options["transactions"]))
+            context = seed(options["accounts"], options["transactions"])
+            results = run_benchmark(APIClient(), context, iterations=options["iterations"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write("{:<34} {:>6} {:>10} {:>10} {:>8} {:>12}".format(
+            "endpoint", "status", "p50 ms", "p95 ms", "queries", "memoria KiB"))
+        over_budget = []
+        for result in results:
+            line = "{:<34} {:>6} {:>10.2f} {:>10.2f} {:>8} {:>12.1f}".format(
+                result.name, result.status, result.p50 or 0, result.p95 or 0, result.queries, result.peak_memory)
+            if result.queries > result.budget:
+                over_budget.append(result)
+                line = self.style.ERROR("{} (presupuesto {})".format(line, result.budget))
+            self.stdout.write(line)
+
+        if over_budget and options["fail_on_budget"]:
+            raise CommandError("{} endpoints superan su presupuesto de queries: {}".format(
+                len(over_budget), ", ".join(result.name for result in over_budget)))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from transations.models import AccountModel, BalanceShardModel, PostingModel
+
+
+class Command(BaseCommand):
+    """
+    Comando para sumar los abonos pendientes del libro mayor y los contadores al balance de las cuentas
+    """
+    help = (
+        "Compacta el libro mayor y los contadores de balance: suma los abonos pendientes al balance "
+        "de las cuentas por lotes. Cada lote bloquea solo sus cuentas durante una transaccion corta."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Cuentas por lote")
+
+    def handle(self, *args, **options):
+        account_ids = sorted(
+            set(PostingModel.objects.filter(folded=False).values_list("account_id", flat=True).distinct()) |
+            set(BalanceShardModel.objects.exclude(delta=0).values_list("account_id", flat=True).distinct())
+        )
+
+        for start in range(0, len(account_ids), options["batch_size"]):
+            with transaction.atomic():
+                # Al bloquearlas, las cuentas en modo ledger o sharded suman sus abonos pendientes
+                accounts = AccountModel.objects.lock(*account_ids[start:start + options["batch_size"]])
+                # Abonos registrados mientras la cuenta cambiaba a modo row
+                row_accounts = [account for account in accounts.values() if account.balance_mode == AccountModel.ROW]
+                if row_accounts:
+                    AccountModel.objects.fold(row_accounts)
+
+        self.stdout.write("Cuentas compactadas: {}".format(len(account_ids)))
@@ -0,0 +1,69 @@
+import csv
+import io
+import zipfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from transations.statements import SUMMARY_FIELDS, iter_statements, statement_csv, summary_row
+
+
+class Command(BaseCommand):
+    """
+    Comando para generar los extractos mensuales de todas las cuentas
+    """
+    help = (
+        "Genera el extracto del mes de cada cuenta (CSV con balance por linea) y un resumen con el "
+        "balance inicial, ingresos, egresos y balance final. Las transaciones del mes se leen en una "
+        "sola pasada ordenada por cuenta. Por defecto escribe un solo archivo zip."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("year", type=int, help="Año")
+        parser.add_argument("month", type=int, help="Mes")
+        parser.add_argument("--output", help="Carpeta de salida, por defecto JOB_OUTPUT_DIR/statements")
+        parser.add_argument("--no-archive", action="store_true", help="Un archivo por cuenta en lugar del zip")
+        parser.add_argument("--batch-size", type=int, default=500, help="Cuentas por lote")
+
+    def handle(self, *args, **options):
+        if not 1 <= options["month"] <= 12:
+            raise CommandError("Mes invalido")
+
+        period = "{:04d}-{:02d}".format(options["year"], options["month"])
+        output_dir = Path(options["output"] or Path(settings.JOB_OUTPUT_DIR) / "statements")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        statements = iter_statements(options["year"], options["month"], batch_size=options["batch_size"])
+
+        if options["no_archive"]:
+            target = output_dir / period
+            target.mkdir(exist_ok=True)
+            count = self.write_statements(statements, lambda name, content: (target / name).write_text(
+                content, encoding="utf-8"))
+        else:
+            target = output_dir / "statements-{}.zip".format(period)
+            with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                count = self.write_statements(statements, archive.writestr)
+
+        self.stdout.write("Extractos de {}: {} en {}".format(period, count, target))
+
+    @staticmethod
+    def write_statements(statements, write):
+        """
+        Escribe el extracto de cada cuenta y el resumen del mes
+
+        Args:
+            statements (iterator): Statement de cada cuenta
+            write (callable): recibe el nombre del archivo y su contenido
+        Returns:
+            int: extractos escritos
+        """
+        summary = io.StringIO()
+        writer = csv.writer(summary)
+        writer.writerow(SUMMARY_FIELDS)
+        count = 0
+        for count, statement in enumerate(statements, start=1):
+            write("account-{}.csv".format(statement.account_id), statement_csv(statement))
+            writer.writerow(summary_row(statement))
+        write("summary.csv", summary.getvalue())
+        return count
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from transations.models import IdempotencyKeyModel
+
+
+class Command(BaseCommand):
+    """
+    Comando para eliminar las llaves de idempotencia vencidas
+    """
+    help = "Elimina las llaves de idempotencia mas antiguas que el TTL configurado"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours", type=int, default=getattr(settings, "IDEMPOTENCY_KEY_TTL_HOURS", 24),
+            help="Horas que se conserva cada llave, por defecto IDEMPOTENCY_KEY_TTL_HOURS o 24"
+        )
+
+    def handle(self, *args, **options):
+        limit = timezone.now() - timedelta(hours=options["hours"])
+        deleted, _ = IdempotencyKeyModel.objects.filter(created_at__lt=limit).delete()
+        self.stdout.write("Llaves de idempotencia eliminadas: {}".format(deleted))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from transations.reconciliation import reconcile_balances
+
+
+class Command(BaseCommand):
+    """
+    Comando para conciliar el balance de las cuentas contra sus transaciones
+    """
+    help = (
+        "Concilia AccountModel.balance contra las transaciones usando puntos de control incrementales. "
+        "Las transaciones creadas mientras corre el comando pueden reportarse como diferencias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Ignora los puntos de control y recalcula todo")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Cuentas por lote")
+        parser.add_argument("--fail-on-drift", action="store_true", help="Termina con error si hay diferencias")
+
+    def handle(self, *args, **options):
+        result = reconcile_balances(full=options["full"], batch_size=options["batch_size"])
+
+        for drift in result.drifts:
+            self.stdout.write(self.style.WARNING(
+                "Cuenta {}: balance {} esperado {} diferencia {}".format(
+                    drift.account_id, drift.balance, drift.expected, drift.balance - drift.expected)))
+
+        self.stdout.write(
+            "Cuentas conciliadas: {} diferencias: {} puntos de control creados: {} (hasta transacion {})".format(
+                result.accounts, len(result.drifts), result.checkpoints, result.watermark))
+
+        if result.drifts and options["fail_on_drift"]:
+            raise CommandError("Se encontraron {} cuentas con diferencias".format(len(result.drifts)))
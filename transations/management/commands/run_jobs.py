@@ -0,0 +1,88 @@
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from transations.jobs import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    """
+    Worker local que ejecuta los trabajos registrados en JobModel
+    """
+    help = (
+        "Reclama y ejecuta los trabajos pendientes con un pool de hilos, sin broker externo. "
+        "Se pueden ejecutar varios workers a la vez, cada trabajo se reclama una sola vez."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Hilos del pool, 0 ejecuta en el hilo actual")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Segundos de espera sin trabajos")
+        parser.add_argument("--once", action="store_true", help="Termina cuando no quedan trabajos pendientes")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 0:
+            raise CommandError("--workers no puede ser negativo")
+
+        self.worker = "{}:{}".format(socket.gethostname(), os.getpid())
+        self.poll_interval = options["poll_interval"]
+        self.once = options["once"]
+
+        if options["workers"] == 0:
+            self.run_inline()
+        else:
+            self.run_pool(options["workers"])
+
+    def report(self, job):
+        style = self.style.SUCCESS if job.status == job.DONE else self.style.ERROR
+        self.stdout.write(style("Trabajo {} ({}): {}".format(job.id, job.kind, job.status)))
+
+    def run_inline(self):
+        """
+        Ejecuta los trabajos uno a uno en el hilo actual
+        """
+        while True:
+            claimed = claim_jobs(self.worker, 1)
+            for job_id in claimed:
+                self.report(run_job(job_id))
+            if not claimed:
+                if self.once:
+                    return
+                time.sleep(self.poll_interval)
+
+    def run_pool(self, workers):
+        """
+        Mantiene el pool ocupado reclamando solo los trabajos que puede ejecutar
+        """
+        running = set()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                for future in [future for future in running if future.done()]:
+                    running.remove(future)
+                    self.report(future.result())
+
+                claimed = claim_jobs(self.worker, workers - len(running)) if len(running) < workers else []
+                for job_id in claimed:
+                    running.add(pool.submit(self.run_in_thread, job_id))
+
+                if claimed:
+                    continue
+                if running:
+                    wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                elif self.once:
+                    return
+                else:
+                    time.sleep(self.poll_interval)
+
+    @staticmethod
+    def run_in_thread(job_id):
+        """
+        Las conexiones de Django son por hilo, se cierran al terminar cada trabajo
+        """
+        try:
+            return run_job(job_id)
+        finally:
+            connections.close_all()
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from transations.cache import invalidate_accounts
+from transations.models import AccountModel, BalanceShardModel
+
+
+class Command(BaseCommand):
+    """
+    Comando para cambiar el modo de balance de una cuenta
+    """
+    help = (
+        "Cambia el modo de balance de una cuenta. En modo ledger los abonos de transferencias "
+        "no bloquean la cuenta, quedan en el libro mayor hasta compactarlos (compact_ledger). "
+        "En modo sharded se suman en uno de BALANCE_SHARD_COUNT contadores al azar. "
+        "Al volver a modo row ejecute compact_ledger para sumar los abonos que llegaron durante el cambio."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("account_id", type=int, help="Id de la cuenta")
+        parser.add_argument("mode", choices=[mode for mode, _ in AccountModel.BALANCE_MODE_CHOICES], help="Modo de balance")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # El bloqueo suma los abonos pendientes si la cuenta estaba en modo ledger o sharded
+            accounts = AccountModel.objects.lock(options["account_id"])
+            if options["account_id"] not in accounts:
+                raise CommandError("La cuenta {} no existe".format(options["account_id"]))
+
+            account = accounts[options["account_id"]]
+            account.balance_mode = options["mode"]
+            account.save(update_fields=["balance_mode"])
+            if account.balance_mode == AccountModel.SHARDED:
+                BalanceShardModel.objects.create_shards(account.id)
+            invalidate_accounts(account.id)
+
+        self.stdout.write("Cuenta {} en modo {} con balance {}".format(account.id, account.balance_mode, account.balance))
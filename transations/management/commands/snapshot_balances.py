@@ -0,0 +1,27 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transations.balances import take_snapshots
+
+
+class Command(BaseCommand):
+    """
+    Comando para guardar la foto diaria de balance de las cuentas
+    """
+    help = (
+        "Guarda el balance de todas las cuentas al final de un dia terminado (por defecto ayer). "
+        "Ejecutarlo cada dia acota la consulta de balance a una fecha a la actividad de un dia."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=date.fromisoformat, help="Dia a guardar (YYYY-MM-DD), por defecto ayer")
+        parser.add_argument("--batch-size", type=int, default=500, help="Cuentas por lote")
+
+    def handle(self, *args, **options):
+        day = options["date"] or date.today() - timedelta(days=1)
+        if day >= date.today():
+            raise CommandError("Solo se pueden guardar dias terminados")
+
+        saved = take_snapshots(day, batch_size=options["batch_size"])
+        self.stdout.write("Fotos de balance del {}: {}".format(day.isoformat(), saved))
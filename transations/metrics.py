@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import random
+import time
+from bisect import bisect_left
+from threading import Lock
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """
+    Histograma acumulado por etiquetas en el formato de exposicion de Prometheus
+
+    Args:
+        name (str): nombre de la metrica
+        help (str): descripcion de la metrica
+        buckets (tuple): limites superiores de los buckets en orden ascendente
+    """
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.lock = Lock()
+        self.series = {}
+
+    def observe(self, labels, value):
+        """
+        Agrega una observacion a la serie de las etiquetas
+
+        Args:
+            labels (tuple): pares (etiqueta, valor)
+            value (float): valor observado
+        """
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self):
+        with self.lock:
+            self.series = {}
+
+    def expose(self):
+        """
+        Lineas de texto de la metrica, los buckets son acumulados como espera Prometheus
+        """
+        lines = ['# HELP {} {}'.format(self.name, self.help), '# TYPE {} histogram'.format(self.name)]
+        with self.lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in sorted(self.series.items())]
+
+        for labels, counts, total in series:
+            label_text = ','.join('{}="{}"'.format(name, value) for name, value in labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append('{}_bucket{{{},le="{}"}} {}'.format(self.name, label_text, bound, cumulative))
+            lines.append('{}_sum{{{}}} {}'.format(self.name, label_text, total))
+            lines.append('{}_count{{{}}} {}'.format(self.name, label_text, cumulative))
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'payment_request_duration_seconds', 'Duracion de las peticiones muestreadas',
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+REQUEST_DB_DURATION = Histogram(
+    'payment_request_db_duration_seconds', 'Tiempo en la base de datos por peticion muestreada',
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+REQUEST_QUERIES = Histogram(
+    'payment_request_db_queries', 'Numero de queries por peticion muestreada',
+    (0, 1, 2, 5, 10, 20, 50, 100, 500)
+)
+HISTOGRAMS = (REQUEST_DURATION, REQUEST_DB_DURATION, REQUEST_QUERIES)
+
+
+class RequestMetrics:
+    """
+    Queries, tiempo en la base de datos y tiempos por fase de una peticion
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.view_start = None
+        self.render_start = None
+        self.render_end = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Envoltorio de connection.execute_wrapper que mide cada query
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+    def server_timing(self, total):
+        """
+        Valor del header Server-Timing en milisegundos. view es el tiempo de la vista sin la
+        base de datos, en los viewsets es principalmente la serializacion.
+        """
+        timings = ['db;dur={:.1f};desc="{} queries"'.format(self.db_time * 1000, self.queries)]
+        if self.view_start is not None and self.render_start is not None:
+            view = self.render_start - self.view_start - self.db_time
+            timings.append('view;dur={:.1f}'.format(max(view, 0) * 1000))
+        if self.render_start is not None and self.render_end is not None:
+            timings.append('render;dur={:.1f}'.format((self.render_end - self.render_start) * 1000))
+        timings.append('total;dur={:.1f}'.format(total * 1000))
+        return ', '.join(timings)
+
+
+class MetricsMiddleware:
+    """
+    Instrumentacion por peticion para una muestra de METRICS_SAMPLE_RATE peticiones.
+
+    Las peticiones muestreadas cuentan sus queries con connection.execute_wrapper, agregan
+    el header Server-Timing, escriben una linea de log y se acumulan en los histogramas por
+    vista que expone metrics_view. Las demas peticiones no tienen costo adicional.
+
+    Es un middleware hibrido como MiddlewareMixin: con ASGI la cadena sigue siendo asincrona
+    y las vistas async no se ejecutan en un hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Marca la instancia como funcion asincrona para el handler de Django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        metrics = request.metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            response = self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        metrics = request.metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            response = await self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    @staticmethod
+    def sampled():
+        return random.random() < getattr(settings, 'METRICS_SAMPLE_RATE', 1.0)
+
+    def finish(self, request, response, metrics):
+        total = time.perf_counter() - metrics.start
+        response['Server-Timing'] = metrics.server_timing(total)
+        self.record(request, response, metrics, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, 'metrics'):
+            request.metrics.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        """
+        Las respuestas de DRF se renderizan despues de este metodo, el callback marca el fin
+        """
+        if hasattr(request, 'metrics'):
+            metrics = request.metrics
+            metrics.render_start = time.perf_counter()
+
+            def render_end(response):
+                metrics.render_end = time.perf_counter()
+            response.add_post_render_callback(render_end)
+        return response
+
+    @staticmethod
+    def record(request, response, metrics, total):
+        view = request.resolver_match.view_name if request.resolver_match else 'unmatched'
+        labels = (('view', view), ('method', request.method), ('status', str(response.status_code)))
+        REQUEST_DURATION.observe(labels, total)
+        REQUEST_DB_DURATION.observe(labels, metrics.db_time)
+        REQUEST_QUERIES.observe(labels, metrics.queries)
+        logger.info(
+            'view=%s method=%s status=%s duration_ms=%.1f db_ms=%.1f queries=%d',
+            view, request.method, response.status_code, total * 1000, metrics.db_time * 1000, metrics.queries,
+            extra={
+                'view': view, 'status': response.status_code, 'duration_ms': total * 1000,
+                'db_ms': metrics.db_time * 1000, 'queries': metrics.queries,
+            }
+        )
+
+
+def metrics_view(request):
+    """
+    Histogramas por vista en el formato de texto de Prometheus.
+
+    Los histogramas son del proceso que responde, con varios workers (gunicorn, uvicorn) cada
+    worker se debe consultar por separado y sumar en Prometheus. Con METRICS_TOKEN se requiere
+    el header Authorization: Bearer <token>.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), 'Bearer {}'.format(token)):
+        return HttpResponseForbidden()
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.expose())
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
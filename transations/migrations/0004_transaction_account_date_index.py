@@ -0,0 +1,21 @@
+# Generated by Django 4.1.2 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transations', '0003_alter_transactionmodel_description'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='transactionmodel',
+            options={'verbose_name': 'Transacion', 'verbose_name_plural': 'Transaciones'},
+        ),
+        migrations.AddIndex(
+            model_name='transactionmodel',
+            index=models.Index(fields=['account', 'date', 'id'], name='transaction_account_date_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1.2 on 2026-10-18 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transations', '0004_transaction_account_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transactionmodel',
+            name='balance_after',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Balance despues de la transacion'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionmodel',
+            index=models.Index(fields=['account', 'id'], name='transaction_account_id_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.2 on 2026-10-18 17:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transations', '0005_transaction_balance_after'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpointModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('up_to_transaction_id', models.BigIntegerField(verbose_name='Ultima transacion incluida')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Balance conciliado')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creacion')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_checkpoints', to='transations.accountmodel', verbose_name='Cuenta')),
+            ],
+            options={
+                'verbose_name': 'Punto de control',
+                'verbose_name_plural': 'Puntos de control',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='balancecheckpointmodel',
+            index=models.Index(fields=['up_to_transaction_id'], name='checkpoint_transaction_idx'),
+        ),
+    ]
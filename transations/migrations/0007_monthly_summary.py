@@ -0,0 +1,67 @@
+# Generated by Django 4.1.2 on 2026-10-18 17:11
+
+from django.db import migrations, models
+from django.db.models.functions import ExtractMonth, ExtractYear
+import django.db.models.deletion
+
+
+def backfill_monthly_summary(apps, schema_editor):
+    """
+    Calcula los acumulados de las transaciones existentes con un solo agregado agrupado
+    """
+    TransactionModel = apps.get_model('transations', 'TransactionModel')
+    MonthlySummaryModel = apps.get_model('transations', 'MonthlySummaryModel')
+
+    rows = (
+        TransactionModel.objects.exclude(description='ajuste manual')
+        .annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+        .values('account_id', 'year', 'month')
+        .annotate(
+            income_total=models.Sum('amount', filter=models.Q(income=True), default=0),
+            outgoing_total=models.Sum('amount', filter=models.Q(income=False), default=0),
+            total=models.Count('id'),
+        )
+        .order_by()
+    )
+    MonthlySummaryModel.objects.bulk_create((
+        MonthlySummaryModel(
+            account_id=row['account_id'],
+            year=row['year'],
+            month=row['month'],
+            income=row['income_total'],
+            outgoing=row['outgoing_total'],
+            count=row['total'],
+        )
+        for row in rows.iterator()
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transations', '0006_balance_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySummaryModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Año')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Mes')),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Ingresos')),
+                ('outgoing', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Egresos')),
+                ('count', models.IntegerField(default=0, verbose_name='Numero de transaciones')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summary', to='transations.accountmodel', verbose_name='Cuenta')),
+            ],
+            options={
+                'verbose_name': 'Acumulado mensual',
+                'verbose_name_plural': 'Acumulados mensuales',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlysummarymodel',
+            constraint=models.UniqueConstraint(fields=('account', 'year', 'month'), name='monthly_summary_account_month_unique'),
+        ),
+        migrations.RunPython(backfill_monthly_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.1.2 on 2026-10-18 17:15
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transations', '0007_monthly_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKeyModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='Llave')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='Huella de la peticion')),
+                ('status_code', models.PositiveSmallIntegerField(null=True, verbose_name='Codigo de respuesta')),
+                ('response', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Respuesta')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Fecha de creacion')),
+            ],
+            options={
+                'verbose_name': 'Llave de idempotencia',
+                'verbose_name_plural': 'Llaves de idempotencia',
+            },
+        ),
+    ]
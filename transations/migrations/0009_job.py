@@ -0,0 +1,39 @@
+# Generated by Django 4.1.2 on 2026-10-18 17:22
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transations', '0008_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('import_transactions', 'Carga de transaciones'), ('export_transactions', 'Exportacion de transaciones'), ('reconcile_balances', 'Conciliacion de balances')], max_length=30, verbose_name='Tipo')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En ejecucion'), ('done', 'Terminado'), ('failed', 'Fallido')], default='pending', max_length=10, verbose_name='Estado')),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Parametros')),
+                ('progress', models.PositiveIntegerField(default=0, verbose_name='Progreso')),
+                ('total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Total')),
+                ('result', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Resultado')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creacion')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de fin')),
+            ],
+            options={
+                'verbose_name': 'Trabajo',
+                'verbose_name_plural': 'Trabajos',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='jobmodel',
+            index=models.Index(fields=['status', 'id'], name='job_status_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.1.2 on 2026-10-18 17:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transations', '0009_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalEntryModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(max_length=50, verbose_name='Descripcion')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creacion')),
+            ],
+            options={
+                'verbose_name': 'Asiento',
+                'verbose_name_plural': 'Asientos',
+            },
+        ),
+        migrations.AddField(
+            model_name='accountmodel',
+            name='balance_mode',
+            field=models.CharField(choices=[('row', 'Balance actualizado en la cuenta'), ('ledger', 'Abonos de transferencias en el libro mayor')], default='row', max_length=10, verbose_name='Modo de balance'),
+        ),
+        migrations.CreateModel(
+            name='PostingModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Monto')),
+                ('date', models.DateField(verbose_name='Fecha del movimiento')),
+                ('folded', models.BooleanField(default=False, verbose_name='Incluido en el balance')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='transations.accountmodel', verbose_name='Cuenta')),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='transations.journalentrymodel', verbose_name='Asiento')),
+            ],
+            options={
+                'verbose_name': 'Movimiento',
+                'verbose_name_plural': 'Movimientos',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postingmodel',
+            index=models.Index(fields=['account', 'folded'], name='posting_account_folded_idx'),
+        ),
+    ]
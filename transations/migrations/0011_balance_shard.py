@@ -0,0 +1,41 @@
+# Generated by Django 4.1.2 on 2026-10-18 17:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transations', '0010_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postingmodel',
+            name='in_shard',
+            field=models.BooleanField(default=False, verbose_name='Sumado en un contador'),
+        ),
+        migrations.AlterField(
+            model_name='accountmodel',
+            name='balance_mode',
+            field=models.CharField(choices=[('row', 'Balance actualizado en la cuenta'), ('ledger', 'Abonos de transferencias en el libro mayor'), ('sharded', 'Abonos de transferencias en contadores')], default='row', max_length=10, verbose_name='Modo de balance'),
+        ),
+        migrations.CreateModel(
+            name='BalanceShardModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='Contador')),
+                ('delta', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Monto sin compactar')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_shards', to='transations.accountmodel', verbose_name='Cuenta')),
+            ],
+            options={
+                'verbose_name': 'Contador de balance',
+                'verbose_name_plural': 'Contadores de balance',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='balanceshardmodel',
+            constraint=models.UniqueConstraint(fields=('account', 'shard'), name='balance_shard_account_unique'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.2 on 2026-10-18 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transations', '0011_balance_shard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transactionmodel',
+            index=models.Index(fields=['date', 'id'], name='transaction_date_idx'),
+        ),
+    ]
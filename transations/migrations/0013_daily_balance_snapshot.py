@@ -0,0 +1,31 @@
+# Generated by Django 4.1.2 on 2026-10-18 17:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transations', '0012_transaction_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBalanceSnapshotModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Balance al final del dia')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='transations.accountmodel', verbose_name='Cuenta')),
+            ],
+            options={
+                'verbose_name': 'Foto diaria de balance',
+                'verbose_name_plural': 'Fotos diarias de balance',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailybalancesnapshotmodel',
+            constraint=models.UniqueConstraint(fields=('account', 'date'), name='balance_snapshot_account_date_unique'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.1.2 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+def backfill_heartbeat(apps, schema_editor):
+    """
+    Los trabajos en ejecucion toman su fecha de inicio como ultimo latido
+    """
+    JobModel = apps.get_model('transations', 'JobModel')
+    JobModel.objects.filter(status='running').update(heartbeat_at=models.F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transations', '0013_daily_balance_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobmodel',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Ultimo latido'),
+        ),
+        migrations.RunPython(backfill_heartbeat, migrations.RunPython.noop),
+    ]
@@ -1,16 +1,186 @@
-from django.db import models
+import random
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
 
+from transations.cache import invalidate_accounts
+
+
+MANUAL_ADJUSTMENT_DESCRIPTION = 'ajuste manual'
+INITIAL_BALANCE_DESCRIPTION = 'balance inicial'
+# Mayor balance que cabe en la columna balance de la cuenta (max_digits=8, decimal_places=2)
+MAX_BALANCE = Decimal('999999.99')
+
+
+class AccountQuerySet(models.QuerySet):
+    """
+    QuerySet para cuentas con soporte de bloqueo para actualizar balances
+    """
+    lock_batch_size = 1000
+
+    def lock(self, *ids, credit_only=()):
+        """
+        Bloquea las cuentas para actualizacion dentro de la transaccion actual.
+
+        Los bloqueos se toman siempre en orden ascendente de id para que dos operaciones
+        concurrentes sobre las mismas cuentas no puedan generar un deadlock. Listas grandes
+        de ids se consultan por lotes (en el mismo orden) para no superar el limite de
+        parametros de la base de datos.
+
+        Las cuentas en modo ledger bloqueadas suman sus abonos pendientes al balance, por
+        lo que el balance retornado siempre es el balance real. Las cuentas de credit_only
+        solo reciben abonos: las de modo ledger no se bloquean, se retornan sin bloqueo
+        y con pending_balance para registrar el abono como pendiente sin actualizar su fila.
+
+        Args:
+            ids (int): ids de las cuentas a bloquear
+            credit_only (iterable, optional): ids de cuentas que solo reciben abonos. por defecto ().
+        Returns:
+            dict: {id: AccountModel} con las cuentas bloqueadas y las cuentas ledger de credit_only
+        """
+        credit_only = set(credit_only) - set(ids)
+        ids = sorted(set(ids) | credit_only)
+        accounts = {}
+        for start in range(0, len(ids), self.lock_batch_size):
+            batch = ids[start:start + self.lock_batch_size]
+            batch_credit_only = [account_id for account_id in batch if account_id in credit_only]
+            batch_filter = models.Q(id__in=[account_id for account_id in batch if account_id not in credit_only])
+            if batch_credit_only:
+                batch_filter |= models.Q(id__in=batch_credit_only, balance_mode=AccountModel.ROW)
+            accounts.update(
+                (account.id, account)
+                for account in self.select_for_update().filter(batch_filter).order_by('id')
+            )
+
+        deferred_accounts = [
+            account for account in accounts.values() if account.balance_mode in AccountModel.DEFERRED_MODES]
+        if deferred_accounts:
+            self.fold(deferred_accounts)
+
+        missing = [account_id for account_id in credit_only if account_id not in accounts]
+        if missing:
+            accounts.update(
+                (account.id, account)
+                for account in self.with_pending_balance().filter(
+                    id__in=missing, balance_mode__in=AccountModel.DEFERRED_MODES)
+            )
+        return accounts
+
+    def fold(self, accounts):
+        """
+        Suma al balance de las cuentas los abonos pendientes y los contadores, y actualiza
+        los acumulados mensuales de esos abonos.
+
+        Las cuentas deben estar bloqueadas. Los contadores se bloquean antes de leerlos y
+        quedan en cero, los abonos que se confirmen mientras tanto quedan para la siguiente vez.
+        Los movimientos sumados en un contador (in_shard) solo actualizan los acumulados.
+        Los abonos y contadores que harian superar MAX_BALANCE quedan pendientes.
+
+        Args:
+            accounts (list): cuentas bloqueadas
+        Returns:
+            int: movimientos pendientes procesados
+        """
+        accounts = {account.id: account for account in accounts}
+        changed = set()
+
+        shards = list(BalanceShardModel.objects.select_for_update().filter(
+            account_id__in=list(accounts)).exclude(delta=0).order_by('id').values_list('id', 'account_id', 'delta'))
+        folded_shards = []
+        # Cuentas con contadores sin sumar, sus movimientos in_shard siguen pendientes
+        held = set()
+        for shard_id, account_id, delta in shards:
+            if accounts[account_id].balance + delta > MAX_BALANCE:
+                held.add(account_id)
+                continue
+            accounts[account_id].balance += delta
+            folded_shards.append(shard_id)
+            changed.add(account_id)
+        if folded_shards:
+            BalanceShardModel.objects.filter(id__in=folded_shards).update(delta=0)
+
+        pending = []
+        for posting in PostingModel.objects.filter(account_id__in=list(accounts), folded=False).order_by(
+                'id').values_list('id', 'account_id', 'amount', 'date', 'in_shard'):
+            _, account_id, amount, _, in_shard = posting
+            if in_shard and account_id in held:
+                continue
+            if not in_shard:
+                if accounts[account_id].balance + amount > MAX_BALANCE:
+                    continue
+                accounts[account_id].balance += amount
+                changed.add(account_id)
+            pending.append(posting)
+
+        if changed:
+            self.bulk_update([accounts[account_id] for account_id in changed], ['balance'])
+        if pending:
+            ids = [posting_id for posting_id, _, _, _, _ in pending]
+            for start in range(0, len(ids), self.lock_batch_size):
+                PostingModel.objects.filter(id__in=ids[start:start + self.lock_batch_size]).update(folded=True)
+            MonthlySummaryModel.objects.apply([
+                TransactionModel(account_id=account_id, date=date, income=amount > 0, amount=abs(amount))
+                for _, account_id, amount, date, _ in pending
+            ])
+        return len(pending)
+
+    def with_pending_balance(self):
+        """
+        Anota pending_balance con los abonos del libro mayor y los contadores que aun no se
+        suman al balance
+        """
+        output_field = models.DecimalField(max_digits=12, decimal_places=2)
+        postings = PostingModel.objects.filter(account=models.OuterRef('pk'), folded=False, in_shard=False).values(
+            'account').annotate(total=models.Sum('amount')).values('total')
+        shards = BalanceShardModel.objects.filter(account=models.OuterRef('pk')).values(
+            'account').annotate(total=models.Sum('delta')).values('total')
+        zero = models.Value(Decimal(0), output_field=output_field)
+        return self.annotate(pending_balance=models.ExpressionWrapper(
+            Coalesce(models.Subquery(postings), zero) +
+            Coalesce(models.Subquery(shards), zero),
+            output_field=output_field
+        ))
+
+
 class AccountModel(models.Model):
     """
     Modelo para cuentas
     """
+    ROW = 'row'
+    LEDGER = 'ledger'
+    SHARDED = 'sharded'
+    BALANCE_MODE_CHOICES = (
+        (ROW, 'Balance actualizado en la cuenta'),
+        (LEDGER, 'Abonos de transferencias en el libro mayor'),
+        (SHARDED, 'Abonos de transferencias en contadores'),
+    )
+    # Modos en los que los abonos de transferencias no actualizan la fila de la cuenta
+    DEFERRED_MODES = (LEDGER, SHARDED)
+
     name = models.CharField("Nombre de cuenta", max_length=50, unique=True)
     balance =  models.DecimalField("Balance", max_digits=8, decimal_places=2)
+    balance_mode = models.CharField("Modo de balance", max_length=10, choices=BALANCE_MODE_CHOICES, default=ROW)
+
+    objects = AccountQuerySet.as_manager()
 
     def __str__(self):
         return "Nombre: {} Balance: {}".format(self.name, self.balance)
 
+    @property
+    def available_balance(self):
+        """
+        Balance con los abonos pendientes si la cuenta se consulto con with_pending_balance
+        """
+        return self.balance + (getattr(self, 'pending_balance', None) or 0)
+
     class Meta:	
         verbose_name = 'Cuenta'
         verbose_name_plural = 'Cuentas'
@@ -25,6 +195,38 @@ class TransactionModel(models.Model):
     date = models.DateField("Fecha de transacion")
     income = models.BooleanField("Tipo de transacion")
     account = models.ForeignKey(AccountModel, on_delete=models.CASCADE, verbose_name="Cuenta de la transacion", related_name='account_transaction')
+    balance_after = models.DecimalField("Balance despues de la transacion", max_digits=8, decimal_places=2, null=True, blank=True)
+
+    @staticmethod
+    def balance_before(instance):
+        """
+        Balance de la cuenta antes de la transacion en orden de escritura.
+
+        Se parte del registro anterior mas cercano con balance conocido (balance_after o un
+        ajuste manual) y se suman los registros entre ambos. Los abonos de cuentas en modo
+        ledger o sharded y las transaciones anteriores a balance_after no tienen balance_after.
+
+        Args:
+            instance (TransactionModel): transacion de referencia
+        Returns:
+            Decimal: balance anterior, None si la transacion es el primer registro de la cuenta
+        """
+        previous = TransactionModel.objects.filter(account_id=instance.account_id, id__lt=instance.id)
+        base = previous.filter(
+            models.Q(balance_after__isnull=False) | models.Q(description=MANUAL_ADJUSTMENT_DESCRIPTION)
+        ).order_by('-id').values_list('id', 'balance_after', 'amount').first()
+
+        if base is not None:
+            base_id, balance_after, amount = base
+            base_balance = balance_after if balance_after is not None else amount
+            previous = previous.filter(id__gt=base_id)
+        else:
+            base_balance = 0
+
+        after_base = previous.aggregate(total=models.Sum(SIGNED_AMOUNT), count=models.Count('id'))
+        if base is None and not after_base['count']:
+            return None
+        return base_balance + (after_base['total'] or 0)
 
     def balance_adjustment_on_delete(self, instance):
         """
@@ -33,12 +235,17 @@ class TransactionModel(models.Model):
         Args:
             instance (TransactionModel): instancia de la transaction para obtener la cuenta y ajustar el saldo
         """
-        instance_account = instance.account
+        instance_account = AccountModel.objects.lock(instance.account_id)[instance.account_id]
+        instance.account = instance_account
+
+        if instance.description == MANUAL_ADJUSTMENT_DESCRIPTION:
+           balance_before = self.balance_before(instance)
+           if balance_before is None:
+               return
 
-        if instance.description == 'ajuste manual':
-           penultimate_record = TransactionModel.objects.filter(account_id=instance.account_id)[::-1][1]
-           instance_account.balance = penultimate_record.amount
-           instance_account.save()
+           # Se revierte solo el efecto del ajuste, conservando los movimientos posteriores a el
+           instance_account.balance = instance_account.balance - (instance.amount - balance_before)
+           instance_account.save(update_fields=['balance'])
            return 
 
         if not instance.income:
@@ -46,16 +253,432 @@ class TransactionModel(models.Model):
         else:
             instance_account.balance = instance_account.balance - instance.amount        
 
-        instance_account.save()
+        instance_account.save(update_fields=['balance'])
 
     def delete(self):
         """
-        Se sobreescribe funcion para ajustar balance
+        Se sobreescribe funcion para ajustar balance, el ajuste y la eliminacion se aplican en una sola transaccion
         """
-        self.balance_adjustment_on_delete(self)
-        super().delete()
+        with transaction.atomic():
+            self.balance_adjustment_on_delete(self)
+            # Los puntos de control de la cuenta pueden incluir esta transacion, se recalcula completa
+            BalanceCheckpointModel.objects.filter(account_id=self.account_id).delete()
+            MonthlySummaryModel.objects.apply([self], sign=-1)
+            invalidate_accounts(self.account_id)
+            if self.description != MANUAL_ADJUSTMENT_DESCRIPTION:
+                DailyBalanceSnapshotModel.objects.apply([self], sign=-1)
+                return super().delete()
+
+            # Las fotos sin el ajuste se recalculan despues de eliminarlo
+            deleted = super().delete()
+            DailyBalanceSnapshotModel.objects.rebuild(self.account_id, self.date)
+            return deleted
 
     class Meta:	
         verbose_name = 'Transacion'
         verbose_name_plural = 'Transaciones'
-        ordering = ['date']
\ No newline at end of file
+        indexes = [
+            # Soporta el filtro por cuenta y rango de fechas con el orden de la paginacion por cursor
+            models.Index(fields=['account', 'date', 'id'], name='transaction_account_date_idx'),
+            # Soporta la busqueda del registro anterior de la cuenta al eliminar un ajuste manual
+            models.Index(fields=['account', 'id'], name='transaction_account_id_idx'),
+            # Soporta el orden y la jerarquia de fechas del admin
+            models.Index(fields=['date', 'id'], name='transaction_date_idx'),
+        ]
+
+
+# Monto con signo de una transacion: positivo para ingresos y negativo para egresos
+SIGNED_AMOUNT = models.Case(
+    models.When(income=True, then=models.F('amount')),
+    default=-models.F('amount'),
+    output_field=models.DecimalField(max_digits=20, decimal_places=2)
+)
+
+
+class BalanceCheckpointModel(models.Model):
+    """
+    Modelo para los puntos de control de la conciliacion de balances.
+
+    Guarda el balance conciliado de la cuenta considerando todas sus transaciones
+    hasta up_to_transaction_id, la siguiente conciliacion solo suma las posteriores.
+    """
+    account = models.ForeignKey(AccountModel, on_delete=models.CASCADE, verbose_name="Cuenta", related_name='balance_checkpoints')
+    up_to_transaction_id = models.BigIntegerField("Ultima transacion incluida")
+    balance = models.DecimalField("Balance conciliado", max_digits=8, decimal_places=2)
+    created_at = models.DateTimeField("Fecha de creacion", auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Punto de control'
+        verbose_name_plural = 'Puntos de control'
+        indexes = [
+            models.Index(fields=['up_to_transaction_id'], name='checkpoint_transaction_idx'),
+        ]
+
+
+class DailyBalanceSnapshotQuerySet(models.QuerySet):
+    """
+    QuerySet para las fotos diarias de balance
+    """
+
+    def apply(self, transactions, sign=1, batch_size=100):
+        """
+        Ajusta las fotos que incluyen transaciones con fecha anterior a hoy.
+
+        Una transacion nueva tiene el mayor id de la cuenta, ningun ajuste manual la descarta
+        y cada foto desde su fecha cambia en su monto con signo. Al eliminarla (sign=-1) las
+        fotos desde el primer ajuste manual escrito despues de ella no la incluian y no cambian.
+        Las fotos se actualizan con UPDATE de hasta batch_size rangos. Un ajuste manual cambia
+        las fotos siguientes de forma no uniforme, esas fotos se recalculan con rebuild.
+
+        Las fotos solo se toman de dias terminados, las transaciones de hoy no las afectan
+        y no ejecutan ninguna query.
+
+        Args:
+            transactions (list): transaciones creadas o por eliminar
+            sign (int, optional): 1 al crear, -1 al eliminar. por defecto 1.
+            batch_size (int, optional): rangos de fotos por UPDATE. por defecto 100.
+        """
+        today = date.today()
+        # {(cuenta, desde, hasta): cambio de balance}, hasta None es sin limite
+        deltas = defaultdict(Decimal)
+        for instance in transactions:
+            day = instance.date.date() if isinstance(instance.date, datetime) else instance.date
+            if day >= today:
+                continue
+            if instance.description == MANUAL_ADJUSTMENT_DESCRIPTION:
+                self.rebuild(instance.account_id, day)
+                continue
+
+            until = None
+            if sign < 0:
+                until = TransactionModel.objects.filter(
+                    account_id=instance.account_id, id__gt=instance.id, description=MANUAL_ADJUSTMENT_DESCRIPTION
+                ).aggregate(until=models.Min('date'))['until']
+            amount = instance.amount if instance.income else -instance.amount
+            deltas[(instance.account_id, day, until)] += sign * amount
+
+        ranges = [(key, delta) for key, delta in deltas.items() if delta]
+        output_field = models.DecimalField(max_digits=12, decimal_places=2)
+        for start in range(0, len(ranges), batch_size):
+            conditions = []
+            balance = models.F('balance')
+            for (account_id, day, until), delta in ranges[start:start + batch_size]:
+                condition = models.Q(account_id=account_id, date__gte=day)
+                if until is not None:
+                    condition &= models.Q(date__lt=until)
+                conditions.append(condition)
+                balance = balance + models.Case(
+                    models.When(condition, then=models.Value(delta, output_field=output_field)),
+                    default=models.Value(Decimal(0), output_field=output_field),
+                    output_field=output_field,
+                )
+            self.filter(reduce(or_, conditions)).update(balance=balance)
+
+    def rebuild(self, account_id, day):
+        """
+        Recalcula las fotos de la cuenta desde day, una consulta por foto. Solo se usa al crear
+        o eliminar un ajuste manual con fecha anterior, que no ocurre en la operacion normal.
+        """
+        from transations.balances import balances_at
+
+        day = day.date() if isinstance(day, datetime) else day
+        if day >= date.today():
+            return
+        # En orden de fecha, cada foto se calcula desde la anterior ya recalculada
+        snapshots = self.filter(account_id=account_id, date__gte=day)
+        dates = list(snapshots.order_by('date').values_list('date', flat=True))
+        snapshots.delete()
+        for snapshot_date in dates:
+            self.create(account_id=account_id, date=snapshot_date, balance=balances_at([account_id], snapshot_date)[account_id])
+
+
+class DailyBalanceSnapshotModel(models.Model):
+    """
+    Modelo para las fotos diarias de balance.
+
+    Guarda el balance de la cuenta al final del dia, considerando todas sus transaciones
+    con fecha menor o igual a date. El balance a una fecha se calcula desde la ultima foto
+    anterior sumando solo las transaciones posteriores a ella.
+    """
+    account = models.ForeignKey(AccountModel, on_delete=models.CASCADE, verbose_name="Cuenta", related_name='balance_snapshots')
+    date = models.DateField("Fecha")
+    balance = models.DecimalField("Balance al final del dia", max_digits=12, decimal_places=2)
+
+    objects = DailyBalanceSnapshotQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Foto diaria de balance'
+        verbose_name_plural = 'Fotos diarias de balance'
+        constraints = [
+            # Soporta tambien la busqueda de la ultima foto de la cuenta anterior a una fecha
+            models.UniqueConstraint(fields=['account', 'date'], name='balance_snapshot_account_date_unique'),
+        ]
+
+
+class MonthlySummaryQuerySet(models.QuerySet):
+    """
+    QuerySet para los acumulados mensuales con la actualizacion incremental
+    """
+    batch_size = 500
+
+    def apply(self, transactions, sign=1):
+        """
+        Suma (o resta) las transaciones en los acumulados mensuales de sus cuentas.
+
+        Los ajustes manuales no son ingresos ni egresos, reemplazan el balance, por lo
+        que no se acumulan. Las filas faltantes se insertan ignorando conflictos y luego
+        se bloquean, de esta forma dos operaciones concurrentes sobre el mismo mes no
+        pierden actualizaciones.
+
+        Args:
+            transactions (list): transaciones creadas o eliminadas
+            sign (int, optional): 1 al crear, -1 al eliminar. por defecto 1.
+        """
+        deltas = defaultdict(lambda: [Decimal(0), Decimal(0), 0])
+        for instance in transactions:
+            if instance.description == MANUAL_ADJUSTMENT_DESCRIPTION:
+                continue
+            delta = deltas[(instance.account_id, instance.date.year, instance.date.month)]
+            delta[0 if instance.income else 1] += sign * instance.amount
+            delta[2] += sign
+
+        keys = sorted(deltas)
+        for start in range(0, len(keys), self.batch_size):
+            self._apply_batch(keys[start:start + self.batch_size], deltas)
+
+    def _apply_batch(self, keys, deltas):
+        """
+        Aplica un lote de acumulados, las llaves vienen ordenadas para bloquear siempre en el mismo orden
+        """
+        self.bulk_create([
+            MonthlySummaryModel(account_id=account_id, year=year, month=month)
+            for account_id, year, month in keys
+        ], ignore_conflicts=True)
+
+        key_filter = models.Q()
+        for account_id, year, month in keys:
+            key_filter |= models.Q(account_id=account_id, year=year, month=month)
+
+        summaries = list(self.select_for_update().filter(key_filter).order_by('account_id', 'year', 'month'))
+        for summary in summaries:
+            income, outgoing, count = deltas[(summary.account_id, summary.year, summary.month)]
+            summary.income += income
+            summary.outgoing += outgoing
+            summary.count += count
+        self.bulk_update(summaries, ['income', 'outgoing', 'count'])
+
+
+class MonthlySummaryModel(models.Model):
+    """
+    Modelo para los acumulados mensuales de ingresos y egresos por cuenta
+    """
+    account = models.ForeignKey(AccountModel, on_delete=models.CASCADE, verbose_name="Cuenta", related_name='monthly_summary')
+    year = models.PositiveSmallIntegerField("Año")
+    month = models.PositiveSmallIntegerField("Mes")
+    income = models.DecimalField("Ingresos", max_digits=12, decimal_places=2, default=0)
+    outgoing = models.DecimalField("Egresos", max_digits=12, decimal_places=2, default=0)
+    count = models.IntegerField("Numero de transaciones", default=0)
+
+    objects = MonthlySummaryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Acumulado mensual'
+        verbose_name_plural = 'Acumulados mensuales'
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'year', 'month'], name='monthly_summary_account_month_unique'),
+        ]
+
+
+class IdempotencyKeyModel(models.Model):
+    """
+    Modelo para las llaves de idempotencia de los endpoints que mueven dinero.
+
+    Guarda la huella de la peticion y la respuesta para que los reintentos con la misma
+    llave retornen la respuesta original sin volver a aplicar la operacion.
+    """
+    key = models.CharField("Llave", max_length=255, unique=True)
+    fingerprint = models.CharField("Huella de la peticion", max_length=64)
+    status_code = models.PositiveSmallIntegerField("Codigo de respuesta", null=True)
+    response = models.JSONField("Respuesta", null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField("Fecha de creacion", auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Llave de idempotencia'
+        verbose_name_plural = 'Llaves de idempotencia'
+
+
+class JobModel(models.Model):
+    """
+    Modelo para los trabajos pesados que se ejecutan fuera de la peticion.
+
+    La API solo registra el trabajo, el comando run_jobs lo reclama con un UPDATE
+    condicional sobre el estado y lo ejecuta, por lo que varios workers pueden
+    consultar la misma tabla sin tomar dos veces el mismo trabajo.
+    """
+    IMPORT_TRANSACTIONS = 'import_transactions'
+    EXPORT_TRANSACTIONS = 'export_transactions'
+    RECONCILE_BALANCES = 'reconcile_balances'
+    KIND_CHOICES = (
+        (IMPORT_TRANSACTIONS, 'Carga de transaciones'),
+        (EXPORT_TRANSACTIONS, 'Exportacion de transaciones'),
+        (RECONCILE_BALANCES, 'Conciliacion de balances'),
+    )
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pendiente'),
+        (RUNNING, 'En ejecucion'),
+        (DONE, 'Terminado'),
+        (FAILED, 'Fallido'),
+    )
+
+    kind = models.CharField("Tipo", max_length=30, choices=KIND_CHOICES)
+    status = models.CharField("Estado", max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    payload = models.JSONField("Parametros", encoder=DjangoJSONEncoder)
+    progress = models.PositiveIntegerField("Progreso", default=0)
+    total = models.PositiveIntegerField("Total", null=True, blank=True)
+    result = models.JSONField("Resultado", null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField("Error", blank=True)
+    worker = models.CharField("Worker", max_length=100, blank=True)
+    created_at = models.DateTimeField("Fecha de creacion", auto_now_add=True)
+    started_at = models.DateTimeField("Fecha de inicio", null=True, blank=True)
+    # Lo renueva el worker con cada avance, un trabajo en ejecucion sin latido por mas de
+    # JOB_LEASE_SECONDS se considera abandonado y otro worker lo puede reclamar
+    heartbeat_at = models.DateTimeField("Ultimo latido", null=True, blank=True)
+    finished_at = models.DateTimeField("Fecha de fin", null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Trabajo'
+        verbose_name_plural = 'Trabajos'
+        indexes = [
+            # Soporta la busqueda de trabajos pendientes en orden de llegada
+            models.Index(fields=['status', 'id'], name='job_status_idx'),
+        ]
+
+
+TRANSFER_DESCRIPTION = 'movimiento entre cuentas'
+
+
+class JournalEntryQuerySet(models.QuerySet):
+    """
+    QuerySet para los asientos del libro mayor
+    """
+
+    def record_transfers(self, transfers, pending=()):
+        """
+        Registra un asiento con su debito y su credito por cada transferencia, solo con inserts.
+
+        El debito siempre se aplica al balance de la cuenta remitente (que esta bloqueada).
+        El credito queda pendiente para las cuentas de pending (cuentas en modo ledger o
+        sharded sin bloquear), su balance no se actualiza y el abono se suma al bloquearlas
+        o al compactar. En modo sharded el monto ya esta en un contador (in_shard).
+
+        Args:
+            transfers (list): tuplas (from_account, to_account, amount, date)
+            pending (set, optional): ids de las cuentas con abonos pendientes. por defecto ().
+        Returns:
+            list: asientos creados
+        """
+        entries = self.bulk_create([JournalEntryModel(description=TRANSFER_DESCRIPTION) for _ in transfers])
+        postings = []
+        for entry, (from_account, to_account, amount, date) in zip(entries, transfers):
+            postings.append(PostingModel(entry=entry, account=from_account, amount=-amount, date=date, folded=True))
+            postings.append(PostingModel(
+                entry=entry, account=to_account, amount=amount, date=date, folded=to_account.id not in pending,
+                in_shard=to_account.id in pending and to_account.balance_mode == AccountModel.SHARDED
+            ))
+        PostingModel.objects.bulk_create(postings)
+        return entries
+
+
+class JournalEntryModel(models.Model):
+    """
+    Modelo para los asientos del libro mayor, cada transferencia es un asiento con sus movimientos
+    """
+    description = models.CharField("Descripcion", max_length=50)
+    created_at = models.DateTimeField("Fecha de creacion", auto_now_add=True)
+
+    objects = JournalEntryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Asiento'
+        verbose_name_plural = 'Asientos'
+
+
+class PostingModel(models.Model):
+    """
+    Modelo para los movimientos (debito o credito) de un asiento del libro mayor.
+
+    El monto es negativo para los debitos y positivo para los creditos. folded indica si
+    el movimiento ya esta incluido en AccountModel.balance y en los acumulados mensuales,
+    el balance real de una cuenta es su balance mas los movimientos pendientes. Los
+    movimientos in_shard ya estan sumados en un contador de BalanceShardModel.
+    """
+    entry = models.ForeignKey(JournalEntryModel, on_delete=models.CASCADE, verbose_name="Asiento", related_name='postings')
+    account = models.ForeignKey(AccountModel, on_delete=models.CASCADE, verbose_name="Cuenta", related_name='postings')
+    amount = models.DecimalField("Monto", max_digits=8, decimal_places=2)
+    date = models.DateField("Fecha del movimiento")
+    folded = models.BooleanField("Incluido en el balance", default=False)
+    in_shard = models.BooleanField("Sumado en un contador", default=False)
+
+    class Meta:
+        verbose_name = 'Movimiento'
+        verbose_name_plural = 'Movimientos'
+        indexes = [
+            # Soporta la busqueda de abonos pendientes por cuenta
+            models.Index(fields=['account', 'folded'], name='posting_account_folded_idx'),
+        ]
+
+
+class BalanceShardQuerySet(models.QuerySet):
+    """
+    QuerySet para los contadores de balance
+    """
+
+    def create_shards(self, account_id):
+        """
+        Crea los BALANCE_SHARD_COUNT contadores de la cuenta, los existentes se conservan
+        """
+        self.bulk_create([
+            BalanceShardModel(account_id=account_id, shard=shard) for shard in range(settings.BALANCE_SHARD_COUNT)
+        ], ignore_conflicts=True)
+
+    def credit(self, account_id, amount):
+        """
+        Suma el abono en un contador elegido al azar, abonos concurrentes a la misma cuenta
+        solo compiten cuando eligen el mismo contador
+
+        Args:
+            account_id (int): id de la cuenta en modo sharded
+            amount (Decimal): monto a sumar
+        """
+        shard = random.randrange(settings.BALANCE_SHARD_COUNT)
+        update = self.filter(account_id=account_id, shard=shard)
+        if not update.update(delta=models.F('delta') + amount):
+            # El numero de contadores aumento despues de activar el modo
+            self.create_shards(account_id)
+            update.update(delta=models.F('delta') + amount)
+
+
+class BalanceShardModel(models.Model):
+    """
+    Modelo para los contadores de balance de las cuentas en modo sharded.
+
+    Los abonos de transferencias se suman en uno de los contadores de la cuenta en lugar
+    de su fila, el balance real es AccountModel.balance mas la suma de los contadores.
+    """
+    account = models.ForeignKey(AccountModel, on_delete=models.CASCADE, verbose_name="Cuenta", related_name='balance_shards')
+    shard = models.PositiveSmallIntegerField("Contador")
+    delta = models.DecimalField("Monto sin compactar", max_digits=12, decimal_places=2, default=0)
+
+    objects = BalanceShardQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Contador de balance'
+        verbose_name_plural = 'Contadores de balance'
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'shard'], name='balance_shard_account_unique'),
+        ]
@@ -0,0 +1,232 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import date
+from urllib import parse
+
+import coreapi
+import coreschema
+
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class TransactionKeysetPagination(BasePagination):
+    """
+    Paginacion por cursor (keyset) sobre (date, id) para las transaciones.
+
+    A diferencia de la paginacion por offset, cada pagina se obtiene con un filtro
+    sobre la posicion de la ultima fila entregada, por lo que el costo de la consulta
+    no depende de cuantas transaciones tenga la cuenta.
+    """
+    cursor_query_param = 'cursor'
+    cursor_query_description = 'Cursor de paginacion'
+    page_size_query_param = 'page_size'
+    page_size_query_description = 'Numero de resultados por pagina'
+    page_size = 50
+    max_page_size = 500
+    ordering = ('date', 'id')
+    invalid_cursor_message = 'Cursor invalido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Aplica el filtro de posicion y el limite de pagina al queryset
+
+        Args:
+            queryset (QuerySet): transaciones a paginar
+            request (Request): peticion con el cursor y el tamaño de pagina
+
+        Returns:
+            list: filas de la pagina solicitada en orden ascendente por (date, id)
+        """
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Version asincrona de paginate_queryset, las filas se leen con el ORM asincrono
+        """
+        return self.set_page([row async for row in self.get_page_queryset(queryset, request)])
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Queryset de la pagina solicitada, sin evaluar
+
+        Se pide una fila extra para saber si hay mas resultados sin hacer un COUNT
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+
+        self.reverse = False
+        if self.cursor is not None:
+            position_date, position_id, self.reverse = self.cursor
+            if self.reverse:
+                queryset = queryset.filter(Q(date__lt=position_date) | Q(date=position_date, id__lt=position_id))
+            else:
+                queryset = queryset.filter(Q(date__gt=position_date) | Q(date=position_date, id__gt=position_id))
+
+        ordering = ['-{}'.format(field) for field in self.ordering] if self.reverse else list(self.ordering)
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def set_page(self, rows):
+        """
+        Recorta la fila extra y calcula si existen paginas siguiente y anterior
+
+        Args:
+            rows (list): filas obtenidas con get_page_queryset
+        Returns:
+            list: filas de la pagina en orden ascendente por (date, id)
+        """
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        """
+        Tamaño de pagina solicitado, limitado por max_page_size
+        """
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_position(self, row):
+        """
+        Posicion (date, id) de una fila, acepta instancias o diccionarios de values()
+        """
+        if isinstance(row, dict):
+            return row['date'], row['id']
+        return row.date, row.id
+
+    def encode_cursor(self, position, reverse=False):
+        """
+        Genera la url con el cursor codificado para la posicion dada
+
+        Args:
+            position (tuple): (date, id) de la fila de referencia
+            reverse (bool, optional): si el cursor apunta a la pagina anterior. por defecto False.
+
+        Returns:
+            str: url absoluta con el cursor
+        """
+        tokens = OrderedDict([('d', position[0].isoformat()), ('i', position[1])])
+        if reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """
+        Decodifica el cursor de la peticion
+
+        Raises:
+            NotFound: si el cursor no tiene el formato esperado
+
+        Returns:
+            tuple: (date, id, reverse) o None si no se envio cursor
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            position_date = date.fromisoformat(tokens['d'][0])
+            position_id = int(tokens['i'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position_date, position_id, reverse
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_links(self):
+        """
+        Links de navegacion para agregar a respuestas con un envoltorio propio
+        """
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_schema_fields(self, view):
+        return [
+            coreapi.Field(
+                name=self.cursor_query_param,
+                required=False,
+                location='query',
+                schema=coreschema.String(title='Cursor', description=self.cursor_query_description)
+            ),
+            coreapi.Field(
+                name=self.page_size_query_param,
+                required=False,
+                location='query',
+                schema=coreschema.Integer(title='Page size', description=self.page_size_query_description)
+            ),
+        ]
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': self.cursor_query_description,
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': self.page_size_query_description,
+                'schema': {'type': 'integer'},
+            },
+        ]
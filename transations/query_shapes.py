@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import re
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+QueryShape = namedtuple('QueryShape', ['fingerprint', 'count', 'duration', 'sql'])
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_VALUES_ROWS = re.compile(r'(\([^()]*\))(?:, \1)+')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACES = re.compile(r'\s+')
+_IGNORED = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def fingerprint(sql):
+    """
+    Forma normalizada de una query: sin literales y con las listas IN y las filas de un
+    INSERT multiple colapsadas, dos queries con la misma forma solo difieren en sus valores
+
+    Args:
+        sql (str): sql con los placeholders de Django
+    Returns:
+        str: huella de la query
+    """
+    sql = _STRING.sub("'?'", sql)
+    sql = _NUMBER.sub('N', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES_ROWS.sub(r'\1', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class QueryShapeDetector:
+    """
+    Agrupa las queries ejecutadas por huella para detectar queries repetidas por fila (N+1)
+    y queries lentas. Se usa como envoltorio de connection.execute_wrapper.
+    """
+
+    def __init__(self):
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not sql.startswith(_IGNORED):
+                self.record(sql, time.perf_counter() - start)
+
+    def record(self, sql, duration):
+        key = fingerprint(sql)
+        count, total, example = self.shapes.get(key, (0, 0.0, sql))
+        self.shapes[key] = (count + 1, total + duration, example)
+
+    def repeated(self, threshold):
+        """
+        Formas ejecutadas threshold veces o mas, de mayor a menor numero de ejecuciones
+
+        Returns:
+            list: QueryShape
+        """
+        return sorted(
+            (QueryShape(key, count, total, sql) for key, (count, total, sql) in self.shapes.items() if count >= threshold),
+            key=lambda shape: -shape.count
+        )
+
+    def slow(self, seconds):
+        """
+        Formas cuyo tiempo promedio supera seconds
+
+        Returns:
+            list: QueryShape
+        """
+        return [
+            QueryShape(key, count, total, sql) for key, (count, total, sql) in self.shapes.items()
+            if total / count >= seconds
+        ]
+
+
+@contextmanager
+def detect_query_shapes(using=connection):
+    """
+    Registra las queries de la conexion dentro del bloque
+
+    Yields:
+        QueryShapeDetector: detector con las formas ejecutadas
+    """
+    detector = QueryShapeDetector()
+    with using.execute_wrapper(detector):
+        yield detector
+
+
+class QueryShapeMiddleware:
+    """
+    Detector opcional por peticion, se activa con QUERY_SHAPE_THRESHOLD mayor a 0.
+
+    Escribe un warning por cada forma repetida QUERY_SHAPE_THRESHOLD veces o mas y por cada
+    forma con un tiempo promedio mayor a SLOW_QUERY_MS. Es hibrido como MetricsMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.threshold = getattr(settings, 'QUERY_SHAPE_THRESHOLD', 0)
+        if not self.threshold:
+            raise MiddlewareNotUsed
+        self.slow_seconds = getattr(settings, 'SLOW_QUERY_MS', 100) / 1000
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Marca la instancia como funcion asincrona para el handler de Django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with detect_query_shapes() as detector:
+            response = self.get_response(request)
+        self.report(request, detector)
+        return response
+
+    async def __acall__(self, request):
+        with detect_query_shapes() as detector:
+            response = await self.get_response(request)
+        self.report(request, detector)
+        return response
+
+    def report(self, request, detector):
+        for shape in detector.repeated(self.threshold):
+            logger.warning(
+                'Query repetida %d veces en %s %s: %s', shape.count, request.method, request.path, shape.sql)
+        for shape in detector.slow(self.slow_seconds):
+            logger.warning(
+                'Query lenta (%.1fms promedio) en %s %s: %s',
+                shape.duration / shape.count * 1000, request.method, request.path, shape.sql)
+
+
+class QueryShapeTestMixin:
+    """
+    Mixin para TestCase que falla cuando una misma forma de query se repite dentro del bloque
+    """
+    query_shape_threshold = 5
+
+    @contextmanager
+    def assertNoRepeatedQueries(self, threshold=None):
+        threshold = threshold or self.query_shape_threshold
+        with detect_query_shapes() as detector:
+            yield detector
+
+        repeated = detector.repeated(threshold)
+        if repeated:
+            self.fail('Queries repetidas {} veces o mas:\n{}'.format(threshold, '\n'.join(
+                '{}x {}'.format(shape.count, shape.sql) for shape in repeated)))
@@ -0,0 +1,170 @@
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db.models import Max, Q, Subquery, Sum
+
+from transations.models import (
+    AccountModel, TransactionModel, BalanceCheckpointModel, MANUAL_ADJUSTMENT_DESCRIPTION, SIGNED_AMOUNT
+)
+
+
+CENTS = Decimal('0.01')
+
+Drift = namedtuple('Drift', ['account_id', 'balance', 'expected'])
+ReconciliationResult = namedtuple('ReconciliationResult', ['accounts', 'drifts', 'checkpoints', 'watermark'])
+
+
+def reconcile_balances(full=False, batch_size=1000, progress=None):
+    """
+    Concilia el balance de las cuentas contra sus transaciones.
+
+    Las cuentas se procesan por lotes de ids. Para las cuentas con punto de control solo se
+    suman las transaciones posteriores a su propio punto de control, las cuentas sin punto de
+    control (nuevas o con transaciones eliminadas) se recalculan completas. Un ajuste manual
+    reemplaza el balance, por lo que se toma como base y solo se suman los movimientos
+    posteriores a el.
+
+    Args:
+        full (bool, optional): ignora los puntos de control y recalcula todo. por defecto False.
+        batch_size (int, optional): cuentas por lote. por defecto 1000.
+        progress (callable, optional): recibe las cuentas procesadas despues de cada lote. por defecto None.
+    Returns:
+        ReconciliationResult: cuentas procesadas, diferencias, puntos de control creados y
+            la ultima transacion incluida
+    """
+    watermark = TransactionModel.objects.aggregate(last=Max('id'))['last'] or 0
+
+    accounts = checkpoints = 0
+    drift_list = []
+    batch = []
+    # El balance real de las cuentas en modo ledger incluye los abonos pendientes
+    rows = AccountModel.objects.with_pending_balance().order_by('id').values_list('id', 'balance', 'pending_balance')
+    for account_id, balance, pending_balance in rows.iterator(chunk_size=batch_size):
+        batch.append((account_id, balance + (pending_balance or 0)))
+        if len(batch) >= batch_size:
+            accounts, checkpoints = _reconcile_batch(batch, full, watermark, drift_list, accounts, checkpoints)
+            batch = []
+            if progress is not None:
+                progress(accounts)
+    if batch:
+        accounts, checkpoints = _reconcile_batch(batch, full, watermark, drift_list, accounts, checkpoints)
+        if progress is not None:
+            progress(accounts)
+
+    return ReconciliationResult(accounts, drift_list, checkpoints, watermark)
+
+
+def _reconcile_batch(batch, full, watermark, drift_list, accounts, checkpoints):
+    """
+    Concilia un lote de cuentas consecutivas
+
+    Args:
+        batch (list): tuplas (id, balance) ordenadas por id
+        full (bool): ignora los puntos de control
+        watermark (int): ultima transacion a incluir en esta conciliacion
+        drift_list (list): lista donde se agregan las diferencias encontradas
+        accounts (int): contador de cuentas procesadas
+        checkpoints (int): contador de puntos de control creados
+    Returns:
+        tuple: contadores de cuentas y puntos de control actualizados
+    """
+    first_id, last_id = batch[0][0], batch[-1][0]
+    in_batch = Q(account_id__gte=first_id, account_id__lte=last_id)
+
+    base = {}
+    if not full:
+        latest_checkpoints = BalanceCheckpointModel.objects.filter(in_batch).values('account_id').annotate(
+            last=Max('id')).values('last')
+        base = {
+            account_id: (up_to_transaction_id, balance)
+            for account_id, up_to_transaction_id, balance in BalanceCheckpointModel.objects.filter(
+                id__in=Subquery(latest_checkpoints)).values_list('account_id', 'up_to_transaction_id', 'balance')
+        }
+
+    expected, with_rows = _expected_balances(
+        {account_id: base.get(account_id, (0, 0)) for account_id, _ in batch}, watermark)
+
+    # Una transacion con id anterior al punto de control que se confirmo despues de crearlo no
+    # se incluye en el calculo incremental, las cuentas con diferencia se recalculan completas
+    suspects = [account_id for account_id, balance in batch if account_id in base and balance != expected[account_id]]
+    if suspects:
+        full_expected, _ = _expected_balances({account_id: (0, 0) for account_id in suspects}, watermark)
+        expected.update(full_expected)
+        with_rows.update(suspects)
+
+    new_checkpoints = []
+    for account_id, balance in batch:
+        accounts += 1
+        if balance != expected[account_id]:
+            drift_list.append(Drift(account_id, balance, expected[account_id]))
+        if account_id in with_rows or account_id not in base:
+            new_checkpoints.append(BalanceCheckpointModel(
+                account_id=account_id, up_to_transaction_id=watermark, balance=expected[account_id]))
+
+    BalanceCheckpointModel.objects.bulk_create(new_checkpoints)
+    return accounts, checkpoints + len(new_checkpoints)
+
+
+def _expected_balances(bounds, watermark):
+    """
+    Balance esperado de las cuentas desde su punto de control
+
+    Args:
+        bounds (dict): {id cuenta: (ultima transacion incluida, balance)} del punto de control,
+            (0, 0) recalcula todo el historico
+        watermark (int): ultima transacion a incluir
+    Returns:
+        tuple: {id cuenta: balance esperado} y el set de cuentas con transaciones nuevas
+    """
+    by_lower_bound = defaultdict(list)
+    for account_id, (up_to_transaction_id, _) in bounds.items():
+        by_lower_bound[up_to_transaction_id].append(account_id)
+    pending = reduce(or_, (
+        Q(account_id__in=account_ids, id__gt=up_to_transaction_id)
+        for up_to_transaction_id, account_ids in by_lower_bound.items()
+    ))
+
+    # Un solo agregado agrupado para todas las cuentas, normalmente comparten el punto de control
+    totals = {
+        row['account_id']: row
+        for row in TransactionModel.objects.filter(pending, id__lte=watermark)
+        .values('account_id')
+        .annotate(total=Sum(SIGNED_AMOUNT), last_reset=Max('id', filter=Q(description=MANUAL_ADJUSTMENT_DESCRIPTION)))
+    }
+    reset_balance = _balances_after_reset(
+        {account_id: row['last_reset'] for account_id, row in totals.items() if row['last_reset']}, watermark)
+
+    expected = {}
+    for account_id, (_, balance) in bounds.items():
+        if account_id in reset_balance:
+            expected[account_id] = reset_balance[account_id]
+        else:
+            row = totals.get(account_id)
+            expected[account_id] = balance + (row['total'] if row else 0)
+        # SQLite retorna la suma sin los decimales del campo
+        expected[account_id] = Decimal(expected[account_id]).quantize(CENTS)
+    return expected, set(totals)
+
+
+def _balances_after_reset(last_reset, watermark):
+    """
+    Balance de las cuentas cuyo ultimo ajuste manual esta dentro del rango conciliado
+
+    Args:
+        last_reset (dict): {id cuenta: id del ultimo ajuste manual}
+        watermark (int): ultima transacion a incluir
+    Returns:
+        dict: {id cuenta: balance esperado}
+    """
+    if not last_reset:
+        return {}
+
+    balances = dict(TransactionModel.objects.filter(id__in=last_reset.values()).values_list('account_id', 'amount'))
+    after_reset = reduce(or_, (Q(account_id=account_id, id__gt=reset_id) for account_id, reset_id in last_reset.items()))
+    for account_id, total in (TransactionModel.objects.filter(after_reset, id__lte=watermark)
+                              .values('account_id').annotate(total=Sum(SIGNED_AMOUNT))
+                              .values_list('account_id', 'total')):
+        balances[account_id] += total
+    return balances
@@ -0,0 +1,50 @@
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.compat import SHORT_SEPARATORS
+
+from transations.fast_serializers import SerializedRows
+
+
+class RowsJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer que codifica las filas de SerializedRows por bloques, sin crear la
+    lista completa de representaciones. El resultado es identico byte a byte al de
+    JSONRenderer, con indentacion (API navegable) se usa el renderer original.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if not self.compact or self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return b''.join(self.iter_render(data))
+
+    def iter_render(self, data):
+        """
+        Genera el JSON por partes, los diccionarios que contienen filas se arman a mano
+        """
+        if isinstance(data, SerializedRows):
+            yield from data.iter_json(self.dumps)
+        elif isinstance(data, dict) and any(isinstance(value, SerializedRows) for value in data.values()):
+            separator = b'{'
+            for key, value in data.items():
+                yield separator + self.dumps(key) + b':'
+                yield from self.iter_render(value)
+                separator = b','
+            yield b'}'
+        else:
+            yield self.dumps(data)
+
+    def dumps(self, data):
+        """
+        Codifica con la misma configuracion de JSONRenderer.render sin indentacion
+        """
+        ret = json.dumps(
+            data, cls=self.encoder_class, ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict, separators=SHORT_SEPARATORS
+        )
+        ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        return ret.encode()
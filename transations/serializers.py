@@ -1,12 +1,41 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
 from rest_framework import  serializers
-from transations.models import AccountModel, TransactionModel
+from drf_yasg.utils import swagger_serializer_method
+
+from transations.cache import invalidate_accounts
+from transations.fast_serializers import RowSerializer, SerializedRows
+from transations.models import (
+    AccountModel, TransactionModel, MonthlySummaryModel, JobModel, JournalEntryModel, BalanceShardModel,
+    DailyBalanceSnapshotModel, MANUAL_ADJUSTMENT_DESCRIPTION, INITIAL_BALANCE_DESCRIPTION, MAX_BALANCE
+)
 from datetime import datetime
 
 
+class AccountBalanceField(serializers.DecimalField):
+    """
+    Balance de la cuenta incluyendo los abonos pendientes del libro mayor (pending_balance)
+    """
+
+    def get_attribute(self, instance):
+        return super().get_attribute(instance) + (getattr(instance, "pending_balance", None) or 0)
+
+    def quantize(self, value):
+        """
+        Con los abonos pendientes el balance puede tener mas digitos que la columna, se
+        redondea a decimal_places sin limitar max_digits
+        """
+        return value.quantize(Decimal(1).scaleb(-self.decimal_places), rounding=self.rounding)
+
+
 class AccountSerializer(serializers.ModelSerializer):
     """
     Serializador para la creacion de cuentas de usuario con nombre y balance
     """
+    balance = AccountBalanceField(label="Balance", max_digits=8, decimal_places=2)
     
     def create_transation(self, instance, description, income=True):
         """
@@ -17,34 +46,42 @@ class AccountSerializer(serializers.ModelSerializer):
             description (str): descripcion para la transacion aplicada
             income (bool, optional): tipo de transacion ingreso/egreso . por defecto True.
         """
-        TransactionModel.objects.create(
+        instance_transation = TransactionModel.objects.create(
             amount=instance.balance,
             description=description,
             income=income,
             account=instance,
-            date=datetime.now()
+            date=datetime.now(),
+            balance_after=instance.balance
         )
+        MonthlySummaryModel.objects.apply([instance_transation])
 
     def create(self, validated_data):
         """
         Se sobreescribe para crear transacion con el balance de ajuste manual
         """        
-        instance = super().create(validated_data)
-        self.create_transation(instance, "balance inicial")
+        with transaction.atomic():
+            instance = super().create(validated_data)
+            self.create_transation(instance, INITIAL_BALANCE_DESCRIPTION)
+            invalidate_accounts(instance.id)
         return instance
     
     def update(self, instance, validated_data):
         """
         Se sobreescribe para crear transacion con el balance de ajuste manual
         """        
-        instance = super().update(instance, validated_data)
-        self.create_transation(instance, "ajuste manual")
+        with transaction.atomic():
+            # La copia bloqueada ya incluye los abonos pendientes sumados al balance
+            instance = AccountModel.objects.lock(instance.id)[instance.id]
+            instance = super().update(instance, validated_data)
+            self.create_transation(instance, MANUAL_ADJUSTMENT_DESCRIPTION)
+            invalidate_accounts(instance.id)
         return instance
 
 
     class Meta:
         model = AccountModel
-        fields = "__all__"
+        fields = ("id", "name", "balance")
 
 
 
@@ -57,10 +94,28 @@ class TransactionSerializer(serializers.ModelSerializer):
         """
         Validaciones a aplicar en la transacion
         """
-        if not data.get("income") and data.get("amount") > data.get("account").balance:
-            raise serializers.ValidationError("El balance a retirar no puede ser mayor al disponible")
+        self.validate_balance(data, data.get("account"))
         return data
 
+    def validate_balance(self, data, instance_account):
+        """
+        Valida que un retiro no supere el balance de la cuenta, incluyendo los abonos
+        pendientes si la cuenta se consulto con with_pending_balance, y que un ingreso no
+        supere el balance maximo
+
+        Args:
+            data (dict): con la data de la transacion
+            instance_account (AccountModel): cuenta contra la que se valida el balance
+        Raises:
+            serializers.ValidationError: El balance a retirar no puede ser mayor al disponible
+            serializers.ValidationError: El balance de la cuenta no puede superar el maximo
+        """
+        available = instance_account.available_balance
+        if not data.get("income") and data.get("amount") > available:
+            raise serializers.ValidationError("El balance a retirar no puede ser mayor al disponible")
+        if data.get("income") and available + data.get("amount") > MAX_BALANCE:
+            raise serializers.ValidationError("El balance de la cuenta no puede superar {}".format(MAX_BALANCE))
+
     def update_account_balance(self, validated_data):
         """
         Funcion para actualizar balance de la cuenta cuando se realiza una transacion
@@ -76,57 +131,98 @@ class TransactionSerializer(serializers.ModelSerializer):
         else:
             validated_data["description"] = "egreso"
             instance_account.balance = instance_account.balance - validated_data.get("amount")
-        instance_account.save()
+        instance_account.save(update_fields=["balance"])
+        invalidate_accounts(instance_account.id)
 
     def create(self, validated_data):
         """
-        Se sobreescribe para crear transacion con el balance de ajuste manual    
+        Se sobreescribe para crear transacion y ajustar el balance de la cuenta.
+
+        La cuenta se bloquea y el balance se vuelve a validar dentro de la transaccion,
+        la validacion previa del serializador se hizo sin bloqueo y pudo quedar desactualizada.
         """      
-        instance = super().create(validated_data)        
-        self.update_account_balance(validated_data)
+        with transaction.atomic():
+            account_id = validated_data["account"].id
+            validated_data["account"] = AccountModel.objects.lock(account_id)[account_id]
+            self.validate_balance(validated_data, validated_data["account"])
+            self.update_account_balance(validated_data)
+            validated_data["balance_after"] = validated_data["account"].balance
+            instance = super().create(validated_data)
+            MonthlySummaryModel.objects.apply([instance])
+            DailyBalanceSnapshotModel.objects.apply([instance])
         return instance 
     
     class Meta:
         model = TransactionModel
-        fields = "__all__"
+        exclude = ('balance_after',)
         read_only_fields = ('description',)        
+        # La cuenta incluye los abonos pendientes de las cuentas en modo ledger o sharded
+        extra_kwargs = {'account': {'queryset': AccountModel.objects.with_pending_balance()}}
+
+
+# Lectura rapida de transaciones desde values_list(), misma salida de TransactionSerializer
+TRANSACTION_ROWS = RowSerializer(TransactionSerializer)
 
 
 class TransferFromAccountToAccount(serializers.Serializer):
     """
     Serializador customizado para el envio de dinero entre cuentas
     """
-    queryset_account = AccountModel.objects.all()
-    from_account = serializers.SlugRelatedField(
-        queryset=queryset_account,
-        slug_field='id'
-    )
-    to_account = serializers.SlugRelatedField(
-        queryset=queryset_account,
-        slug_field='id'
-    )
-    amount = serializers.DecimalField(max_digits=8, decimal_places=2)
+    from_account = serializers.IntegerField(min_value=1)
+    to_account = serializers.IntegerField(min_value=1)
+    amount = serializers.DecimalField(max_digits=8, decimal_places=2, min_value=Decimal("0.01"))
+
+    # Cuentas con abonos pendientes en el libro mayor, su balance no se actualiza
+    pending = frozenset()
 
     def validate(self, data):
         """
-        Validaciones a la cuenta para poder transferir el dinero
+        Validaciones a la cuenta para poder transferir el dinero, las que requieren las
+        cuentas se aplican en create sobre las cuentas bloqueadas
 
         Args:
             data (dict): proceda para aplicar las validaciones
         Raises:
             serializers.ValidationError: La cuenta de remitente no puede ser igual a la cuenta de destino
-            serializers.ValidationError: El monto a transferir no puede ser mayor a lo que posee el remitente
         Returns:
             dict: con las validaciones aplicadas
         """
         if data.get("from_account") == data.get("to_account"):
             raise serializers.ValidationError("La cuenta de remitente no puede ser igual a la cuenta de destino")
         
-        if data.get("amount") > data.get("from_account").balance:
-            raise serializers.ValidationError("El monto a transferir no puede ser mayor a lo que posee el remitente")
-        
         return data
 
+    def validate_accounts(self, validated_data, accounts):
+        """
+        Valida la transferencia contra las cuentas bloqueadas
+
+        Args:
+            validated_data (dict): con los ids de las cuentas y el monto
+            accounts (dict): {id: AccountModel} con las cuentas bloqueadas
+        Raises:
+            serializers.ValidationError: La cuenta no existe
+            serializers.ValidationError: El monto a transferir no puede ser mayor a lo que posee el remitente
+            serializers.ValidationError: El balance de la cuenta destino no puede superar el maximo
+        Returns:
+            AccountModel: cuenta remitente
+            AccountModel: cuenta destino
+        """
+        errors = {
+            field: [serializers.SlugRelatedField.default_error_messages["does_not_exist"].format(
+                slug_name="id", value=validated_data[field])]
+            for field in ("from_account", "to_account") if validated_data[field] not in accounts
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        from_account, to_account = accounts[validated_data["from_account"]], accounts[validated_data["to_account"]]
+        if validated_data.get("amount") > from_account.balance:
+            raise serializers.ValidationError("El monto a transferir no puede ser mayor a lo que posee el remitente")
+        if to_account.available_balance + validated_data.get("amount") > MAX_BALANCE:
+            raise serializers.ValidationError(
+                "El balance de la cuenta destino no puede superar {}".format(MAX_BALANCE))
+        return from_account, to_account
+
     def instance_transation(self, validated_data, instance, description, income=True):
         """
         retorna instancia de transacion
@@ -143,9 +239,26 @@ class TransferFromAccountToAccount(serializers.Serializer):
             description=description,
             income=income,
             account=instance,
-            date=datetime.now()
+            date=datetime.now(),
+            balance_after=None if instance.id in self.pending else instance.balance
         )
 
+    @staticmethod
+    def pending_accounts(accounts, debited):
+        """
+        Cuentas en modo ledger o sharded que solo reciben abonos
+
+        Args:
+            accounts (dict): {id: AccountModel} retornado por AccountModel.objects.lock
+            debited (set): ids de las cuentas remitentes
+        Returns:
+            set: ids de las cuentas cuyo abono queda pendiente
+        """
+        return {
+            account_id for account_id, account in accounts.items()
+            if account.balance_mode in AccountModel.DEFERRED_MODES and account_id not in debited
+        }
+
     def update_account_balance(self, validated_data):
         """
         Funcion para actualizar el saldo en la cuenta remitente y la cuenta destino
@@ -161,22 +274,30 @@ class TransferFromAccountToAccount(serializers.Serializer):
         from_account = validated_data.get("from_account")
         from_account.balance = from_account.balance - validated_data.get('amount')
 
-        # Cuenta destino
+        # Cuenta destino, en modo ledger o sharded el abono queda pendiente sin actualizar su fila
         to_account = validated_data.get("to_account")
-        to_account.balance = to_account.balance + validated_data.get('amount')
+        changed_accounts = [from_account]
+        if to_account.id not in self.pending:
+            to_account.balance = to_account.balance + validated_data.get('amount')
+            changed_accounts.append(to_account)
+        elif to_account.balance_mode == AccountModel.SHARDED:
+            BalanceShardModel.objects.credit(to_account.id, validated_data.get('amount'))
 
         # Actualiza los balances en 1 solo query
-        AccountModel.objects.bulk_update([from_account, to_account], ['balance'])
+        AccountModel.objects.bulk_update(changed_accounts, ['balance'])
+        invalidate_accounts(from_account.id, to_account.id)
         return from_account, to_account
 
-    def create_money_transfer_transaction(self, validated_data, from_account, to_account):
+    def money_transfer_transactions(self, validated_data, from_account, to_account):
         """
-        Funcion para crear el log de la transferencia realizada
+        Funcion para construir (sin guardar) las transaciones de una transferencia
 
         Args:
             validated_data (dict): con las validaciones procesadas
             from_account (AccountModel): cuenta remitente
             to_account (AccountModel): cuenta destino
+        Returns:
+            list: transacion de egreso del remitente y de ingreso del destino
         """
         instance_from_account = self.instance_transation(
             validated_data, from_account, "transferencia hacia: {}".format(to_account.name), income=False)
@@ -184,23 +305,468 @@ class TransferFromAccountToAccount(serializers.Serializer):
         instance_to_account = self.instance_transation(
             validated_data, to_account, "transferencia desde: {}".format(from_account.name))
 
+        return [instance_from_account, instance_to_account]
+
+    def create_money_transfer_transaction(self, validated_data, from_account, to_account):
+        """
+        Funcion para crear el log de la transferencia realizada
+
+        Args:
+            validated_data (dict): con las validaciones procesadas
+            from_account (AccountModel): cuenta remitente
+            to_account (AccountModel): cuenta destino
+        """
         # Crea las 2 transaciones en 1 solo query
-        return TransactionModel.objects.bulk_create([instance_from_account, instance_to_account])
+        instance_transations = TransactionModel.objects.bulk_create(
+            self.money_transfer_transactions(validated_data, from_account, to_account))
+        JournalEntryModel.objects.record_transfers(
+            [(from_account, to_account, validated_data["amount"], instance_transations[0].date)], self.pending)
+        self.apply_monthly_summary(instance_transations)
+        return instance_transations
+
+    def apply_monthly_summary(self, instance_transations):
+        """
+        Acumulados mensuales de las transaciones aplicadas al balance, los abonos pendientes
+        se acumulan cuando se suman al balance de la cuenta
+        """
+        MonthlySummaryModel.objects.apply([
+            instance for instance in instance_transations if instance.account_id not in self.pending])
 
     def create(self, validated_data):
         """
-        Se sobreescribe para crear transaciones y descuentos de balance 
+        Se sobreescribe para crear transaciones y descuentos de balance.
+
+        Ambas cuentas se resuelven y bloquean con una sola consulta (en orden de id), se
+        validan sobre esas mismas instancias y el movimiento se aplica dentro de una sola
+        transaccion: bloqueo, bulk_update de balances y bulk_create de transaciones. Si la
+        cuenta destino esta en modo ledger o sharded no se bloquea, el abono queda en el libro
+        mayor o en uno de sus contadores.
         """           
-        from_account, to_account = self.update_account_balance(validated_data)
-        return self.create_money_transfer_transaction(validated_data, from_account, to_account)        
+        with transaction.atomic():
+            accounts = AccountModel.objects.lock(validated_data["from_account"], credit_only=[validated_data["to_account"]])
+            self.pending = self.pending_accounts(accounts, {validated_data["from_account"]})
+            validated_data["from_account"], validated_data["to_account"] = self.validate_accounts(validated_data, accounts)
+
+            from_account, to_account = self.update_account_balance(validated_data)
+            return self.create_money_transfer_transaction(validated_data, from_account, to_account)        
+
+
+class TransferItemSerializer(serializers.Serializer):
+    """
+    Serializador para un movimiento dentro de una transferencia masiva
+    """
+    from_account = serializers.IntegerField(min_value=1)
+    to_account = serializers.IntegerField(min_value=1)
+    amount = serializers.DecimalField(max_digits=8, decimal_places=2, min_value=Decimal("0.01"))
+
+    def validate(self, data):
+        """
+        Validaciones que no requieren consultar las cuentas
+
+        Raises:
+            serializers.ValidationError: La cuenta de remitente no puede ser igual a la cuenta de destino
+        """
+        if data.get("from_account") == data.get("to_account"):
+            raise serializers.ValidationError("La cuenta de remitente no puede ser igual a la cuenta de destino")
+        return data
+
+
+class BulkTransferFromAccountToAccount(serializers.Serializer):
+    """
+    Serializador para aplicar muchas transferencias entre cuentas en una sola peticion.
+
+    Todas las cuentas involucradas se cargan (y bloquean) en una sola consulta, los cambios
+    de balance se netean por cuenta y se escriben con un bulk_update y un bulk_create. Las
+    cuentas en modo ledger o sharded que solo reciben abonos no se bloquean ni se actualizan.
+    """
+    max_transfers = 50000
+    transfers = TransferItemSerializer(many=True, allow_empty=False, max_length=max_transfers)
+
+    def validate_accounts(self, transfers, accounts):
+        """
+        Valida que las cuentas existan y que ningun remitente quede con saldo negativo ni
+        ningun destino supere el balance maximo despues de netear todos los movimientos
+
+        Args:
+            transfers (list): movimientos validados
+            accounts (dict): {id: AccountModel} con las cuentas bloqueadas
+        Raises:
+            serializers.ValidationError: con los errores por movimiento
+        Returns:
+            dict: {id: Decimal} con el cambio neto de balance por cuenta
+        """
+        net_balance = self.net_balance(transfers)
+        overdrawn = {
+            account_id for account_id, delta in net_balance.items()
+            if account_id in accounts and accounts[account_id].balance + delta < 0
+        }
+        exceeded = {
+            account_id for account_id, delta in net_balance.items()
+            if account_id in accounts and accounts[account_id].available_balance + delta > MAX_BALANCE
+        }
+
+        errors = []
+        for item in transfers:
+            item_errors = {}
+            for field in ("from_account", "to_account"):
+                if item[field] not in accounts:
+                    item_errors[field] = ["La cuenta {} no existe".format(item[field])]
+            if item["from_account"] in overdrawn:
+                item_errors.setdefault("amount", []).append(
+                    "El monto a transferir no puede ser mayor a lo que posee el remitente")
+            if item["to_account"] in exceeded:
+                item_errors.setdefault("amount", []).append(
+                    "El balance de la cuenta destino no puede superar {}".format(MAX_BALANCE))
+            errors.append(item_errors)
+
+        if any(errors):
+            raise serializers.ValidationError({"transfers": errors})
+        return net_balance
+
+    def net_balance(self, transfers):
+        """
+        Cambio neto de balance por cuenta para la lista de movimientos
+
+        Args:
+            transfers (list): movimientos validados
+        Returns:
+            dict: {id: Decimal} con el cambio neto de balance por cuenta
+        """
+        net_balance = defaultdict(Decimal)
+        for item in transfers:
+            net_balance[item["from_account"]] -= item["amount"]
+            net_balance[item["to_account"]] += item["amount"]
+        return net_balance
+
+    def create(self, validated_data):
+        """
+        Aplica todos los movimientos en una sola transaccion
+
+        Returns:
+            list: resultado por movimiento con los ids de las transaciones creadas
+        """
+        transfers = validated_data["transfers"]
+        transfer_serializer = TransferFromAccountToAccount()
+
+        with transaction.atomic():
+            from_ids = {item["from_account"] for item in transfers}
+            accounts = AccountModel.objects.lock(*from_ids, credit_only={item["to_account"] for item in transfers})
+            transfer_serializer.pending = pending = transfer_serializer.pending_accounts(accounts, from_ids)
+            net_balance = self.validate_accounts(transfers, accounts)
+
+            changed_accounts = []
+            for account_id, delta in net_balance.items():
+                if delta and account_id not in pending:
+                    accounts[account_id].balance += delta
+                    changed_accounts.append(accounts[account_id])
+                elif delta and accounts[account_id].balance_mode == AccountModel.SHARDED:
+                    BalanceShardModel.objects.credit(account_id, delta)
+            AccountModel.objects.bulk_update(changed_accounts, ["balance"])
+            invalidate_accounts(*net_balance)
+
+            # Balance de cada cuenta despues de cada movimiento, en el orden recibido
+            running_balance = {account_id: accounts[account_id].balance - delta for account_id, delta in net_balance.items()}
+            instance_transations = []
+            for item in transfers:
+                running_balance[item["from_account"]] -= item["amount"]
+                running_balance[item["to_account"]] += item["amount"]
+                instance_from, instance_to = transfer_serializer.money_transfer_transactions(
+                    item, accounts[item["from_account"]], accounts[item["to_account"]])
+                instance_from.balance_after = running_balance[item["from_account"]]
+                if item["to_account"] not in pending:
+                    instance_to.balance_after = running_balance[item["to_account"]]
+                instance_transations.extend([instance_from, instance_to])
+            instance_transations = TransactionModel.objects.bulk_create(instance_transations)
+            JournalEntryModel.objects.record_transfers([
+                (accounts[item["from_account"]], accounts[item["to_account"]], item["amount"], instance.date)
+                for item, instance in zip(transfers, instance_transations[::2])
+            ], pending)
+            transfer_serializer.apply_monthly_summary(instance_transations)
+
+        return [
+            {
+                "index": index,
+                "from_transaction": instance_transations[index * 2].id,
+                "to_transaction": instance_transations[index * 2 + 1].id,
+            }
+            for index in range(len(transfers))
+        ]
+
+
+class BulkTransactionListSerializer(serializers.ListSerializer):
+    """
+    Serializador de lista para crear muchas transaciones de ingreso/egreso en una sola peticion.
+
+    Las cuentas se cargan (y bloquean) en una sola consulta, los balances se calculan en
+    memoria en el orden recibido y todo se guarda con bulk_create/bulk_update por lotes.
+    """
+    batch_size = 1000
+    max_items = 100000
+
+    def validate_balances(self, items, accounts):
+        """
+        Aplica los movimientos sobre un balance en memoria por cuenta y valida que ningun
+        retiro deje la cuenta en negativo ni ningun ingreso supere el balance maximo
+
+        Args:
+            items (list): transaciones validadas en el orden recibido
+            accounts (dict): {id: AccountModel} con las cuentas bloqueadas
+        Raises:
+            serializers.ValidationError: con los errores por transacion
+        Returns:
+            dict: {id: Decimal} con el balance final por cuenta
+            list: balance de la cuenta despues de cada transacion
+        """
+        running_balance = {account_id: account.balance for account_id, account in accounts.items()}
+
+        errors = []
+        balances_after = []
+        for item in items:
+            item_errors = {}
+            account_id = item["account"]
+            if account_id not in accounts:
+                item_errors["account"] = ["La cuenta {} no existe".format(account_id)]
+            elif item["income"] and running_balance[account_id] + item["amount"] > MAX_BALANCE:
+                item_errors["amount"] = ["El balance de la cuenta no puede superar {}".format(MAX_BALANCE)]
+            elif item["income"]:
+                running_balance[account_id] += item["amount"]
+            elif item["amount"] > running_balance[account_id]:
+                item_errors["amount"] = ["El balance a retirar no puede ser mayor al disponible"]
+            else:
+                running_balance[account_id] -= item["amount"]
+            errors.append(item_errors)
+            balances_after.append(running_balance.get(account_id))
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return running_balance, balances_after
+
+    def create(self, validated_data):
+        """
+        Guarda todas las transaciones en una sola transaccion
+
+        Returns:
+            list: transaciones creadas
+        """
+        with transaction.atomic():
+            accounts = AccountModel.objects.lock(*{item["account"] for item in validated_data})
+            running_balance, balances_after = self.validate_balances(validated_data, accounts)
+
+            changed_accounts = []
+            for account_id, balance in running_balance.items():
+                if balance != accounts[account_id].balance:
+                    accounts[account_id].balance = balance
+                    changed_accounts.append(accounts[account_id])
+            AccountModel.objects.bulk_update(changed_accounts, ["balance"], batch_size=self.batch_size)
+            invalidate_accounts(*[account.id for account in changed_accounts])
+
+            instance_transations = [
+                TransactionModel(
+                    amount=item["amount"],
+                    description="ingreso" if item["income"] else "egreso",
+                    date=item["date"],
+                    income=item["income"],
+                    account=accounts[item["account"]],
+                    balance_after=balance_after
+                )
+                for item, balance_after in zip(validated_data, balances_after)
+            ]
+            instance_transations = TransactionModel.objects.bulk_create(instance_transations, batch_size=self.batch_size)
+            MonthlySummaryModel.objects.apply(instance_transations)
+            DailyBalanceSnapshotModel.objects.apply(instance_transations)
+            return instance_transations
+
+
+class BulkTransactionSerializer(serializers.Serializer):
+    """
+    Serializador para una transacion dentro de una carga masiva
+    """
+    amount = serializers.DecimalField(max_digits=8, decimal_places=2, min_value=Decimal("0"))
+    date = serializers.DateField()
+    income = serializers.BooleanField()
+    account = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        list_serializer_class = BulkTransactionListSerializer
+
+
+class TransactionExportSerializer(serializers.Serializer):
+    """
+    Serializador para los parametros de exportacion de transaciones
+    """
+    export_format = serializers.ChoiceField(choices=("csv", "ndjson"), default="csv")
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, data):
+        """
+        Validaciones del rango de fechas
+
+        Raises:
+            serializers.ValidationError: La fecha inicial no puede ser mayor a la fecha final
+        """
+        if data.get("date_from") and data.get("date_to") and data["date_from"] > data["date_to"]:
+            raise serializers.ValidationError("La fecha inicial no puede ser mayor a la fecha final")
+        return data
+
+
+class BalanceAtSerializer(serializers.Serializer):
+    """
+    Serializador para el balance de una cuenta a una fecha
+    """
+    date = serializers.DateField()
+    account = serializers.IntegerField(read_only=True)
+    balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+
+class MonthlySummarySerializer(serializers.ModelSerializer):
+    """
+    Serializador para los acumulados mensuales de una cuenta
+    """
+    net = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        model = MonthlySummaryModel
+        fields = ("year", "month", "income", "outgoing", "count", "net")
+
+
+class YearlySummarySerializer(serializers.Serializer):
+    """
+    Serializador para los acumulados anuales de una cuenta
+    """
+    year = serializers.IntegerField()
+    income = serializers.DecimalField(max_digits=12, decimal_places=2, source="total_income")
+    outgoing = serializers.DecimalField(max_digits=12, decimal_places=2, source="total_outgoing")
+    count = serializers.IntegerField(source="total_count")
+    net = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class AccountSummarySerializer(serializers.ModelSerializer):
+    """
+    Serializador para el resumen de ingresos y egresos de una cuenta por mes y por año
+    """
+    balance = AccountBalanceField(max_digits=8, decimal_places=2, read_only=True)
+    months = serializers.SerializerMethodField()
+    years = serializers.SerializerMethodField()
+
+    def get_summary(self, instance):
+        """
+        Acumulados de la cuenta, filtrados por año si la vista lo envia en el contexto
+        """
+        queryset = instance.monthly_summary.all()
+        if self.context.get("year") is not None:
+            queryset = queryset.filter(year=self.context["year"])
+        return queryset
+
+    @swagger_serializer_method(serializer_or_field=MonthlySummarySerializer(many=True))
+    def get_months(self, instance):
+        queryset = self.get_summary(instance).annotate(
+            net=F("income") - F("outgoing")).order_by("year", "month")
+        return MonthlySummarySerializer(queryset, many=True).data
+
+    @swagger_serializer_method(serializer_or_field=YearlySummarySerializer(many=True))
+    def get_years(self, instance):
+        queryset = self.get_summary(instance).values("year").annotate(
+            total_income=Sum("income"), total_outgoing=Sum("outgoing"), total_count=Sum("count")
+        ).annotate(net=F("total_income") - F("total_outgoing")).order_by("year")
+        return YearlySummarySerializer(queryset, many=True).data
+
+    class Meta:
+        model = AccountModel
+        fields = ("name", "balance", "months", "years")
 
 
 class AccountTransactionSerializer(serializers.ModelSerializer):
     """
     Serializador para consultar las transacciones de la cuenta
     """
-    account_transaction = TransactionSerializer(many=True, read_only=True)
+    balance = AccountBalanceField(max_digits=8, decimal_places=2, read_only=True)
+    account_transaction = serializers.SerializerMethodField()
+
+    @swagger_serializer_method(serializer_or_field=TransactionSerializer(many=True))
+    def get_account_transaction(self, instance):
+        """
+        Transaciones de la pagina actual, si la vista no envia una pagina se serializa todo el historico
+
+        Args:
+            instance (AccountModel): cuenta a consultar
+        """
+        page = self.context.get("account_transaction")
+        if isinstance(page, SerializedRows):
+            return page
+        if page is None:
+            page = instance.account_transaction.order_by("date", "id")
+        return TransactionSerializer(page, many=True, context=self.context).data
 
     class Meta:
         model = AccountModel
         fields = ("name", "balance", "account_transaction", )
+
+
+class ImportJobPayloadSerializer(serializers.Serializer):
+    """
+    Parametros del trabajo de carga de transaciones, cada transacion se valida en el worker
+    """
+    items = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=BulkTransactionListSerializer.max_items)
+
+
+class ExportJobPayloadSerializer(TransactionExportSerializer):
+    """
+    Parametros del trabajo de exportacion de transaciones
+    """
+    account = serializers.IntegerField(min_value=1)
+
+    def validate_account(self, value):
+        """
+        Raises:
+            serializers.ValidationError: La cuenta no existe
+        """
+        if not AccountModel.objects.filter(id=value).exists():
+            raise serializers.ValidationError("La cuenta {} no existe".format(value))
+        return value
+
+
+class ReconcileJobPayloadSerializer(serializers.Serializer):
+    """
+    Parametros del trabajo de conciliacion de balances
+    """
+    full = serializers.BooleanField(default=False)
+    batch_size = serializers.IntegerField(min_value=1, default=1000)
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Serializador para registrar y consultar trabajos, los parametros se validan segun el tipo
+    """
+    payload_serializers = {
+        JobModel.IMPORT_TRANSACTIONS: ImportJobPayloadSerializer,
+        JobModel.EXPORT_TRANSACTIONS: ExportJobPayloadSerializer,
+        JobModel.RECONCILE_BALANCES: ReconcileJobPayloadSerializer,
+    }
+
+    def validate(self, data):
+        """
+        Valida los parametros con el serializador del tipo de trabajo
+
+        Raises:
+            serializers.ValidationError: con los errores de los parametros
+        """
+        payload = self.payload_serializers[data["kind"]](data=data.get("payload"))
+        if not payload.is_valid():
+            raise serializers.ValidationError({"payload": payload.errors})
+        data["payload"] = payload.validated_data
+        if data["kind"] == JobModel.IMPORT_TRANSACTIONS:
+            data["total"] = len(data["payload"]["items"])
+        return data
+
+    class Meta:
+        model = JobModel
+        fields = (
+            "id", "kind", "status", "payload", "progress", "total", "result", "error",
+            "created_at", "started_at", "finished_at",
+        )
+        read_only_fields = (
+            "status", "progress", "total", "result", "error", "created_at", "started_at", "finished_at",
+        )
+        extra_kwargs = {"payload": {"write_only": True}}
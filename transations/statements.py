@@ -0,0 +1,173 @@
+import calendar
+import csv
+import io
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from django.db.models import OuterRef, Subquery, Sum
+
+from transations.balances import balances_and_resets_at
+from transations.models import AccountModel, TransactionModel, MANUAL_ADJUSTMENT_DESCRIPTION, SIGNED_AMOUNT
+
+
+STATEMENT_FIELDS = ('date', 'description', 'amount', 'balance')
+SUMMARY_FIELDS = ('account', 'opening', 'income', 'outgoing', 'count', 'closing')
+CENTS = Decimal('0.01')
+
+# lines son tuplas (date, description, monto con signo, balance)
+Statement = namedtuple('Statement', ['account_id', 'opening', 'income', 'outgoing', 'count', 'closing', 'lines'])
+
+
+def month_range(year, month):
+    """
+    Primer y ultimo dia del mes
+    """
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def account_statement(account_id, opening, rows, last_reset=None, before_month=None):
+    """
+    Extracto de una cuenta a partir de sus transaciones del mes en orden (date, id).
+
+    Un ajuste manual reemplaza el balance como en AccountModel.balance: descarta las
+    transaciones escritas antes que el (id menor) y no cuenta como ingreso ni egreso. Una
+    transacion escrita antes del ultimo ajuste aplicado aparece en el extracto sin cambiar
+    el balance, un ajuste escrito antes que el ultimo aplicado no cambia el balance.
+
+    Args:
+        account_id (int): id de la cuenta
+        opening (Decimal): balance al final del mes anterior
+        rows (list): tuplas (account_id, date, id, description, income, amount)
+        last_reset (int, optional): id del ultimo ajuste manual antes del mes. por defecto None.
+        before_month (dict, optional): {id ajuste del mes: suma de las transaciones anteriores
+            al mes escritas despues del ajuste}. por defecto None.
+    Returns:
+        Statement: extracto de la cuenta
+    """
+    opening = balance = Decimal(opening).quantize(CENTS)
+    income = outgoing = Decimal(0).quantize(CENTS)
+    count = 0
+    lines = []
+    applied = []
+    for _, day, row_id, description, is_income, amount in rows:
+        if description == MANUAL_ADJUSTMENT_DESCRIPTION:
+            delta = amount
+            if last_reset is None or row_id > last_reset:
+                last_reset = row_id
+                # Transaciones con fecha anterior escritas despues del ajuste
+                balance = amount + (before_month or {}).get(row_id, 0) + sum(
+                    applied_delta for applied_id, applied_delta in applied if applied_id > row_id)
+        else:
+            delta = amount if is_income else -amount
+            count += 1
+            if is_income:
+                income += amount
+            else:
+                outgoing += amount
+            if last_reset is None or row_id > last_reset:
+                balance += delta
+                applied.append((row_id, delta))
+        lines.append((day, description, delta, balance))
+    return Statement(account_id, opening, income, outgoing, count, balance, lines)
+
+
+def iter_statements(year, month, batch_size=500, chunk_size=5000):
+    """
+    Extractos del mes de todas las cuentas en orden de id.
+
+    Las transaciones del mes se leen en una sola consulta ordenada por (account, date, id)
+    con un cursor del lado del servidor y se cruzan con las cuentas, el balance inicial y el
+    ultimo ajuste manual se calculan por lotes de cuentas con balances_and_resets_at.
+
+    Args:
+        year (int): año
+        month (int): mes
+        batch_size (int, optional): cuentas por lote. por defecto 500.
+        chunk_size (int, optional): filas por lectura del cursor. por defecto 5000.
+    Yields:
+        Statement: extracto de cada cuenta
+    """
+    first, last = month_range(year, month)
+    rows = TransactionModel.objects.filter(date__gte=first, date__lte=last).order_by(
+        'account_id', 'date', 'id').values_list('account_id', 'date', 'id', 'description', 'income', 'amount')
+    groups = groupby(rows.iterator(chunk_size=chunk_size), key=itemgetter(0))
+    current = next(groups, None)
+
+    account_ids = AccountModel.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=batch_size)
+    batch = []
+    for account_id in account_ids:
+        batch.append(account_id)
+        if len(batch) < batch_size:
+            continue
+        current = yield from _batch_statements(batch, first, last, groups, current)
+        batch = []
+    if batch:
+        yield from _batch_statements(batch, first, last, groups, current)
+
+
+def _before_month(account_ids, first, last):
+    """
+    Por cada ajuste manual del mes, suma de las transaciones con fecha anterior al mes
+    escritas despues del ajuste
+
+    Returns:
+        dict: {id ajuste: suma}
+    """
+    after_reset = TransactionModel.objects.filter(
+        account=OuterRef('account'), date__lt=first, id__gt=OuterRef('id')
+    ).values('account').annotate(total=Sum(SIGNED_AMOUNT)).values('total')
+    return dict(
+        TransactionModel.objects.filter(
+            account_id__in=account_ids, date__gte=first, date__lte=last, description=MANUAL_ADJUSTMENT_DESCRIPTION
+        ).annotate(total=Subquery(after_reset)).exclude(total=None).values_list('id', 'total')
+    )
+
+
+def _batch_statements(batch, first, last, groups, current):
+    """
+    Extractos de un lote de cuentas, avanza el grupo de transaciones actual
+
+    Returns:
+        tuple: grupo (account_id, filas) siguiente al lote
+    """
+    openings, last_resets = balances_and_resets_at(batch, first - timedelta(days=1))
+    before_month = _before_month(batch, first, last)
+    for account_id in batch:
+        # Transaciones de cuentas eliminadas durante la lectura
+        while current is not None and current[0] < account_id:
+            current = next(groups, None)
+
+        account_rows = []
+        if current is not None and current[0] == account_id:
+            account_rows = list(current[1])
+            current = next(groups, None)
+        yield account_statement(
+            account_id, openings.get(account_id, 0), account_rows, last_resets.get(account_id), before_month)
+    return current
+
+
+def statement_csv(statement):
+    """
+    Contenido CSV del extracto de una cuenta
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(STATEMENT_FIELDS)
+    writer.writerows(
+        (day.isoformat(), description, delta.quantize(CENTS), balance.quantize(CENTS))
+        for day, description, delta, balance in statement.lines
+    )
+    return output.getvalue()
+
+
+def summary_row(statement):
+    """
+    Fila del resumen del mes con los totales de una cuenta
+    """
+    return (
+        statement.account_id, statement.opening, statement.income.quantize(CENTS),
+        statement.outgoing.quantize(CENTS), statement.count, statement.closing.quantize(CENTS)
+    )
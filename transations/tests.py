@@ -1,16 +1,48 @@
+import asyncio
+import json
+import os
 import random
+import tempfile
+import zipfile
 from random import randrange
 
-from django.test import TestCase
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.crypto import get_random_string
 
-from datetime import timedelta
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
 
-from transations.models import AccountModel, TransactionModel
+from transations.models import (
+    AccountModel, TransactionModel, BalanceCheckpointModel, MonthlySummaryModel, IdempotencyKeyModel, JobModel,
+    JournalEntryModel, PostingModel, DailyBalanceSnapshotModel, MAX_BALANCE
+)
+from transations.admin import BoundedCountPaginator
+from transations.metrics import HISTOGRAMS, REQUEST_DURATION, MetricsMiddleware
+from transations.query_shapes import QueryShapeMiddleware, QueryShapeTestMixin, fingerprint
+from transations.balances import balances_at
+from transations.statements import iter_statements, statement_csv, summary_row
+from transations.reconciliation import reconcile_balances
+from transations.jobs import JobLeaseLost, claim_jobs, import_transactions, run_job
+from transations.benchmark import Endpoint, run_benchmark, seed
 
-from rest_framework import status
+from transations.serializers import TransactionSerializer, TransferFromAccountToAccount, TRANSACTION_ROWS
+from transations.renderers import RowsJSONRenderer
+
+from rest_framework import serializers, status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 
 
@@ -143,10 +175,426 @@ class TransactionModelTest(TestCase):
         self.assertEqual(instance_transation[0].id, None)
 
 
+class BalanceLockTest(TestCase):
+    """
+    Test para las mutaciones de balance bajo bloqueo
+    """
+
+    def test_withdrawal_revalidates_locked_balance(self):
+        """
+        test para validar que un retiro se rechace si el balance cambio despues de la validacion
+        """
+        account = AccountModel.objects.create(name=get_random_string(length=32), balance=150)
+        serializer = TransactionSerializer(data={
+            'amount': 100,
+            'date': random_date().strftime("%Y-%m-%d"),
+            'income': False,
+            'account': account.id
+        })
+        self.assertTrue(serializer.is_valid())
+
+        AccountModel.objects.filter(id=account.id).update(balance=50)
+        with self.assertRaises(serializers.ValidationError):
+            serializer.save()
+        self.assertEqual(AccountModel.objects.get(id=account.id).balance, 50)
+        self.assertFalse(TransactionModel.objects.filter(account=account).exists())
+
+    def test_transfer_revalidates_locked_balance(self):
+        """
+        test para validar que una transferencia se rechace si el remitente ya no tiene saldo
+        """
+        from_account, to_account = create_random_list_account(2)
+        serializer = TransferFromAccountToAccount(data={
+            'from_account': from_account.id,
+            'to_account': to_account.id,
+            'amount': 1
+        })
+        self.assertTrue(serializer.is_valid())
+
+        AccountModel.objects.filter(id=from_account.id).update(balance=0)
+        with self.assertRaises(serializers.ValidationError):
+            serializer.save()
+        self.assertEqual(AccountModel.objects.get(id=to_account.id).balance, to_account.balance)
+        self.assertFalse(TransactionModel.objects.exists())
+
+    def test_delete_restores_balance(self):
+        """
+        test para validar que eliminar un egreso devuelva el monto a la cuenta
+        """
+        account = AccountModel.objects.create(name=get_random_string(length=32), balance=100)
+        instance = TransactionModel.objects.create(
+            amount=30, description="egreso", date=random_date(), income=False, account=account)
+        instance.delete()
+        self.assertEqual(AccountModel.objects.get(id=account.id).balance, 130)
+
+
+class BalanceAfterTest(APITestCase):
+    """
+    Test para el balance registrado despues de cada transacion
+    """
+
+    def test_balance_after_is_recorded(self):
+        """
+        test para validar el balance registrado en la creacion, depositos y transferencias
+        """
+        url = reverse('account-list')
+        account_one = self.client.post(url, {'name': get_random_string(length=32), 'balance': 100}, format='json').data
+        account_two = self.client.post(url, {'name': get_random_string(length=32), 'balance': 10}, format='json').data
+
+        self.client.post(reverse('transaction-list'), {
+            'amount': 20, 'date': '2022-01-01', 'income': True, 'account': account_one["id"]
+        }, format='json')
+        self.client.post(url + "transaction_amount/", {
+            'from_account': account_one["id"], 'to_account': account_two["id"], 'amount': 50
+        }, format='json')
+
+        self.assertEqual(
+            list(TransactionModel.objects.filter(account_id=account_one["id"]).order_by("id").values_list("balance_after", flat=True)),
+            [100, 120, 70]
+        )
+        self.assertEqual(
+            list(TransactionModel.objects.filter(account_id=account_two["id"]).order_by("id").values_list("balance_after", flat=True)),
+            [10, 60]
+        )
+
+    def test_delete_manual_adjustment(self):
+        """
+        test para validar que eliminar un ajuste manual revierta solo el efecto del ajuste
+        """
+        url = reverse('account-list')
+        account = self.client.post(url, {'name': get_random_string(length=32), 'balance': 100}, format='json').data
+        self.client.put(url + "{}/".format(account["id"]), {'name': account["name"], 'balance': 300}, format='json')
+        self.client.post(reverse('transaction-list'), {
+            'amount': 20, 'date': '2022-01-01', 'income': False, 'account': account["id"]
+        }, format='json')
+        self.assertEqual(AccountModel.objects.get(id=account["id"]).balance, 280)
+
+        adjustment = TransactionModel.objects.get(account_id=account["id"], description="ajuste manual")
+        response = self.client.delete(reverse('transaction-list') + "{}/".format(adjustment.id))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(AccountModel.objects.get(id=account["id"]).balance, 80)
+
+
+class ReconciliationTest(APITestCase):
+    """
+    Test para la conciliacion de balances
+    """
+
+    def create_account(self, balance):
+        return self.client.post(reverse('account-list'), {
+            'name': get_random_string(length=32), 'balance': balance}, format='json').data["id"]
+
+    def deposit(self, account_id, amount, income=True):
+        return self.client.post(reverse('transaction-list'), {
+            'amount': amount, 'date': '2022-01-01', 'income': income, 'account': account_id}, format='json').data
+
+    def test_reconcile_incremental(self):
+        """
+        test para conciliar las cuentas y luego solo las transaciones nuevas
+        """
+        account_one = self.create_account(100)
+        account_two = self.create_account(50)
+        self.deposit(account_one, 30, income=False)
+        self.client.put(reverse('account-list') + "{}/".format(account_two), {
+            'name': get_random_string(length=32), 'balance': 500}, format='json')
+        self.deposit(account_two, 25)
+
+        result = reconcile_balances()
+        self.assertEqual(result.drifts, [])
+        self.assertEqual(result.checkpoints, 2)
+        self.assertEqual(
+            dict(BalanceCheckpointModel.objects.values_list("account_id", "balance")),
+            {account_one: 70, account_two: 525}
+        )
+
+        # solo la cuenta con movimientos nuevos recibe un punto de control
+        self.deposit(account_one, 5)
+        result = reconcile_balances()
+        self.assertEqual(result.drifts, [])
+        self.assertEqual(result.checkpoints, 1)
+        self.assertEqual(BalanceCheckpointModel.objects.filter(account_id=account_one).latest("id").balance, 75)
+
+        # eliminar una transacion invalida los puntos de control de la cuenta
+        transation = TransactionModel.objects.filter(account_id=account_two, description="ingreso").get()
+        transation.delete()
+        self.assertFalse(BalanceCheckpointModel.objects.filter(account_id=account_two).exists())
+        result = reconcile_balances()
+        self.assertEqual(result.drifts, [])
+        self.assertEqual(BalanceCheckpointModel.objects.filter(account_id=account_two).latest("id").balance, 500)
+
+    def test_reconcile_uses_each_account_checkpoint(self):
+        """
+        test para validar que cada cuenta sume desde su propio punto de control despues de una
+        conciliacion interrumpida
+        """
+        account_one = self.create_account(100)
+        account_two = self.create_account(50)
+        reconcile_balances()
+
+        self.deposit(account_one, 10)
+        self.deposit(account_two, 5)
+        # conciliacion interrumpida despues de procesar solo la segunda cuenta
+        last_id = TransactionModel.objects.latest("id").id
+        BalanceCheckpointModel.objects.create(account_id=account_two, up_to_transaction_id=last_id, balance=55)
+
+        result = reconcile_balances()
+        self.assertEqual(result.drifts, [])
+        self.assertEqual(BalanceCheckpointModel.objects.filter(account_id=account_one).latest("id").balance, 110)
+
+    def test_reconcile_transaction_committed_after_checkpoint(self):
+        """
+        test para validar que una transacion confirmada despues del punto de control no se pierda
+        """
+        account_id = self.create_account(100)
+        deposit = self.deposit(account_id, 10)
+        # el punto de control se creo antes de confirmar la transacion aunque su id es menor
+        BalanceCheckpointModel.objects.create(account_id=account_id, up_to_transaction_id=deposit["id"], balance=100)
+
+        result = reconcile_balances()
+        self.assertEqual(result.drifts, [])
+        self.assertEqual(BalanceCheckpointModel.objects.filter(account_id=account_id).latest("id").balance, 110)
+
+    def test_reconcile_command_reports_drift(self):
+        """
+        test para reportar diferencias entre el balance y las transaciones
+        """
+        account_id = self.create_account(100)
+        call_command("reconcile_balances", stdout=StringIO())
+        AccountModel.objects.filter(id=account_id).update(balance=90)
+
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("reconcile_balances", "--fail-on-drift", stdout=out)
+        self.assertIn("Cuenta {}: balance 90.00 esperado 100.00".format(account_id), out.getvalue())
+
+
+class MonthlySummaryTest(APITestCase):
+    """
+    Test para los acumulados mensuales de las cuentas
+    """
+
+    def test_summary(self):
+        """
+        test para validar los acumulados al crear y eliminar transaciones
+        """
+        url = reverse('account-list')
+        account = self.client.post(url, {'name': get_random_string(length=32), 'balance': 100}, format='json').data
+        other = self.client.post(url, {'name': get_random_string(length=32), 'balance': 100}, format='json').data
+        for amount, date, income in [(10, '2021-03-05', True), (4, '2021-03-20', False), (7, '2022-01-01', False)]:
+            response = self.client.post(reverse('transaction-list'), {
+                'amount': amount, 'date': date, 'income': income, 'account': account["id"]}, format='json')
+        self.client.post(url + "transaction_amount/", {
+            'from_account': other["id"], 'to_account': account["id"], 'amount': 5}, format='json')
+
+        # eliminar el egreso de 2022 descuenta el acumulado
+        self.client.delete(reverse('transaction-list') + "{}/".format(response.data["id"]))
+
+        response = self.client.get(url + "{}/summary/".format(account["id"]), {"year": 2021})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], account["name"])
+        self.assertEqual(
+            [(i["year"], i["month"], i["income"], i["outgoing"], i["count"], i["net"]) for i in response.data["months"]],
+            [(2021, 3, "10.00", "4.00", 2, "6.00")]
+        )
+        self.assertEqual(len(response.data["years"]), 1)
+
+        response = self.client.get(url + "{}/summary/".format(account["id"]))
+        this_year = datetime.now().year
+        self.assertEqual(
+            {i["year"]: (i["income"], i["count"]) for i in response.data["years"]},
+            {2021: ("10.00", 2), 2022: ("0.00", 0), this_year: ("105.00", 2)}
+        )
+
+    def test_summary_ignores_manual_adjustment(self):
+        """
+        test para validar que los ajustes manuales no se acumulen como ingresos
+        """
+        url = reverse('account-list')
+        account = self.client.post(url, {'name': get_random_string(length=32), 'balance': 100}, format='json').data
+        self.client.put(url + "{}/".format(account["id"]), {'name': account["name"], 'balance': 300}, format='json')
+        summary = MonthlySummaryModel.objects.get(account_id=account["id"])
+        self.assertEqual((summary.income, summary.count), (100, 1))
+
+
+class QueryBudgetTest(APITestCase):
+    """
+    Test para detectar regresiones en el numero de queries de cada endpoint
+    """
+    def setUp(self):
+        cache.clear()
+
+    def test_endpoints_within_query_budget(self):
+        """
+        test para validar que ningun endpoint supere su presupuesto de queries
+        """
+        context = seed(accounts=20, transactions=200)
+        for result in run_benchmark(self.client, context, iterations=1):
+            with self.subTest(endpoint=result.name):
+                self.assertLess(result.status, 400)
+                self.assertLessEqual(result.queries, result.budget)
+                self.assertIsNotNone(result.p95)
+
+    def test_setup_is_not_measured(self):
+        """
+        test para validar que las queries de la preparacion no cuenten para el endpoint
+        """
+        context = seed(accounts=2, transactions=10)
+        endpoint = Endpoint('account-retrieve', 'get', lambda context: reverse('account-detail', args=[
+            context['created']]), budget=1, setup=lambda context: context.update(
+                created=AccountModel.objects.create(name=get_random_string(length=32), balance=10).id))
+        result, = run_benchmark(self.client, context, iterations=2, endpoints=[endpoint])
+        self.assertEqual((result.status, result.queries), (status.HTTP_200_OK, 1))
+
+    def test_cold_cache_is_not_a_cache_hit(self):
+        """
+        test para validar que un endpoint con cold_cache lea la base de datos aunque el cache este caliente
+        """
+        context = seed(accounts=2, transactions=10)
+        self.client.get(reverse('account-list'))
+        warm, = run_benchmark(self.client, context, iterations=1, endpoints=[
+            Endpoint('account-list', 'get', lambda context: reverse('account-list'), budget=1)])
+        cold, = run_benchmark(self.client, context, iterations=1, endpoints=[
+            Endpoint('account-list', 'get', lambda context: reverse('account-list'), budget=1, cold_cache=True)])
+        self.assertEqual((warm.queries, cold.queries), (0, 1))
+
+
+class AccountCacheTest(APITestCase):
+    """
+    Test para el cache de cuentas y su invalidacion
+    """
+    def setUp(self):
+        cache.clear()
+
+    def test_retrieve_is_cached(self):
+        """
+        test para validar que la segunda lectura de una cuenta no consulte la base de datos
+        """
+        account = create_random_list_account(1)[0]
+        url = reverse('account-detail', args=[account.id])
+        response = self.client.get(url, format='json')
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, format='json')
+        self.assertEqual(cached.data, response.data)
+
+    def test_transfer_invalidates_balances(self):
+        """
+        test para validar que una transferencia invalide el detalle y el listado de las cuentas
+        """
+        from_account, to_account = create_random_list_account(2)
+        detail_url = reverse('account-detail', args=[from_account.id])
+        self.client.get(detail_url, format='json')
+        self.client.get(reverse('account-list'), format='json')
+
+        url = reverse('account-list') + "transaction_amount/"
+        data = {'from_account': from_account.id, 'to_account': to_account.id, 'amount': 1}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, data, format='json')
+
+        expected = "{:.2f}".format(from_account.balance - 1)
+        self.assertEqual(self.client.get(detail_url, format='json').data["balance"], expected)
+        listed = {item["id"]: item["balance"] for item in self.client.get(reverse('account-list'), format='json').data}
+        self.assertEqual(listed[from_account.id], expected)
+
+    def test_delete_transaction_invalidates_balance(self):
+        """
+        test para validar que eliminar una transacion invalide el balance de la cuenta
+        """
+        account = create_random_list_account(1)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('transaction-list'), {
+                'amount': 10, 'date': '2022-01-01', 'income': True, 'account': account.id}, format='json')
+        detail_url = reverse('account-detail', args=[account.id])
+        self.assertEqual(self.client.get(detail_url, format='json').data["balance"], "{:.2f}".format(account.balance + 10))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('transaction-detail', args=[response.data["id"]]))
+        self.assertEqual(self.client.get(detail_url, format='json').data["balance"], "{:.2f}".format(account.balance))
+
+
+class AsyncViewsTest(APITestCase):
+    """
+    Test para las vistas asincronas de lectura, deben responder igual que las vistas de DRF
+    """
+    def setUp(self):
+        cache.clear()
+
+    def test_account_list_and_detail(self):
+        """
+        test para comparar el listado y detalle de cuentas
+        """
+        account = create_random_list_account(5)[0]
+        response = self.client.get(reverse('async-account-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), json.loads(self.client.get(reverse('account-list'), format='json').content))
+
+        response = self.client.get(reverse('async-account-detail', args=[account.id]))
+        self.assertEqual(response.json(), {"id": account.id, "name": account.name, "balance": "{:.2f}".format(account.balance)})
+
+        response = self.client.get(reverse('async-account-detail', args=[account.id + 100]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_history_and_transaction_list(self):
+        """
+        test para comparar el historico paginado y el listado filtrado de transaciones
+        """
+        account = create_random_list_account(1)[0]
+        create_random_list_transation([account], 30)
+
+        url = reverse('account-list') + "{}/transaction_history/".format(account.id)
+        expected = json.loads(self.client.get(url, {'page_size': 10}, format='json').content)
+        response = self.client.get(reverse('async-account-history', args=[account.id]), {'page_size': 10})
+        self.assertEqual(response.json()["account_transaction"], expected["account_transaction"])
+        self.assertIsNotNone(response.json()["next"])
+
+        params = {'account': account.id, 'date__year': 2021, 'page_size': 100}
+        expected = json.loads(self.client.get(reverse('transaction-list'), params, format='json').content)
+        response = self.client.get(reverse('async-transaction-list'), params)
+        self.assertEqual(response.json()["results"], expected["results"])
+
+        response = self.client.get(reverse('async-transaction-list'), {'date__month': 13})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('async-transaction-list'), {'cursor': 'invalido'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FastSerializationTest(APITestCase):
+    """
+    Test para la serializacion rapida de transaciones
+    """
+
+    def test_output_matches_transaction_serializer(self):
+        """
+        test para validar que la salida sea identica byte a byte a la de TransactionSerializer
+        """
+        account = create_random_list_account(1)[0]
+        create_random_list_transation([account], 1200)
+        TransactionModel.objects.create(
+            amount="0.10", description="ñandú \u2028 \"citado\"", date="2022-01-01", income=False, account=account)
+        queryset = TransactionModel.objects.order_by("date", "id")
+
+        rows = TRANSACTION_ROWS.many(list(queryset.values_list(*TRANSACTION_ROWS.columns)))
+        expected = JSONRenderer().render({"next": None, "results": TransactionSerializer(queryset, many=True).data})
+        self.assertEqual(RowsJSONRenderer().render({"next": None, "results": rows}), expected)
+        self.assertEqual(RowsJSONRenderer().render(TRANSACTION_ROWS.many([])), b"[]")
+
+    def test_browsable_api(self):
+        """
+        test para validar que la API navegable siga funcionando con las filas rapidas
+        """
+        account = create_random_list_account(1)[0]
+        create_random_list_transation([account], 3)
+        response = self.client.get(reverse('transaction-list'), {'format': 'api'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, '&quot;results&quot;')
+
+
 class AccountViewSetTest(APITestCase):
     """
     Test para la vista de cuentas
     """
+    def setUp(self):
+        cache.clear()
+
     def test_list_account(self):
         """
         test para obtener la lista de cuentas cuando hay datos
@@ -233,6 +681,88 @@ class AccountViewSetTest(APITestCase):
         self.assertEqual(response_transaction_history.data["account_transaction"][0]["description"], 'balance inicial')
         self.assertEqual(float(response_transaction_history.data["account_transaction"][0]["amount"]), float(data["balance"]))
 
+    def test_transaction_history_pagination(self):
+        """
+        test para recorrer el historico de una cuenta con el cursor de paginacion
+        """
+        list_account = create_random_list_account(1)
+        list_transation = create_random_list_transation(list_account, 25)
+        url = reverse('account-list') + "{}/transaction_history/".format(list_account[0].id)
+
+        response = self.client.get(url, {"page_size": 10}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], list_account[0].name)
+        self.assertIsNone(response.data["previous"])
+
+        ids = []
+        pages = 0
+        while True:
+            pages += 1
+            ids.extend(i["id"] for i in response.data["account_transaction"])
+            if response.data["next"] is None:
+                break
+            response = self.client.get(response.data["next"], format='json')
+
+        expected = TransactionModel.objects.filter(account=list_account[0]).order_by("date", "id")
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(ids), len(list_transation))
+        self.assertEqual(ids, [i.id for i in expected])
+
+        # la pagina anterior a la ultima es la segunda pagina
+        response_previous = self.client.get(response.data["previous"], format='json')
+        self.assertEqual([i["id"] for i in response_previous.data["account_transaction"]], ids[10:20])
+
+    def test_transaction_history_invalid_cursor(self):
+        """
+        test para validar que un cursor malformado retorne 404
+        """
+        list_account = create_random_list_account(1)
+        url = reverse('account-list') + "{}/transaction_history/".format(list_account[0].id)
+        response = self.client.get(url, {"cursor": "invalido"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_csv(self):
+        """
+        test para exportar las transaciones de una cuenta en CSV filtradas por fecha
+        """
+        list_account = create_random_list_account(2)
+        create_random_list_transation(list_account, 50)
+        account = list_account[0]
+        url = reverse('account-list') + "{}/export/".format(account.id)
+
+        response = self.client.get(url, {"date_from": "2021-01-01", "date_to": "2021-12-31"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,date,amount,income,description,account_id")
+
+        expected = TransactionModel.objects.filter(
+            account=account, date__gte="2021-01-01", date__lte="2021-12-31").order_by("date", "id")
+        self.assertEqual([int(line.split(",")[0]) for line in lines[1:]], [i.id for i in expected])
+
+    def test_export_ndjson(self):
+        """
+        test para exportar las transaciones de una cuenta en NDJSON
+        """
+        list_account = create_random_list_account(1)
+        create_random_list_transation(list_account, 10)
+        url = reverse('account-list') + "{}/export/".format(list_account[0].id)
+
+        response = self.client.get(url, {"export_format": "ndjson"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(set(rows[0]), {"id", "date", "amount", "income", "description", "account"})
+
+    def test_export_invalid_range(self):
+        """
+        test para validar el rango de fechas de la exportacion
+        """
+        list_account = create_random_list_account(1)
+        url = reverse('account-list') + "{}/export/".format(list_account[0].id)
+        response = self.client.get(url, {"date_from": "2022-01-02", "date_to": "2022-01-01"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_transaction_amount(self):
         """
         test para transferir dinero de una cuenta a otra
@@ -275,120 +805,810 @@ class AccountViewSetTest(APITestCase):
         self.assertEqual(len(account_two_response_transaction_history.data["account_transaction"]), 2)
 
 
-class TransationViewSetTest(APITestCase):
+class BulkTransferTest(APITestCase):
     """
-    test para probar las transaciones
+    Test para las transferencias masivas entre cuentas
     """
 
-    def test_list_transation(self):
+    def setUp(self):
+        self.url = reverse('account-list') + "transaction_amount_bulk/"
+
+    def test_bulk_transfer_nets_balances(self):
         """
-        test para obtener la lista de transaciones creadas para las cuentas
+        test para validar que los saldos se validen contra el neto de todos los movimientos
         """
-        list_account = create_random_list_account()
-        create_random_list_transation(list_account)
+        account_one = AccountModel.objects.create(name=get_random_string(length=32), balance=50)
+        account_two = AccountModel.objects.create(name=get_random_string(length=32), balance=0)
+        data = {"transfers": [
+            {"from_account": account_one.id, "to_account": account_two.id, "amount": 100},
+            {"from_account": account_two.id, "to_account": account_one.id, "amount": 60},
+        ]}
 
-        url = reverse('transaction-list')
-        response = self.client.get(url, {}, format='json')        
+        # bloqueo de cuentas, bulk_update, bulk_create, asientos y movimientos, acumulados mensuales y savepoints
+        with self.assertNumQueries(10):
+            response = self.client.post(self.url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 100)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(AccountModel.objects.get(id=account_one.id).balance, 10)
+        self.assertEqual(AccountModel.objects.get(id=account_two.id).balance, 40)
+        self.assertEqual(TransactionModel.objects.count(), 4)
 
-    def test_list_transation_filter_account(self):
+        transation = TransactionModel.objects.get(id=response.data["results"][0]["from_transaction"])
+        self.assertEqual(transation.account_id, account_one.id)
+        self.assertFalse(transation.income)
+
+    def test_bulk_transfer_overdraft(self):
         """
-        test para obtener la lista de transaciones filtradas por una cuenta
+        test para validar que si un remitente queda sin saldo no se aplique ningun movimiento
         """
-        list_account = create_random_list_account()
-        list_transation = create_random_list_transation(list_account)
+        account_one = AccountModel.objects.create(name=get_random_string(length=32), balance=50)
+        account_two = AccountModel.objects.create(name=get_random_string(length=32), balance=100)
+        data = {"transfers": [
+            {"from_account": account_two.id, "to_account": account_one.id, "amount": 10},
+            {"from_account": account_one.id, "to_account": account_two.id, "amount": 70},
+        ]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["transfers"][0], {})
+        self.assertIn("amount", response.data["transfers"][1])
+        self.assertEqual(AccountModel.objects.get(id=account_one.id).balance, 50)
+        self.assertFalse(TransactionModel.objects.exists())
 
-        url = reverse('transaction-list')
-        account = random.choice(list_transation).account.id
-        response = self.client.get(url, {"account": account}, format='json')
-        self.assertEqual(response.status_code, status.HTTP_200_OK)        
-        self.assertEqual(set([i["account"] for i in response.data]), {account})
-    
-    def test_list_transation_filter_year(self):
+    def test_bulk_transfer_unknown_account(self):
         """
-        test para obtener la lista de transaciones filtradas por un año
+        test para validar el error por movimiento cuando una cuenta no existe
         """
-        list_account = create_random_list_account()
-        list_transation = create_random_list_transation(list_account)
+        account_one = AccountModel.objects.create(name=get_random_string(length=32), balance=50)
+        data = {"transfers": [
+            {"from_account": account_one.id, "to_account": account_one.id + 100, "amount": 10},
+        ]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("to_account", response.data["transfers"][0])
 
-        url = reverse('transaction-list')
-        year = random.choice(list_transation).date.year
-        response = self.client.get(url, {"date__year": year}, format='json')        
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(set([datetime.strptime(i["date"], "%Y-%m-%d").year for i in response.data]), {year})
 
-    def test_list_transation_filter_month(self):
+class BulkTransactionTest(APITestCase):
+    """
+    Test para la carga masiva de transaciones
+    """
+
+    def setUp(self):
+        self.url = reverse('transaction-list') + "bulk/"
+
+    def test_bulk_create_json(self):
         """
-        test para obtener la lista de transaciones filtradas por un mes
+        test para crear transaciones masivas enviando un arreglo JSON
         """
-        list_account = create_random_list_account()
-        list_transation = create_random_list_transation(list_account)
+        account = AccountModel.objects.create(name=get_random_string(length=32), balance=10)
+        data = [
+            {"amount": 50, "date": "2022-01-01", "income": True, "account": account.id},
+            {"amount": 60, "date": "2022-01-02", "income": False, "account": account.id},
+        ]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(AccountModel.objects.get(id=account.id).balance, 0)
+        self.assertEqual(
+            list(TransactionModel.objects.order_by("id").values_list("description", flat=True)),
+            ["ingreso", "egreso"]
+        )
 
-        url = reverse('transaction-list')
-        month = random.choice(list_transation).date.month
-        response = self.client.get(url, {"date__month": month}, format='json')        
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(set([datetime.strptime(i["date"], "%Y-%m-%d").month for i in response.data]), {month})
+    def test_bulk_create_ndjson(self):
+        """
+        test para crear transaciones masivas enviando NDJSON
+        """
+        account_one, account_two = create_random_list_account(2)
+        body = "\n".join([
+            '{"amount": 5, "date": "2022-01-01", "income": true, "account": %s}' % account_one.id,
+            '',
+            '{"amount": 1, "date": "2022-01-01", "income": false, "account": %s}' % account_two.id,
+        ])
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(AccountModel.objects.get(id=account_one.id).balance, account_one.balance + 5)
+        self.assertEqual(AccountModel.objects.get(id=account_two.id).balance, account_two.balance - 1)
 
-    def test_create_deposit_transaction(self):
+    def test_bulk_create_overdraft(self):
         """
-        test para crear una transacion de deposito
+        test para validar que un retiro sin saldo en el balance acumulado rechace toda la carga
         """
-        list_account = create_random_list_account()
+        account = AccountModel.objects.create(name=get_random_string(length=32), balance=10)
+        data = [
+            {"amount": 10, "date": "2022-01-01", "income": False, "account": account.id},
+            {"amount": 1, "date": "2022-01-02", "income": False, "account": account.id},
+            {"amount": 1, "date": "2022-01-02", "income": True, "account": account.id + 100},
+        ]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("amount", response.data[1])
+        self.assertIn("account", response.data[2])
+        self.assertEqual(AccountModel.objects.get(id=account.id).balance, 10)
+        self.assertFalse(TransactionModel.objects.exists())
 
-        account = random.choice(list_account)
-        
-        data = {
-            'amount': 200,
-            'description': get_random_string(length=100),
-            'date': random_date().strftime("%Y-%m-%d"),
-            'income': True,
-            'account': account.id
-        }
 
-        url = reverse('transaction-list')
-        response = self.client.post(url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(account.balance+200, float(AccountModel.objects.get(id=account.id).balance))
+class TransferQueryTest(APITestCase):
+    """
+    Test para el numero de queries de la transferencia entre cuentas
+    """
 
+    def setUp(self):
+        self.url = reverse('account-list') + "transaction_amount/"
 
-    def test_create_withdrawal_transaction_without_balance(self):
+    def test_transfer_query_count(self):
         """
-        test para crear una transacion de retiro sin saldo
+        test para validar que la transferencia resuelva ambas cuentas con una sola consulta
         """
-        list_account = create_random_list_account()
+        from_account, to_account = create_random_list_account(2)
+        data = {'from_account': from_account.id, 'to_account': to_account.id, 'amount': 1}
 
-        data = {
-            'amount': 2000,
-            'description': get_random_string(length=100),
-            'date': random_date().strftime("%Y-%m-%d"),
-            'income': False,
-            'account': random.choice(list_account).id
-        }
+        # savepoint, bloqueo de ambas cuentas, bulk_update, bulk_create, asiento, movimientos,
+        # 3 de acumulados mensuales y release
+        with self.assertNumQueries(10):
+            response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccountModel.objects.get(id=from_account.id).balance, from_account.balance - 1)
+        self.assertEqual(AccountModel.objects.get(id=to_account.id).balance, to_account.balance + 1)
 
-        url = reverse('transaction-list')
-        response = self.client.post(url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertEqual(response.data["non_field_errors"][0].title(), 'El Balance A Retirar No Puede Ser Mayor Al Disponible')
-    
-    def test_create_withdrawal_transaction(self):
+    def test_transfer_unknown_account(self):
         """
-         test para crear una transacion de retiro con saldo
+        test para validar el error cuando la cuenta destino no existe
         """
-        list_account = create_random_list_account()
-        
-        account = random.choice(list_account)
-        
-        data = {
-            'amount': 1,
-            'description': get_random_string(length=100),
-            'date': random_date().strftime("%Y-%m-%d"),
-            'income': False,
-            'account': account.id
-        }
+        from_account = create_random_list_account(1)[0]
+        data = {'from_account': from_account.id, 'to_account': from_account.id + 100, 'amount': 1}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("to_account", response.data)
+        self.assertEqual(AccountModel.objects.get(id=from_account.id).balance, from_account.balance)
 
-        url = reverse('transaction-list')
+    def test_transfer_negative_amount(self):
+        """
+        test para validar que no se permitan montos negativos
+        """
+        from_account, to_account = create_random_list_account(2)
+        data = {'from_account': from_account.id, 'to_account': to_account.id, 'amount': -5}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("amount", response.data)
+
+
+class LedgerTest(APITestCase):
+    """
+    Test para las cuentas en modo ledger, los abonos de transferencias quedan en el libro mayor
+    """
+    url = reverse('account-list') + "transaction_amount/"
+
+    def setUp(self):
+        cache.clear()
+        # Creadas por la API para que tengan la transacion de balance inicial
+        sender = self.client.post(reverse('account-list'), {'name': 'remitente', 'balance': 100}, format='json')
+        merchant = self.client.post(reverse('account-list'), {'name': 'comercio', 'balance': 10}, format='json')
+        AccountModel.objects.filter(id=merchant.data["id"]).update(balance_mode=AccountModel.LEDGER)
+        self.sender = AccountModel.objects.get(id=sender.data["id"])
+        self.merchant = AccountModel.objects.get(id=merchant.data["id"])
+
+    def test_withdrawal_counts_pending_credits(self):
+        """
+        test para validar que un retiro use el balance con los abonos pendientes del libro mayor
+        """
+        response = self.client.post(
+            self.url, {'from_account': self.sender.id, 'to_account': self.merchant.id, 'amount': 50}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(reverse('transaction-list'), {
+            'amount': 55, 'date': '2022-01-01', 'income': False, 'account': self.merchant.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(AccountModel.objects.get(id=self.merchant.id).balance, 5)
+        response = self.client.post(reverse('transaction-list'), {
+            'amount': 6, 'date': '2022-01-01', 'income': False, 'account': self.merchant.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_pending_credit_over_max_balance(self):
+        """
+        test para validar que el balance con abonos pendientes mayor a la columna se pueda
+        consultar, no se sume al balance y no reciba mas abonos
+        """
+        response = self.client.post(
+            self.url, {'from_account': self.sender.id, 'to_account': self.merchant.id, 'amount': 10}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        AccountModel.objects.filter(id=self.merchant.id).update(balance=MAX_BALANCE)
+        cache.clear()
+
+        response = self.client.get(reverse('account-detail', args=[self.merchant.id]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["balance"], "1000009.99")
+        response = self.client.get(reverse('account-list'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(
+            self.url, {'from_account': self.sender.id, 'to_account': self.merchant.id, 'amount': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            merchant = AccountModel.objects.lock(self.merchant.id)[self.merchant.id]
+        self.assertEqual(merchant.balance, MAX_BALANCE)
+        self.assertTrue(PostingModel.objects.filter(account=self.merchant, folded=False).exists())
+
+    def test_credit_is_pending(self):
+        """
+        test para validar que el abono no actualice la fila de la cuenta destino
+        """
+        response = self.client.post(
+            self.url, {'from_account': self.sender.id, 'to_account': self.merchant.id, 'amount': 5}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(AccountModel.objects.get(id=self.merchant.id).balance, 10)
+        self.assertEqual(AccountModel.objects.get(id=self.sender.id).balance, 95)
+        entry = JournalEntryModel.objects.get()
+        self.assertEqual(
+            sorted(entry.postings.values_list("account_id", "amount", "folded")),
+            [(self.sender.id, -5, True), (self.merchant.id, 5, False)]
+        )
+        response = self.client.get(reverse('account-detail', args=[self.merchant.id]), format='json')
+        self.assertEqual(response.data["balance"], "15.00")
+        # solo el balance inicial, el abono se acumula al sumarlo al balance
+        self.assertEqual(MonthlySummaryModel.objects.get(account=self.merchant).count, 1)
+
+    def test_debit_folds_pending_credits(self):
+        """
+        test para validar que un retiro de una cuenta ledger use el balance con los abonos pendientes
+        """
+        self.client.post(self.url, {'from_account': self.sender.id, 'to_account': self.merchant.id, 'amount': 50}, format='json')
+        response = self.client.post(
+            self.url, {'from_account': self.merchant.id, 'to_account': self.sender.id, 'amount': 55}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(AccountModel.objects.get(id=self.merchant.id).balance, 5)
+        self.assertFalse(PostingModel.objects.filter(folded=False).exists())
+        summary = MonthlySummaryModel.objects.get(account=self.merchant)
+        self.assertEqual((summary.income, summary.outgoing, summary.count), (60, 55, 3))
+
+    def test_bulk_transfers_and_compaction(self):
+        """
+        test para transferencias masivas hacia una cuenta ledger y su compactacion
+        """
+        data = {"transfers": [{"from_account": self.sender.id, "to_account": self.merchant.id, "amount": 1}] * 20}
+        response = self.client.post(reverse('account-list') + "transaction_amount_bulk/", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccountModel.objects.get(id=self.merchant.id).balance, 10)
+        self.assertEqual(JournalEntryModel.objects.count(), 20)
+        self.assertEqual(reconcile_balances().drifts, [])
+
+        call_command("compact_ledger", stdout=StringIO())
+        self.assertEqual(AccountModel.objects.get(id=self.merchant.id).balance, 30)
+        self.assertFalse(PostingModel.objects.filter(folded=False).exists())
+        self.assertEqual(reconcile_balances().drifts, [])
+
+    def test_delete_adjustment_after_pending_credit(self):
+        """
+        test para validar que eliminar un ajuste manual conserve los abonos sin balance_after
+        """
+        self.client.post(self.url, {'from_account': self.sender.id, 'to_account': self.merchant.id, 'amount': 20}, format='json')
+        self.client.put(
+            reverse('account-detail', args=[self.merchant.id]), {'name': 'comercio', 'balance': 1000}, format='json')
+        adjustment = TransactionModel.objects.get(account=self.merchant, description="ajuste manual")
+
+        response = self.client.delete(reverse('transaction-detail', args=[adjustment.id]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(AccountModel.objects.get(id=self.merchant.id).balance, 30)
+        self.assertEqual(reconcile_balances().drifts, [])
+
+    def test_update_response_after_fold(self):
+        """
+        test para validar que la actualizacion responda el balance guardado y no el pendiente anterior
+        """
+        self.client.post(self.url, {'from_account': self.sender.id, 'to_account': self.merchant.id, 'amount': 30}, format='json')
+        response = self.client.put(
+            reverse('account-detail', args=[self.merchant.id]), {'name': 'comercio', 'balance': 500}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["balance"], "500.00")
+
+        merchant = AccountModel.objects.get(id=self.merchant.id)
+        self.assertEqual((merchant.balance, merchant.balance_mode), (500, AccountModel.LEDGER))
+        response = self.client.get(reverse('account-detail', args=[self.merchant.id]), format='json')
+        self.assertEqual(response.data["balance"], "500.00")
+
+    def test_set_balance_mode(self):
+        """
+        test para volver a modo row sumando los abonos pendientes
+        """
+        self.client.post(self.url, {'from_account': self.sender.id, 'to_account': self.merchant.id, 'amount': 5}, format='json')
+        call_command("set_balance_mode", self.merchant.id, "row", stdout=StringIO())
+
+        merchant = AccountModel.objects.get(id=self.merchant.id)
+        self.assertEqual((merchant.balance_mode, merchant.balance), (AccountModel.ROW, 15))
+        with self.assertRaises(CommandError):
+            call_command("set_balance_mode", 999, "ledger", stdout=StringIO())
+
+
+class ShardedBalanceTest(APITestCase):
+    """
+    Test para las cuentas en modo sharded, los abonos de transferencias se suman en contadores
+    """
+    url = reverse('account-list') + "transaction_amount/"
+
+    def setUp(self):
+        cache.clear()
+        sender = self.client.post(reverse('account-list'), {'name': 'remitente', 'balance': 100}, format='json')
+        merchant = self.client.post(reverse('account-list'), {'name': 'comercio', 'balance': 10}, format='json')
+        call_command("set_balance_mode", merchant.data["id"], "sharded", stdout=StringIO())
+        self.sender = AccountModel.objects.get(id=sender.data["id"])
+        self.merchant = AccountModel.objects.get(id=merchant.data["id"])
+
+    def shard_total(self):
+        return sum(self.merchant.balance_shards.values_list("delta", flat=True))
+
+    def test_withdrawal_counts_pending_credits(self):
+        """
+        test para validar que un retiro use el balance con los abonos de los contadores
+        """
+        response = self.client.post(
+            self.url, {'from_account': self.sender.id, 'to_account': self.merchant.id, 'amount': 50}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(reverse('transaction-list'), {
+            'amount': 55, 'date': '2022-01-01', 'income': False, 'account': self.merchant.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(AccountModel.objects.get(id=self.merchant.id).balance, 5)
+        response = self.client.post(reverse('transaction-list'), {
+            'amount': 6, 'date': '2022-01-01', 'income': False, 'account': self.merchant.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_shard_over_max_balance_stays_pending(self):
+        """
+        test para validar que los contadores que superan el balance maximo no se sumen
+        """
+        response = self.client.post(
+            self.url, {'from_account': self.sender.id, 'to_account': self.merchant.id, 'amount': 10}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        AccountModel.objects.filter(id=self.merchant.id).update(balance=MAX_BALANCE)
+
+        with transaction.atomic():
+            merchant = AccountModel.objects.lock(self.merchant.id)[self.merchant.id]
+        self.assertEqual(merchant.balance, MAX_BALANCE)
+        self.assertEqual(self.shard_total(), 10)
+        self.assertTrue(PostingModel.objects.filter(account=self.merchant, folded=False).exists())
+
+    def test_credit_goes_to_shard(self):
+        """
+        test para validar que el abono se sume en un contador y no en la fila de la cuenta
+        """
+        self.assertEqual(self.merchant.balance_shards.count(), settings.BALANCE_SHARD_COUNT)
+        for _ in range(3):
+            response = self.client.post(
+                self.url, {'from_account': self.sender.id, 'to_account': self.merchant.id, 'amount': 5}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(AccountModel.objects.get(id=self.merchant.id).balance, 10)
+        self.assertEqual(self.shard_total(), 15)
+        self.assertEqual(PostingModel.objects.filter(account=self.merchant, in_shard=True).count(), 3)
+        response = self.client.get(reverse('account-detail', args=[self.merchant.id]), format='json')
+        self.assertEqual(response.data["balance"], "25.00")
+        self.assertEqual(reconcile_balances().drifts, [])
+
+    def test_debit_folds_shards(self):
+        """
+        test para validar que un retiro de una cuenta sharded sume los contadores sin duplicar abonos
+        """
+        self.client.post(self.url, {'from_account': self.sender.id, 'to_account': self.merchant.id, 'amount': 50}, format='json')
+        response = self.client.post(
+            self.url, {'from_account': self.merchant.id, 'to_account': self.sender.id, 'amount': 55}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(AccountModel.objects.get(id=self.merchant.id).balance, 5)
+        self.assertEqual(self.shard_total(), 0)
+        self.assertFalse(PostingModel.objects.filter(folded=False).exists())
+        summary = MonthlySummaryModel.objects.get(account=self.merchant)
+        self.assertEqual((summary.income, summary.outgoing, summary.count), (60, 55, 3))
+        self.assertEqual(reconcile_balances().drifts, [])
+
+    def test_bulk_transfers_and_compaction(self):
+        """
+        test para transferencias masivas hacia una cuenta sharded y su compactacion
+        """
+        data = {"transfers": [{"from_account": self.sender.id, "to_account": self.merchant.id, "amount": 1}] * 20}
+        response = self.client.post(reverse('account-list') + "transaction_amount_bulk/", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccountModel.objects.get(id=self.merchant.id).balance, 10)
+        self.assertEqual(self.shard_total(), 20)
+
+        call_command("compact_ledger", stdout=StringIO())
+        self.assertEqual(AccountModel.objects.get(id=self.merchant.id).balance, 30)
+        self.assertEqual(self.shard_total(), 0)
+        self.assertFalse(PostingModel.objects.filter(folded=False).exists())
+        self.assertEqual(reconcile_balances().drifts, [])
+
+
+class IdempotencyTest(APITestCase):
+    """
+    Test para las llaves de idempotencia
+    """
+
+    def test_transfer_retry_is_applied_once(self):
+        """
+        test para validar que un reintento con la misma llave retorne la respuesta original
+        """
+        from_account, to_account = create_random_list_account(2)
+        url = reverse('account-list') + "transaction_amount/"
+        data = {'from_account': from_account.id, 'to_account': to_account.id, 'amount': 1}
+
+        response = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='transfer-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # el reintento solo lee la llave guardada, sin tocar las cuentas
+        with self.assertNumQueries(3):
+            retry = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='transfer-1')
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.data, response.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(AccountModel.objects.get(id=from_account.id).balance, from_account.balance - 1)
+        self.assertEqual(TransactionModel.objects.count(), 2)
+
+        data["amount"] = 2
+        response = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='transfer-1')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_failed_request_releases_key(self):
+        """
+        test para validar que una peticion con error no guarde la llave
+        """
+        account = create_random_list_account(1)[0]
+        url = reverse('transaction-list')
+        data = {'amount': 2000, 'date': '2022-01-01', 'income': False, 'account': account.id}
+
+        response = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='deposit-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKeyModel.objects.exists())
+
+        data["income"] = True
+        response = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='deposit-1')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        retry = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='deposit-1')
+        self.assertEqual(retry.data, response.data)
+        self.assertEqual(TransactionModel.objects.count(), 1)
+
+    def test_purge_command(self):
+        """
+        test para eliminar las llaves vencidas
+        """
+        IdempotencyKeyModel.objects.create(key="old", fingerprint="x")
+        IdempotencyKeyModel.objects.create(key="new", fingerprint="x")
+        IdempotencyKeyModel.objects.filter(key="old").update(created_at=timezone.now() - timedelta(hours=25))
+        call_command("purge_idempotency_keys", stdout=StringIO())
+        self.assertEqual(list(IdempotencyKeyModel.objects.values_list("key", flat=True)), ["new"])
+
+
+class JobTest(APITestCase):
+    """
+    Test para los trabajos ejecutados por el comando run_jobs
+    """
+    url = reverse('job-list')
+
+    def setUp(self):
+        output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+        settings_override = override_settings(JOB_OUTPUT_DIR=output_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def run_jobs(self):
+        call_command("run_jobs", workers=0, once=True, stdout=StringIO())
+
+    def test_import_job(self):
+        """
+        test para registrar una carga, ejecutarla con el worker y consultar su estado
+        """
+        account, other = create_random_list_account(2)
+        items = [
+            {'amount': 10, 'date': '2022-01-01', 'income': True, 'account': account.id},
+            {'amount': 5, 'date': '2022-01-02', 'income': False, 'account': account.id},
+            {'amount': 1, 'date': '2022-01-03', 'income': True, 'account': other.id},
+        ]
+        response = self.client.post(self.url, {'kind': 'import_transactions', 'payload': {'items': items}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual((response.data["status"], response.data["total"]), ("pending", 3))
+        self.assertNotIn("payload", response.data)
+
+        self.run_jobs()
+        response = self.client.get(reverse('job-detail', args=[response.data["id"]]), format='json')
+        self.assertEqual(response.data["status"], "done")
+        self.assertEqual(response.data["progress"], 3)
+        self.assertEqual(response.data["result"], {"created": 3})
+        self.assertEqual(AccountModel.objects.get(id=account.id).balance, account.balance + 5)
+
+    def test_import_job_errors(self):
+        """
+        test para validar que una carga invalida termine con los errores por transacion
+        """
+        account = create_random_list_account(1)[0]
+        items = [
+            {'amount': 1, 'date': '2022-01-01', 'income': True, 'account': account.id},
+            {'amount': 1000, 'date': '2022-01-02', 'income': False, 'account': account.id},
+        ]
+        response = self.client.post(self.url, {'kind': 'import_transactions', 'payload': {'items': items}}, format='json')
+        self.run_jobs()
+
+        job = JobModel.objects.get(id=response.data["id"])
+        self.assertEqual(job.status, JobModel.FAILED)
+        self.assertEqual(list(job.result["errors"]), ["1"])
+        self.assertFalse(TransactionModel.objects.exists())
+
+    def test_export_job(self):
+        """
+        test para exportar con un trabajo y descargar el archivo generado
+        """
+        account = create_random_list_account(1)[0]
+        create_random_list_transation([account], 20)
+        response = self.client.post(
+            self.url, {'kind': 'export_transactions', 'payload': {'account': account.id}}, format='json')
+        self.run_jobs()
+
+        job = JobModel.objects.get(id=response.data["id"])
+        self.assertEqual((job.status, job.progress), (JobModel.DONE, 20))
+        response = self.client.get(reverse('job-download', args=[job.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,date,amount,income,description,account_id")
+        self.assertEqual(len(lines), 21)
+
+    def test_reconcile_job(self):
+        """
+        test para conciliar balances con un trabajo
+        """
+        create_random_list_account(3)
+        response = self.client.post(self.url, {'kind': 'reconcile_balances', 'payload': {}}, format='json')
+        self.run_jobs()
+
+        job = JobModel.objects.get(id=response.data["id"])
+        self.assertEqual(job.status, JobModel.DONE)
+        self.assertEqual((job.progress, job.result["accounts"]), (3, 3))
+        response = self.client.get(reverse('job-download', args=[job.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_payload(self):
+        """
+        test para validar los parametros segun el tipo de trabajo
+        """
+        response = self.client.post(
+            self.url, {'kind': 'export_transactions', 'payload': {'account': 999}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("account", response.data["payload"])
+        response = self.client.post(self.url, {'kind': 'import_transactions', 'payload': {'items': []}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_job_is_claimed_once(self):
+        """
+        test para validar que un trabajo no se reclame dos veces
+        """
+        job = JobModel.objects.create(kind=JobModel.RECONCILE_BALANCES, payload={})
+        self.assertEqual(claim_jobs("worker-1", 5), [job.id])
+        self.assertEqual(claim_jobs("worker-2", 5), [])
+
+    def test_abandoned_job_resumes(self):
+        """
+        test para validar que un trabajo de un worker caido se reclame de nuevo y continue
+        desde su progreso
+        """
+        account = create_random_list_account(1)[0]
+        items = [{'amount': 1, 'date': '2022-01-01', 'income': True, 'account': account.id} for _ in range(3)]
+        job = JobModel.objects.create(kind=JobModel.IMPORT_TRANSACTIONS, payload={'items': items}, total=3)
+        self.assertEqual(claim_jobs("worker-1", 5), [job.id])
+
+        # worker-1 confirma el primer lote y se detiene sin terminar
+        TransactionModel.objects.create(account=account, amount=1, date='2022-01-01', income=True)
+        JobModel.objects.filter(id=job.id).update(progress=1)
+        self.assertEqual(claim_jobs("worker-2", 5), [])
+
+        stale = timezone.now() - timedelta(seconds=settings.JOB_LEASE_SECONDS + 1)
+        JobModel.objects.filter(id=job.id).update(heartbeat_at=stale)
+        self.assertEqual(claim_jobs("worker-2", 5), [job.id])
+        self.assertEqual(claim_jobs("worker-3", 5), [])
+
+        job = run_job(job.id)
+        self.assertEqual((job.status, job.worker, job.progress), (JobModel.DONE, "worker-2", 3))
+        self.assertEqual(TransactionModel.objects.filter(account=account).count(), 3)
+
+    def test_reclaimed_job_stops_old_worker(self):
+        """
+        test para validar que el worker que perdio el trabajo no confirme mas lotes
+        """
+        account = create_random_list_account(1)[0]
+        items = [{'amount': 1, 'date': '2022-01-01', 'income': True, 'account': account.id} for _ in range(3)]
+        job = JobModel.objects.create(kind=JobModel.IMPORT_TRANSACTIONS, payload={'items': items}, total=3)
+        self.assertEqual(claim_jobs("worker-1", 5), [job.id])
+
+        # worker-1 confirma el primer lote y se queda detenido
+        slow_job = JobModel.objects.get(id=job.id)
+        slow_job.payload = {'items': items[:1]}
+        import_transactions(slow_job, chunk_size=1)
+        slow_job.payload = {'items': items}
+
+        stale = timezone.now() - timedelta(seconds=settings.JOB_LEASE_SECONDS + 1)
+        JobModel.objects.filter(id=job.id).update(heartbeat_at=stale)
+        self.assertEqual(claim_jobs("worker-2", 5), [job.id])
+        job = run_job(job.id)
+        self.assertEqual((job.status, job.progress), (JobModel.DONE, 3))
+
+        # worker-1 continua, su lote se revierte en lugar de duplicar las transaciones
+        with self.assertRaises(JobLeaseLost):
+            import_transactions(slow_job, chunk_size=1)
+        self.assertEqual(slow_job.progress, 1)
+        self.assertEqual(TransactionModel.objects.filter(account=account).count(), 3)
+        self.assertEqual(JobModel.objects.get(id=job.id).worker, "worker-2")
+
+
+class TransationViewSetTest(APITestCase):
+    """
+    test para probar las transaciones
+    """
+
+    def test_list_transation(self):
+        """
+        test para obtener la lista de transaciones creadas para las cuentas
+        """
+        list_account = create_random_list_account()
+        create_random_list_transation(list_account)
+
+        url = reverse('transaction-list')
+        response = self.client.get(url, {"page_size": 100}, format='json')        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 100)
+        self.assertIsNone(response.data["next"])
+
+    def test_list_transation_paginated(self):
+        """
+        test para validar el tamaño de pagina por defecto del listado de transaciones
+        """
+        list_account = create_random_list_account()
+        create_random_list_transation(list_account)
+
+        url = reverse('transaction-list')
+        response = self.client.get(url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 50)
+        response_next = self.client.get(response.data["next"], format='json')
+        self.assertEqual(len(response_next.data["results"]), 50)
+        self.assertIsNone(response_next.data["next"])
+        self.assertEqual(
+            {i["id"] for i in response.data["results"]} | {i["id"] for i in response_next.data["results"]},
+            set(TransactionModel.objects.values_list("id", flat=True))
+        )
+
+    def test_list_transation_filter_account(self):
+        """
+        test para obtener la lista de transaciones filtradas por una cuenta
+        """
+        list_account = create_random_list_account()
+        list_transation = create_random_list_transation(list_account)
+
+        url = reverse('transaction-list')
+        account = random.choice(list_transation).account.id
+        response = self.client.get(url, {"account": account, "page_size": 100}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)        
+        self.assertEqual(set([i["account"] for i in response.data["results"]]), {account})
+    
+    def test_list_transation_filter_year(self):
+        """
+        test para obtener la lista de transaciones filtradas por un año
+        """
+        list_account = create_random_list_account()
+        list_transation = create_random_list_transation(list_account)
+
+        url = reverse('transaction-list')
+        year = random.choice(list_transation).date.year
+        response = self.client.get(url, {"date__year": year, "page_size": 100}, format='json')        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set([datetime.strptime(i["date"], "%Y-%m-%d").year for i in response.data["results"]]), {year})
+
+    def test_list_transation_filter_month(self):
+        """
+        test para obtener la lista de transaciones filtradas por un mes
+        """
+        list_account = create_random_list_account()
+        list_transation = create_random_list_transation(list_account)
+
+        url = reverse('transaction-list')
+        month = random.choice(list_transation).date.month
+        response = self.client.get(url, {"date__month": month, "page_size": 100}, format='json')        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set([datetime.strptime(i["date"], "%Y-%m-%d").month for i in response.data["results"]]), {month})
+
+    def test_list_transation_filter_year_month(self):
+        """
+        test para obtener la lista de transaciones filtradas por año y mes
+        """
+        list_account = create_random_list_account()
+        list_transation = create_random_list_transation(list_account)
+
+        url = reverse('transaction-list')
+        transation_date = random.choice(list_transation).date
+        response = self.client.get(url, {"date__year": transation_date.year, "date__month": transation_date.month, "page_size": 100}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set([i["date"][:7] for i in response.data["results"]]),
+            {transation_date.strftime("%Y-%m")}
+        )
+        self.assertEqual(
+            len(response.data["results"]),
+            TransactionModel.objects.filter(date__year=transation_date.year, date__month=transation_date.month).count()
+        )
+
+    def test_list_transation_filter_invalid_month(self):
+        """
+        test para validar que un mes fuera de rango retorne error
+        """
+        url = reverse('transaction-list')
+        response = self.client.get(url, {"date__month": 13}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_transation_filter_decimal_year(self):
+        """
+        test para validar que un año o mes con decimales retorne error en lugar de truncarse
+        """
+        url = reverse('transaction-list')
+        for params in ({"date__year": "2022.7"}, {"date__month": "6.5"}):
+            with self.subTest(params=params):
+                response = self.client.get(url, params, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_deposit_transaction(self):
+        """
+        test para crear una transacion de deposito
+        """
+        list_account = create_random_list_account()
+
+        account = random.choice(list_account)
+        
+        data = {
+            'amount': 200,
+            'description': get_random_string(length=100),
+            'date': random_date().strftime("%Y-%m-%d"),
+            'income': True,
+            'account': account.id
+        }
+
+        url = reverse('transaction-list')
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(account.balance+200, float(AccountModel.objects.get(id=account.id).balance))
+
+
+    def test_create_withdrawal_transaction_without_balance(self):
+        """
+        test para crear una transacion de retiro sin saldo
+        """
+        list_account = create_random_list_account()
+
+        data = {
+            'amount': 2000,
+            'description': get_random_string(length=100),
+            'date': random_date().strftime("%Y-%m-%d"),
+            'income': False,
+            'account': random.choice(list_account).id
+        }
+
+        url = reverse('transaction-list')
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["non_field_errors"][0].title(), 'El Balance A Retirar No Puede Ser Mayor Al Disponible')
+    
+    def test_create_withdrawal_transaction(self):
+        """
+         test para crear una transacion de retiro con saldo
+        """
+        list_account = create_random_list_account()
+        
+        account = random.choice(list_account)
+        
+        data = {
+            'amount': 1,
+            'description': get_random_string(length=100),
+            'date': random_date().strftime("%Y-%m-%d"),
+            'income': False,
+            'account': account.id
+        }
+
+        url = reverse('transaction-list')
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(account.balance-1, float(AccountModel.objects.get(id=account.id).balance))
@@ -404,3 +1624,463 @@ class TransationViewSetTest(APITestCase):
         response = self.client.delete(url, {}, format='json')
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
+
+
+class DatabaseSettingsTest(TestCase):
+    """
+    Test para la configuracion de las conexiones a la base de datos
+    """
+
+    def test_sqlite_pragmas(self):
+        """
+        test para validar que las conexiones SQLite nuevas ejecuten SQLITE_PRAGMAS
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            # 1 = NORMAL, por defecto es 2 = FULL
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_persistent_connections(self):
+        """
+        test para validar que las conexiones se reutilicen entre peticiones
+        """
+        self.assertGreater(settings.DATABASES["default"]["CONN_MAX_AGE"], 0)
+        self.assertTrue(settings.DATABASES["default"]["CONN_HEALTH_CHECKS"])
+
+
+class AdminTest(TestCase):
+    """
+    Test para el administrador de cuentas y transaciones
+    """
+
+    def setUp(self):
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "admin")
+        self.client.force_login(user)
+
+    def create_transactions(self, count):
+        start = AccountModel.objects.count()
+        for index in range(start, start + count):
+            account = AccountModel.objects.create(name="cuenta-{}".format(index), balance=10)
+            TransactionModel.objects.create(account=account, amount=10, description="balance inicial", date="2022-10-01", income=True)
+
+    def test_transaction_changelist_queries(self):
+        """
+        test para validar que el listado de transaciones no consulte la cuenta por cada fila
+        """
+        url = reverse("admin:transations_transactionmodel_changelist")
+        self.create_transactions(2)
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.create_transactions(5)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(many), len(few))
+        self.assertContains(response, "cuenta-6")
+
+    def test_bounded_count(self):
+        """
+        test para validar que el paginador deje de contar en count_limit
+        """
+        self.create_transactions(3)
+        paginator = BoundedCountPaginator(TransactionModel.objects.order_by("id"), 1)
+        paginator.count_limit = 2
+        self.assertEqual(paginator.count, 2)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_date_hierarchy_and_search(self):
+        """
+        test para la jerarquia de fechas y la busqueda por nombre de cuenta
+        """
+        self.create_transactions(2)
+        url = reverse("admin:transations_transactionmodel_changelist")
+        response = self.client.get(url, {"date__year": 2022, "date__month": 10, "q": "cuenta-1"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.context["cl"].result_list), 1)
+
+
+class MetricsTest(APITestCase):
+    """
+    Test para la instrumentacion por peticion y el endpoint de metricas
+    """
+
+    def setUp(self):
+        cache.clear()
+        for histogram in HISTOGRAMS:
+            histogram.clear()
+        self.account = AccountModel.objects.create(name="cuenta", balance=10)
+
+    def test_server_timing(self):
+        """
+        test para validar el header Server-Timing con las queries de la peticion
+        """
+        response = self.client.get(reverse('account-detail', args=[self.account.id]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response["Server-Timing"]
+        self.assertIn('desc="1 queries"', timing)
+        for phase in ("db;", "view;", "render;", "total;"):
+            self.assertIn(phase, timing)
+
+    def test_metrics_endpoint(self):
+        """
+        test para validar los histogramas por vista en formato Prometheus
+        """
+        self.client.get(reverse('account-list'), format='json')
+        self.client.get(reverse('account-list'), format='json')
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = response.content.decode()
+        self.assertIn('payment_request_duration_seconds_count{view="account-list",method="GET",status="200"} 2', content)
+        # la segunda peticion se responde desde el cache
+        self.assertIn('payment_request_db_queries_bucket{view="account-list",method="GET",status="200",le="0"} 1', content)
+        self.assertIn('payment_request_db_queries_bucket{view="account-list",method="GET",status="200",le="1"} 2', content)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        """
+        test para validar que las peticiones fuera de la muestra no se instrumenten
+        """
+        response = self.client.get(reverse('account-list'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Server-Timing"))
+        self.assertEqual(REQUEST_DURATION.series, {})
+
+    def test_async_middleware(self):
+        """
+        test para validar que los middleware se mantengan asincronos con ASGI
+        """
+        async def get_response(request):
+            return HttpResponse()
+
+        self.assertTrue(asyncio.iscoroutinefunction(MetricsMiddleware(get_response)))
+        with override_settings(QUERY_SHAPE_THRESHOLD=5):
+            self.assertTrue(asyncio.iscoroutinefunction(QueryShapeMiddleware(get_response)))
+        self.assertFalse(asyncio.iscoroutinefunction(MetricsMiddleware(lambda request: HttpResponse())))
+
+    async def test_async_server_timing(self):
+        """
+        test para validar el header Server-Timing en una vista async con ASGI
+        """
+        response = await self.async_client.get(reverse('async-account-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_metrics_token(self):
+        """
+        test para validar que /metrics/ requiera el token cuando esta configurado
+        """
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class QueryShapeTest(QueryShapeTestMixin, APITestCase):
+    """
+    Test para detectar queries repetidas por fila (N+1) en los endpoints y el admin
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.accounts = create_random_list_account(10)
+        create_random_list_transation(self.accounts, 50)
+
+    def test_fingerprint(self):
+        """
+        test para validar que queries con distintos valores tengan la misma huella
+        """
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s) AND name = \'a\' LIMIT 21'),
+            fingerprint('SELECT *  FROM t WHERE id IN (%s, %s, %s) AND name = \'b\' LIMIT 1'),
+        )
+        self.assertEqual(
+            fingerprint('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)'),
+            fingerprint('INSERT INTO t (a, b) VALUES (%s, %s)'),
+        )
+
+    def test_detects_per_row_queries(self):
+        """
+        test para validar que el detector falle con la carga de la cuenta por cada transacion
+        """
+        with self.assertRaises(AssertionError):
+            with self.assertNoRepeatedQueries():
+                [transaction.account.name for transaction in TransactionModel.objects.all()]
+        with self.assertNoRepeatedQueries():
+            [transaction.account.name for transaction in TransactionModel.objects.select_related("account")]
+
+    def test_endpoints(self):
+        """
+        test para validar que los listados no consulten por fila
+        """
+        account = self.accounts[0]
+        urls = [
+            reverse('account-list'),
+            reverse('transaction-list') + "?page_size=50",
+            reverse('account-transaction_history', args=[account.id]),
+            reverse('account-summary', args=[account.id]),
+            reverse('async-transaction-list') + "?page_size=50",
+        ]
+        for url in urls:
+            with self.subTest(url=url), self.assertNoRepeatedQueries():
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_bulk_transfer(self):
+        """
+        test para validar que las transferencias masivas no bloqueen ni actualicen cuenta por cuenta
+        """
+        data = {"transfers": [
+            {"from_account": self.accounts[index].id, "to_account": self.accounts[index + 1].id, "amount": 1}
+            for index in range(9)
+        ]}
+        with self.assertNoRepeatedQueries():
+            response = self.client.post(reverse('account-list') + "transaction_amount_bulk/", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_admin_changelist(self):
+        """
+        test para validar que el admin de transaciones cargue las cuentas en la misma consulta
+        """
+        self.client.force_login(get_user_model().objects.create_superuser("admin", "admin@example.com", "admin"))
+        with self.assertNoRepeatedQueries():
+            response = self.client.get(reverse("admin:transations_transactionmodel_changelist"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(QUERY_SHAPE_THRESHOLD=5, SLOW_QUERY_MS=0)
+    def test_middleware_logs_slow_queries(self):
+        """
+        test para validar el warning del detector por peticion
+        """
+        with self.assertLogs("transations.query_shapes", "WARNING") as logs:
+            self.client.get(reverse('account-detail', args=[self.accounts[0].id]))
+        self.assertIn("Query lenta", logs.output[0])
+
+
+class BalanceAtTest(APITestCase):
+    """
+    Test para el balance de una cuenta a una fecha con las fotos diarias de balance
+    """
+
+    def setUp(self):
+        self.account = AccountModel.objects.create(name="cuenta", balance=420)
+        TransactionModel.objects.bulk_create([
+            TransactionModel(account=self.account, amount=100, description="balance inicial", date=date(2022, 1, 1), income=True),
+            TransactionModel(account=self.account, amount=30, description="egreso", date=date(2022, 1, 5), income=False),
+            TransactionModel(account=self.account, amount=500, description="ajuste manual", date=date(2022, 1, 10), income=True),
+            TransactionModel(account=self.account, amount=20, description="ingreso", date=date(2022, 1, 10), income=True),
+            TransactionModel(account=self.account, amount=100, description="egreso", date=date(2022, 1, 20), income=False),
+        ])
+        self.expected = {
+            date(2021, 12, 31): "0.00",
+            date(2022, 1, 1): "100.00",
+            date(2022, 1, 7): "70.00",
+            date(2022, 1, 10): "520.00",
+            date(2022, 1, 31): "420.00",
+        }
+
+    def balance_at(self, day, account_id=None):
+        url = reverse('account-balance_at', args=[account_id or self.account.id])
+        return self.client.get(url, {"date": day.isoformat()}, format='json')
+
+    def assertBalances(self):
+        for day, balance in self.expected.items():
+            with self.subTest(day=day):
+                response = self.balance_at(day)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data["balance"], balance)
+
+    def test_balance_without_snapshots(self):
+        """
+        test para validar el balance a una fecha con el ajuste manual reemplazando el balance
+        """
+        self.assertBalances()
+
+    def test_balance_with_snapshots(self):
+        """
+        test para validar que las fotos diarias den el mismo balance y acoten la consulta
+        """
+        call_command("snapshot_balances", date=date(2022, 1, 5), stdout=StringIO())
+        call_command("snapshot_balances", date=date(2022, 1, 10), stdout=StringIO())
+        self.assertEqual(
+            dict(DailyBalanceSnapshotModel.objects.values_list("date", "balance")),
+            {date(2022, 1, 5): 70, date(2022, 1, 10): 520}
+        )
+        self.assertBalances()
+
+        # foto de la cuenta y suma de las transaciones posteriores, sin ajustes manuales en el rango
+        with self.assertNumQueries(2):
+            self.balance_at(date(2022, 1, 7))
+        # ultimo ajuste manual y suma de las transaciones escritas despues de el
+        with self.assertNumQueries(2):
+            self.balance_at(date(2022, 1, 31))
+
+    def test_backdated_transaction_shifts_snapshots(self):
+        """
+        test para validar que una transacion con fecha anterior ajuste las fotos posteriores
+        sin eliminarlas
+        """
+        call_command("snapshot_balances", date=date(2022, 1, 5), stdout=StringIO())
+        call_command("snapshot_balances", date=date(2022, 1, 20), stdout=StringIO())
+        data = {"amount": 10, "date": "2022-01-07", "income": True, "account": self.account.id}
+        response = self.client.post(reverse('transaction-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(
+            dict(DailyBalanceSnapshotModel.objects.values_list("date", "balance")),
+            {date(2022, 1, 5): 70, date(2022, 1, 20): 430}
+        )
+        # escrita despues del ajuste manual del 10, se suma como en el balance de la cuenta
+        self.expected.update({date(2022, 1, 7): "80.00", date(2022, 1, 10): "530.00", date(2022, 1, 31): "430.00"})
+        self.assertBalances()
+
+    def test_bulk_backdated_shifts_snapshots(self):
+        """
+        test para validar que una carga con fechas anteriores ajuste las fotos en un solo UPDATE
+        """
+        call_command("snapshot_balances", date=date(2022, 1, 5), stdout=StringIO())
+        call_command("snapshot_balances", date=date(2022, 1, 20), stdout=StringIO())
+        items = [
+            {"amount": 10, "date": "2022-01-03", "income": True, "account": self.account.id},
+            {"amount": 4, "date": "2022-01-15", "income": False, "account": self.account.id},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('transaction-list') + 'bulk/', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len([query for query in queries if 'dailybalancesnapshot' in query['sql']]), 1)
+        self.assertEqual(
+            dict(DailyBalanceSnapshotModel.objects.values_list("date", "balance")),
+            {date(2022, 1, 5): 80, date(2022, 1, 20): 426}
+        )
+
+    def test_deleted_transaction_shifts_snapshots(self):
+        """
+        test para validar que eliminar una transacion ajuste solo las fotos que la incluian y
+        eliminar un ajuste manual recalcule las fotos siguientes
+        """
+        call_command("snapshot_balances", date=date(2022, 1, 5), stdout=StringIO())
+        call_command("snapshot_balances", date=date(2022, 1, 20), stdout=StringIO())
+        snapshots = DailyBalanceSnapshotModel.objects.order_by("date")
+
+        # escrita antes del ajuste manual del 10, las fotos desde el ajuste no la incluyen
+        TransactionModel.objects.get(description="egreso", date=date(2022, 1, 5)).delete()
+        self.assertEqual(list(snapshots.values_list("balance", flat=True)), [100, 420])
+
+        TransactionModel.objects.get(description="ajuste manual").delete()
+        self.assertEqual(list(snapshots.values_list("balance", flat=True)), [100, 20])
+        self.expected = {date(2022, 1, 7): "100.00", date(2022, 1, 10): "120.00", date(2022, 1, 31): "20.00"}
+        self.assertBalances()
+
+    def test_backdated_after_adjustment_matches_account_balance(self):
+        """
+        test para validar que una transacion con fecha anterior escrita despues de un ajuste
+        manual se sume igual que en el balance de la cuenta y en la conciliacion
+        """
+        response = self.client.put(
+            reverse('account-detail', args=[self.account.id]), {"name": "cuenta", "balance": 300}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = {"amount": 20, "date": "2022-01-07", "income": True, "account": self.account.id}
+        response = self.client.post(reverse('transaction-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 320)
+        self.assertEqual(reconcile_balances().drifts, [])
+        self.assertEqual(self.balance_at(date.today()).data["balance"], "320.00")
+
+    def test_invalid_requests(self):
+        """
+        test para validar la fecha requerida y la cuenta inexistente
+        """
+        response = self.client.get(reverse('account-balance_at', args=[self.account.id]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.balance_at(date(2022, 1, 1), account_id=999).status_code, status.HTTP_404_NOT_FOUND)
+        with self.assertRaises(CommandError):
+            call_command("snapshot_balances", date=date.today(), stdout=StringIO())
+
+
+class StatementTest(QueryShapeTestMixin, TestCase):
+    """
+    Test para la generacion de extractos mensuales
+    """
+
+    def setUp(self):
+        output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+        self.output = output_dir.name
+        self.account, self.other, self.idle = AccountModel.objects.bulk_create([
+            AccountModel(name="cuenta", balance=0), AccountModel(name="otra", balance=0), AccountModel(name="inactiva", balance=0),
+        ])
+        TransactionModel.objects.bulk_create([
+            TransactionModel(account=self.account, amount=100, description="balance inicial", date=date(2022, 1, 20), income=True),
+            TransactionModel(account=self.account, amount=30, description="egreso", date=date(2022, 2, 3), income=False),
+            TransactionModel(account=self.account, amount=12.5, description="ingreso", date=date(2022, 2, 10), income=True),
+            TransactionModel(account=self.other, amount=50, description="balance inicial", date=date(2022, 2, 1), income=True),
+            TransactionModel(account=self.other, amount=200, description="ajuste manual", date=date(2022, 2, 15), income=True),
+            TransactionModel(account=self.other, amount=20, description="egreso", date=date(2022, 2, 16), income=False),
+            TransactionModel(account=self.account, amount=5, description="ingreso", date=date(2022, 3, 1), income=True),
+        ])
+
+    def test_statements(self):
+        """
+        test para validar los balances inicial y final, los totales y el balance por linea
+        """
+        with self.assertNoRepeatedQueries(2):
+            statements = {statement.account_id: statement for statement in iter_statements(2022, 2)}
+
+        self.assertEqual(list(statements), [self.account.id, self.other.id, self.idle.id])
+        self.assertEqual(summary_row(statements[self.account.id]), (self.account.id, 100, Decimal("12.5"), 30, 2, Decimal("82.5")))
+        self.assertEqual(summary_row(statements[self.other.id]), (self.other.id, 0, 50, 20, 2, 180))
+        self.assertEqual(summary_row(statements[self.idle.id]), (self.idle.id, 0, 0, 0, 0, 0))
+        self.assertEqual(
+            statement_csv(statements[self.other.id]).splitlines(),
+            ["date,description,amount,balance", "2022-02-01,balance inicial,50.00,50.00",
+             "2022-02-15,ajuste manual,200.00,200.00", "2022-02-16,egreso,-20.00,180.00"]
+        )
+
+    def test_backdated_after_adjustment(self):
+        """
+        test para validar que las transaciones con fecha anterior escritas despues de un ajuste
+        manual se sumen como en el balance de la cuenta
+        """
+        account = AccountModel.objects.create(name="ajustada", balance=325)
+        # En orden de escritura: el ajuste del 15 y despues dos transaciones con fecha anterior
+        TransactionModel.objects.bulk_create([
+            TransactionModel(account=account, amount=100, description="balance inicial", date=date(2022, 1, 20), income=True),
+            TransactionModel(account=account, amount=40, description="egreso", date=date(2022, 2, 20), income=False),
+            TransactionModel(account=account, amount=300, description="ajuste manual", date=date(2022, 2, 15), income=True),
+            TransactionModel(account=account, amount=20, description="ingreso", date=date(2022, 2, 10), income=True),
+            TransactionModel(account=account, amount=5, description="ingreso", date=date(2022, 1, 25), income=True),
+        ])
+        self.assertNotIn(account.id, [drift.account_id for drift in reconcile_balances().drifts])
+
+        statement = next(statement for statement in iter_statements(2022, 2) if statement.account_id == account.id)
+        self.assertEqual(statement.opening, 105)
+        self.assertEqual([line[3] for line in statement.lines], [125, 325, 325])
+        self.assertEqual(statement.closing, account.balance)
+        self.assertEqual(balances_at([account.id], date(2022, 2, 28)), {account.id: account.balance})
+
+    def test_batches(self):
+        """
+        test para validar que los lotes de cuentas den los mismos extractos
+        """
+        self.assertEqual(list(iter_statements(2022, 2, batch_size=1)), list(iter_statements(2022, 2)))
+
+    def test_command_archive(self):
+        """
+        test para validar el zip con un extracto por cuenta y el resumen
+        """
+        call_command("generate_statements", 2022, 2, output=self.output, stdout=StringIO())
+        with zipfile.ZipFile(os.path.join(self.output, "statements-2022-02.zip")) as archive:
+            self.assertEqual(len(archive.namelist()), 4)
+            summary = archive.read("summary.csv").decode().splitlines()
+        self.assertEqual(summary[0], "account,opening,income,outgoing,count,closing")
+        self.assertIn("{},100.00,12.50,30.00,2,82.50".format(self.account.id), summary)
+
+    def test_command_files(self):
+        """
+        test para validar un archivo por cuenta
+        """
+        call_command("generate_statements", 2022, 2, output=self.output, no_archive=True, stdout=StringIO())
+        self.assertEqual(len(os.listdir(os.path.join(self.output, "2022-02"))), 4)
+        with self.assertRaises(CommandError):
+            call_command("generate_statements", 2022, 13, output=self.output, stdout=StringIO())
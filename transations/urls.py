@@ -1,9 +1,20 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from transations.views import AccountViewSet, TransationViewSet
+from transations import async_views
+from transations.views import AccountViewSet, JobViewSet, TransationViewSet
 
 
 router = DefaultRouter()
 router.register('account', AccountViewSet, basename='account')
 router.register('transaction', TransationViewSet, basename='transaction')
+router.register('job', JobViewSet, basename='job')
 
-urlpatterns = router.urls
\ No newline at end of file
+# Lecturas con el ORM asincrono, bajo ASGI no ocupan un hilo por peticion
+async_urlpatterns = [
+    path('async/account/', async_views.account_list, name='async-account-list'),
+    path('async/account/<int:pk>/', async_views.account_detail, name='async-account-detail'),
+    path('async/account/<int:pk>/transaction_history/', async_views.account_history, name='async-account-history'),
+    path('async/transaction/', async_views.transaction_list, name='async-transaction-list'),
+]
+
+urlpatterns = router.urls + async_urlpatterns
@@ -1,16 +1,41 @@
-from rest_framework import viewsets
+from pathlib import Path
+
+from rest_framework import mixins, status, viewsets
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 
-from transations.models import AccountModel, TransactionModel
-from transations.serializers import AccountSerializer, TransactionSerializer, AccountTransactionSerializer, TransferFromAccountToAccount
+from transations.models import AccountModel, TransactionModel, JobModel
+from transations.serializers import (
+    AccountSerializer, TransactionSerializer, AccountTransactionSerializer, TransferFromAccountToAccount,
+    BulkTransferFromAccountToAccount, BulkTransactionSerializer, BulkTransactionListSerializer,
+    TransactionExportSerializer, AccountSummarySerializer, JobSerializer, BalanceAtSerializer, TRANSACTION_ROWS
+)
+from transations.exports import EXPORT_FORMATS, export_rows
+from transations.idempotency import IDEMPOTENCY_HEADER, idempotent
+from transations.cache import cached_account, cached_account_list, invalidate_accounts
+from transations.balances import balances_at
 
 from django_filters import rest_framework as filters
 
+from transations.filters import TransactionFilter
+from transations.pagination import TransactionKeysetPagination
+from transations.parsers import NDJSONParser
+
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
 
 
+idempotency_parameter = openapi.Parameter(
+    IDEMPOTENCY_HEADER, openapi.IN_HEADER, description="Llave para reintentar la peticion sin repetir la operacion",
+    type=openapi.TYPE_STRING
+)
+
+
 @method_decorator(name='list', decorator=swagger_auto_schema( 
     operation_description="Listado de cuentas"
 ))
@@ -25,18 +50,64 @@ from django.utils.decorators import method_decorator
     operation_description="Eliminacion de cuentas"
 ))
 @method_decorator(name='transaction_history', decorator=swagger_auto_schema( 
-    operation_description="Detalle de transaciones para una sola cuenta"
+    operation_description="Detalle de transaciones para una sola cuenta",
+    manual_parameters=[
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Cursor de paginacion", type=openapi.TYPE_STRING),
+        openapi.Parameter('page_size', openapi.IN_QUERY, description="Numero de resultados por pagina", type=openapi.TYPE_INTEGER),
+    ]
+))
+@method_decorator(name='export', decorator=swagger_auto_schema( 
+    operation_description="Exportacion de transaciones de una cuenta en CSV o NDJSON",
+    query_serializer=TransactionExportSerializer
+))
+@method_decorator(name='summary', decorator=swagger_auto_schema( 
+    operation_description="Resumen de ingresos y egresos de una cuenta por mes y por año",
+    manual_parameters=[
+        openapi.Parameter('year', openapi.IN_QUERY, description="Año a consultar", type=openapi.TYPE_INTEGER),
+    ]
+))
+@method_decorator(name='balance_at', decorator=swagger_auto_schema( 
+    operation_description="Balance de la cuenta al final de una fecha",
+    query_serializer=BalanceAtSerializer
 ))
 @method_decorator(name='transaction_amount', decorator=swagger_auto_schema( 
-    operation_description="Transaciones entre cuentas"
+    operation_description="Transaciones entre cuentas",
+    manual_parameters=[idempotency_parameter]
+))
+@method_decorator(name='transaction_amount_bulk', decorator=swagger_auto_schema( 
+    operation_description="Transaciones masivas entre cuentas",
+    manual_parameters=[idempotency_parameter]
 ))
 class AccountViewSet(viewsets.ModelViewSet):
     """
     Vista para la creación de cuentas con balance inicial
     """
     serializer_class = AccountSerializer
-    queryset = AccountModel.objects.all()
+    queryset = AccountModel.objects.with_pending_balance()
     http_method_names = ["get", "post", "put", "delete"]
+    history_pagination_class = TransactionKeysetPagination
+
+    def list(self, request, *args, **kwargs):
+        """
+        Listado de cuentas a traves del cache, se invalida cuando cambia cualquier cuenta
+        """
+        data = cached_account_list(
+            lambda: self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Detalle de la cuenta a traves del cache, se invalida cuando cambia su balance
+        """
+        account_id = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        if not str(account_id).isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        data = cached_account(int(account_id), lambda: self.get_serializer(self.get_object()).data)
+        return Response(data)
+
+    def perform_destroy(self, instance):
+        invalidate_accounts(instance.id)
+        super().perform_destroy(instance)
 
     @action(
         detail=True, 
@@ -46,18 +117,98 @@ class AccountViewSet(viewsets.ModelViewSet):
     )
     def transaction_history(self, request, pk=None):
         """
-        Historico de transaciones realizadas en la cuenta
+        Historico de transaciones realizadas en la cuenta, paginado por cursor sobre (date, id)
         """
         instance_account = self.get_object()
-        serializer = self.get_serializer(instance=instance_account)
+        paginator = self.history_pagination_class()
+        queryset = instance_account.account_transaction.values_list(*TRANSACTION_ROWS.columns, named=True)
+        page = paginator.paginate_queryset(queryset, request, view=self)
+
+        context = self.get_serializer_context()
+        context["account_transaction"] = TRANSACTION_ROWS.many(page)
+        serializer = self.get_serializer(instance=instance_account, context=context)
+
+        data = serializer.data
+        data.update(paginator.get_links())
+        return Response(data)
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_name="export"
+    )
+    def export(self, request, pk=None):
+        """
+        Exportacion de transaciones de la cuenta, el contenido se genera mientras se envia
+        para mantener la memoria constante sin importar el numero de filas
+        """
+        instance_account = self.get_object()
+        params = TransactionExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        export_format = params.validated_data["export_format"]
+        render, content_type = EXPORT_FORMATS[export_format]
+        rows = export_rows(
+            instance_account.id,
+            date_from=params.validated_data.get("date_from"),
+            date_to=params.validated_data.get("date_to")
+        )
+
+        response = StreamingHttpResponse(render(rows), content_type=content_type)
+        response["Content-Disposition"] = 'attachment; filename="account_{}_transactions.{}"'.format(
+            instance_account.id, export_format)
+        return response
+
+    @action(
+        detail=True,
+        methods=["get"],
+        serializer_class=AccountSummarySerializer,
+        url_name="summary"
+    )
+    def summary(self, request, pk=None):
+        """
+        Resumen de ingresos, egresos, numero de transaciones y neto por mes y por año,
+        calculado sobre los acumulados mensuales en lugar de las transaciones
+        """
+        instance_account = self.get_object()
+        year = request.query_params.get("year")
+        if year is not None and not year.isdigit():
+            raise ValidationError({"year": ["Año invalido"]})
+
+        context = self.get_serializer_context()
+        context["year"] = int(year) if year is not None else None
+        serializer = self.get_serializer(instance=instance_account, context=context)
         return Response(serializer.data)
 
+    @action(
+        detail=True,
+        methods=["get"],
+        serializer_class=BalanceAtSerializer,
+        url_name="balance_at"
+    )
+    def balance_at(self, request, pk=None):
+        """
+        Balance de la cuenta al final de la fecha, calculado desde la ultima foto diaria
+        anterior y las transaciones posteriores a ella
+        """
+        params = self.get_serializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        account_id = int(pk) if str(pk).isdigit() else None
+        balances = balances_at([account_id], params.validated_data["date"]) if account_id else {}
+        if account_id not in balances:
+            raise NotFound("La cuenta no existe")
+        return Response(self.get_serializer({
+            "account": account_id, "date": params.validated_data["date"], "balance": balances[account_id]
+        }).data)
+
     @action(
         detail=False, 
         methods=["post"], 
         serializer_class=TransferFromAccountToAccount, 
         url_name="transaction_amount"
     )
+    @idempotent
     def transaction_amount(self, request):
         """
         Transferencia de dinero hacia otras cuentas
@@ -67,6 +218,22 @@ class AccountViewSet(viewsets.ModelViewSet):
         serializer.save()        
         return Response({"message": 'transferencia exitosa'})
 
+    @action(
+        detail=False, 
+        methods=["post"], 
+        serializer_class=BulkTransferFromAccountToAccount, 
+        url_name="transaction_amount_bulk"
+    )
+    @idempotent
+    def transaction_amount_bulk(self, request):
+        """
+        Transferencias masivas de dinero entre cuentas, se aplican todas o ninguna
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        return Response({"message": 'transferencias exitosas', "results": results})
+
 
 @method_decorator(name='list', decorator=swagger_auto_schema( 
     operation_description="Listado de transaciones"
@@ -75,11 +242,17 @@ class AccountViewSet(viewsets.ModelViewSet):
     auto_schema=None
 ))
 @method_decorator(name='create', decorator=swagger_auto_schema( 
-    operation_description="Creacion de transaciones"
+    operation_description="Creacion de transaciones",
+    manual_parameters=[idempotency_parameter]
 ))
 @method_decorator(name='destroy', decorator=swagger_auto_schema( 
     operation_description="Eliminacion de transaciones"
 ))
+@method_decorator(name='bulk', decorator=swagger_auto_schema( 
+    operation_description="Creacion masiva de transaciones (JSON o NDJSON)",
+    request_body=BulkTransactionSerializer(many=True),
+    manual_parameters=[idempotency_parameter]
+))
 class TransationViewSet(viewsets.ModelViewSet):
     """
     Vista para la creacion de transaciones
@@ -88,7 +261,89 @@ class TransationViewSet(viewsets.ModelViewSet):
     queryset = TransactionModel.objects.select_related("account").all()
     http_method_names = ["get", "post", "delete"]
     filter_backends = (filters.DjangoFilterBackend,)
-    filterset_fields = {
-        "account": ["exact"],
-        "date": ["year", "month"]
-    }
\ No newline at end of file
+    filterset_class = TransactionFilter
+    pagination_class = TransactionKeysetPagination
+
+    def list(self, request, *args, **kwargs):
+        """
+        Listado paginado de transaciones, las filas se leen con values_list() y se
+        serializan con TRANSACTION_ROWS en lugar de TransactionSerializer
+        """
+        queryset = self.filter_queryset(self.get_queryset()).values_list(*TRANSACTION_ROWS.columns, named=True)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(TRANSACTION_ROWS.many(page))
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        """
+        Creacion de transaciones con soporte de Idempotency-Key
+        """
+        return super().create(request, *args, **kwargs)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        serializer_class=BulkTransactionSerializer,
+        parser_classes=[JSONParser, NDJSONParser],
+        url_name="bulk"
+    )
+    @idempotent
+    def bulk(self, request):
+        """
+        Creacion masiva de transaciones, se aplican todas o ninguna
+        """
+        serializer = self.get_serializer(
+            data=request.data, many=True, allow_empty=False, max_length=BulkTransactionListSerializer.max_items)
+        serializer.is_valid(raise_exception=True)
+        instance_transations = serializer.save()
+        return Response(
+            {"message": 'transaciones creadas', "results": [instance.id for instance in instance_transations]},
+            status=status.HTTP_201_CREATED
+        )
+
+
+@method_decorator(name='create', decorator=swagger_auto_schema(
+    operation_description="Registro de trabajos (carga, exportacion o conciliacion), se ejecutan con run_jobs"
+))
+@method_decorator(name='retrieve', decorator=swagger_auto_schema(
+    operation_description="Estado y progreso del trabajo"
+))
+@method_decorator(name='download', decorator=swagger_auto_schema(
+    operation_description="Archivo generado por un trabajo de exportacion terminado"
+))
+class JobViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Vista para los trabajos que se ejecutan fuera de la peticion
+    """
+    serializer_class = JobSerializer
+    queryset = JobModel.objects.all()
+
+    def create(self, request, *args, **kwargs):
+        """
+        Registra el trabajo y responde de inmediato, el estado se consulta con el detalle
+        """
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_name="download"
+    )
+    def download(self, request, pk=None):
+        """
+        Descarga del archivo de una exportacion terminada
+
+        Raises:
+            NotFound: si el trabajo no es una exportacion terminada
+        """
+        job = self.get_object()
+        if job.kind != JobModel.EXPORT_TRANSACTIONS or job.status != JobModel.DONE:
+            raise NotFound("El trabajo no tiene un archivo disponible")
+
+        path = Path(settings.JOB_OUTPUT_DIR) / job.result["file"]
+        if not path.exists():
+            raise NotFound("El archivo del trabajo ya no existe")
+        return FileResponse(
+            open(path, "rb"), as_attachment=True, filename=job.result["file"], content_type=job.result["content_type"])